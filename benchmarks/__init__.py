@@ -0,0 +1 @@
+"""Benchmarks for the separation pipeline (run as scripts from the repository root)."""
@@ -0,0 +1,177 @@
+"""Offline stand-ins for yt-dlp, ffmpeg and Demucs.
+
+They accept the command lines the adapters build, sleep for a configured
+latency while printing progress like the real tools, and write valid WAV
+files in the places the adapters look for them. Behaviour per tool comes
+from a JSON object in FAKE_TOOLS_CONFIG (inline or a file path):
+
+    {"demucs": {"latency": 2.0, "jitter": 0.3, "failure_rate": 0.05, "progress_lines": 20}}
+
+install() writes launchers into a directory and registers everything
+with ExecutableResolver.
+"""
+import json
+import os
+import random
+import shutil
+import stat
+import sys
+import time
+import wave
+from pathlib import Path
+
+from src.infrastructure.executable_resolver import ExecutableResolver
+
+CONFIG_ENV = 'FAKE_TOOLS_CONFIG'
+TOOLS = ('yt-dlp', 'ffmpeg', 'demucs')
+
+DEFAULTS = {
+    'latency': 0.5,  # seconds per run
+    'jitter': 0.2,  # latency varies uniformly by +/- this fraction
+    'failure_rate': 0.0,  # probability that a run exits with status 1
+    'progress_lines': 10,
+    'audio_seconds': 30.0,  # length of downloaded audio
+    'memory_mb': 0,  # demucs: memory held while separating, at the default 8 s segments
+}
+
+SAMPLERATE = 44100
+STEMS = ('vocals', 'drums', 'bass', 'other')
+
+
+def tool_config(tool: str) -> dict:
+    """Settings of one tool: defaults, then "*" entries, then the tool's own."""
+    raw = os.environ.get(CONFIG_ENV, '')
+    if raw and not raw.lstrip().startswith('{'):
+        raw = Path(raw).read_text()
+    config = json.loads(raw) if raw else {}
+    return {**DEFAULTS, **config.get('*', {}), **config.get(tool, {})}
+
+
+def install(directory: Path, config: dict = None) -> dict[str, str]:
+    """Write launchers into directory, point ExecutableResolver at them, and return the mapping.
+
+    The config (if given) is exported through FAKE_TOOLS_CONFIG, so the
+    child processes of this process pick it up.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    root = Path(__file__).resolve().parent.parent.parent
+    mapping = {}
+    for tool in ('yt-dlp', 'ffmpeg'):
+        launcher = directory / tool
+        launcher.write_text(
+            f'#!/bin/sh\nPYTHONPATH="{root}${{PYTHONPATH:+:$PYTHONPATH}}" '
+            f'exec "{sys.executable}" -m benchmarks.fake_tools {tool} "$@"\n'
+        )
+        launcher.chmod(launcher.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+        mapping[tool] = str(launcher)
+    # The separator runs "python3 -m <demucs.separate>", so Demucs is replaced by a module
+    mapping['demucs.separate'] = 'benchmarks.fake_tools.demucs'
+    os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, [str(root), os.environ.get('PYTHONPATH')]))
+
+    if config is not None:
+        os.environ[CONFIG_ENV] = json.dumps(config)
+    for name, path in mapping.items():
+        ExecutableResolver.override(name, path)
+    return mapping
+
+
+def run(tool: str, argv: list[str]) -> int:
+    """Entry point of a stand-in; returns the exit status."""
+    config = tool_config(tool)
+    latency = config['latency'] * random.uniform(1 - config['jitter'], 1 + config['jitter'])
+    handler = {'yt-dlp': _yt_dlp, 'ffmpeg': _ffmpeg, 'demucs': _demucs}[tool]
+    return handler(argv, config, max(0.0, latency))
+
+
+def _yt_dlp(argv: list[str], config: dict, latency: float) -> int:
+    template = _option(argv, '--output') or '%(title)s.%(ext)s'
+    ext = _option(argv, '--audio-format') or 'mp3'
+    urls = _positionals(argv, with_values=('--format', '--output', '--audio-format', '--download-sections'))
+    url = urls[-1] if urls else ''
+    title = ''.join(c if c.isalnum() else '_' for c in url.rsplit('=', 1)[-1].rsplit('/', 1)[-1]) or 'video'
+    target = Path(template.replace('%(title)s', title).replace('%(ext)s', ext))
+    if '--get-filename' in argv:
+        print(target)
+        return 0
+
+    lines = max(1, config['progress_lines'])
+    for i in range(1, lines + 1):
+        time.sleep(latency / lines)
+        print(f'[download] {100 * i / lines:5.1f}% of 5.00MiB at 1.00MiB/s ETA 00:01', flush=True)
+    if _fails(config):
+        print('ERROR: simulated download failure', file=sys.stderr)
+        return 1
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _write_noise_wav(target, config['audio_seconds'])
+    return 0
+
+
+def _ffmpeg(argv: list[str], config: dict, latency: float) -> int:
+    inputs = [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == '-i']
+    if not inputs or not Path(inputs[0]).exists():
+        print(f'{inputs[0] if inputs else "?"}: No such file or directory', file=sys.stderr)
+        return 1
+    time.sleep(latency)
+    if _fails(config):
+        print('Simulated conversion failure', file=sys.stderr)
+        return 1
+    # Inputs are WAVs written by the other stand-ins; every output is a copy of the first
+    shutil.copyfile(inputs[0], argv[-1])
+    return 0
+
+
+def _demucs(argv: list[str], config: dict, latency: float) -> int:
+    output_dir = Path(_option(argv, '-o') or 'separated')
+    inputs = _positionals(argv, with_values=('-o', '-d', '-n', '--shifts', '--overlap', '--segment'))
+    # Like the model's activations, the memory used scales with the segment length
+    segment = float(_option(argv, '--segment') or 8)
+    held = b'\1' * int(config['memory_mb'] * 2**20 * min(segment, 8) / 8)  # pages are written, so resident
+    lines = max(1, config['progress_lines'])
+    for source in inputs:
+        for i in range(1, lines + 1):
+            time.sleep(latency / lines / len(inputs))
+            filled = 10 * i // lines
+            print(f'{100 * i // lines:3d}%|{"#" * filled}{" " * (10 - filled)}| {i}/{lines}',
+                  file=sys.stderr, flush=True)
+        if _fails(config):
+            print('RuntimeError: simulated separation failure', file=sys.stderr)
+            return 1
+        stem_dir = output_dir / 'htdemucs' / Path(source).stem
+        stem_dir.mkdir(parents=True, exist_ok=True)
+        for stem in STEMS:
+            shutil.copyfile(source, stem_dir / f'{stem}.wav')
+    del held
+    return 0
+
+
+def _option(argv: list[str], name: str):
+    for i, arg in enumerate(argv[:-1]):
+        if arg == name:
+            return argv[i + 1]
+    return None
+
+
+def _positionals(argv: list[str], with_values: tuple[str, ...]) -> list[str]:
+    positionals, skip = [], False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in with_values:
+            skip = True
+        elif not arg.startswith('-'):
+            positionals.append(arg)
+    return positionals
+
+
+def _fails(config: dict) -> bool:
+    return random.random() < config['failure_rate']
+
+
+def _write_noise_wav(path: Path, seconds: float):
+    frames = int(seconds * SAMPLERATE)
+    with wave.open(str(path), 'wb') as writer:
+        writer.setnchannels(2)
+        writer.setsampwidth(2)
+        writer.setframerate(SAMPLERATE)
+        writer.writeframes(random.randbytes(frames * 4))
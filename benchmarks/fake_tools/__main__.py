@@ -0,0 +1,8 @@
+"""python -m benchmarks.fake_tools <yt-dlp|ffmpeg|demucs> [arguments...]"""
+import sys
+
+from benchmarks.fake_tools import TOOLS, run
+
+if len(sys.argv) < 2 or sys.argv[1] not in TOOLS:
+    sys.exit(f"usage: python -m benchmarks.fake_tools {{{','.join(TOOLS)}}} [arguments...]")
+sys.exit(run(sys.argv[1], sys.argv[2:]))
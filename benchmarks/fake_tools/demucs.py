@@ -0,0 +1,7 @@
+"""Stand-in for "python -m demucs.separate"."""
+import sys
+
+from benchmarks.fake_tools import run
+
+if __name__ == '__main__':
+    sys.exit(run('demucs', sys.argv[1:]))
@@ -0,0 +1,210 @@
+"""History of benchmark results, and detection of regressions between commits.
+
+Results of benchmarks.pipeline are appended to a JSON-lines file, one line
+per case, keyed by commit, host fingerprint and case; runs of the same
+commit on the same host are pooled when comparing:
+
+    python -m benchmarks.pipeline --repeat 5 --json results.json
+    python -m benchmarks.history record results.json
+    python -m benchmarks.history compare <base commit> <head commit>
+
+compare exits with status 1 when a case got significantly slower (a
+permutation test on the wall-time samples, so use --repeat) or its peak
+memory grew, so it can gate a release.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import random
+import sys
+from pathlib import Path
+from statistics import mean, median
+from typing import Optional
+
+HISTORY_PATH = Path.home() / '.youtube_audio_splitter' / 'benchmark-history.jsonl'
+
+# A slowdown is reported when it is both this large and unlikely to be noise
+MIN_SLOWDOWN = 0.05
+ALPHA = 0.05
+# Peak RSS is close to deterministic; growth beyond this is reported
+MIN_MEMORY_GROWTH = 0.10
+# Exhaustive permutation tests up to this many splits, sampled beyond
+MAX_EXACT_PERMUTATIONS = 20000
+SAMPLED_PERMUTATIONS = 10000
+
+
+def host_fingerprint(host: dict) -> str:
+    """Short stable id of the hardware and OS a run was taken on."""
+    identity = {key: host.get(key) for key in ('node', 'system', 'machine', 'cpu_model', 'cpus')}
+    return hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def record(report: dict, path: Path = HISTORY_PATH) -> int:
+    """Append the results of one benchmark report; returns the number of entries written."""
+    if not report.get('commit'):
+        raise ValueError("The report has no commit; run the benchmark from a git checkout")
+    host = host_fingerprint(report['host'])
+    entries = [
+        {
+            'commit': report['commit'],
+            'dirty': report.get('dirty'),
+            'host': host,
+            'benchmark': report['benchmark'],
+            'schema': report.get('schema'),
+            'started_at': report['started_at'],
+            'config': {key: value for key, value in report['config'].items() if key != 'repeat'},
+            'case': result['case'],
+            'stage': result['stage'],
+            'wall_samples': result['wall_samples'],
+            'peak_rss_samples': result['peak_rss_samples'],
+            'audio_seconds': result['audio_seconds'],
+            'output_bytes': result['output_bytes'],
+        }
+        for result in report['results']
+    ]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        for entry in entries:
+            f.write(json.dumps(entry, sort_keys=True) + '\n')
+    return len(entries)
+
+
+def load(path: Path = HISTORY_PATH) -> list[dict]:
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def resolve_commit(entries: list[dict], prefix: str) -> str:
+    commits = list(dict.fromkeys(entry['commit'] for entry in entries if entry['commit'].startswith(prefix)))
+    if not commits:
+        raise SystemExit(f"No recorded results for commit {prefix}")
+    if len(commits) > 1:
+        raise SystemExit(f"Commit prefix {prefix} is ambiguous: {', '.join(c[:12] for c in commits)}")
+    return commits[0]
+
+
+def permutation_p_value(base: list[float], head: list[float], seed: int = 0) -> float:
+    """One-sided p-value of head's mean exceeding base's by chance."""
+    pooled = base + head
+    observed = mean(head) - mean(base)
+    splits = itertools.combinations(range(len(pooled)), len(head))
+    total = 1
+    for k in range(len(head)):
+        total = total * (len(pooled) - k) // (k + 1)
+    if total > MAX_EXACT_PERMUTATIONS:
+        rng = random.Random(seed)
+        splits = (rng.sample(range(len(pooled)), len(head)) for _ in range(SAMPLED_PERMUTATIONS))
+        total = SAMPLED_PERMUTATIONS
+
+    at_least = 0
+    for chosen in splits:
+        chosen = set(chosen)
+        picked = [value for i, value in enumerate(pooled) if i in chosen]
+        rest = [value for i, value in enumerate(pooled) if i not in chosen]
+        if mean(picked) - mean(rest) >= observed - 1e-12:
+            at_least += 1
+    return at_least / total
+
+
+def compare(entries: list[dict], base: str, head: str, host: Optional[str] = None) -> list[dict]:
+    """Compare every case both commits were benchmarked on, on the same host and config."""
+    def pooled(commit: str) -> dict:
+        groups = {}
+        for entry in entries:
+            if entry['commit'] != commit or (host and entry['host'] != host):
+                continue
+            key = (entry['host'], entry['benchmark'], json.dumps(entry['config'], sort_keys=True),
+                   entry['case'], entry['stage'])
+            group = groups.setdefault(key, {'wall': [], 'rss': []})
+            group['wall'] += entry['wall_samples']
+            group['rss'] += entry['peak_rss_samples']
+        return groups
+
+    before, after = pooled(base), pooled(head)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        slowdown = median(new['wall']) / median(old['wall']) - 1 if median(old['wall']) else 0.0
+        growth = median(new['rss']) / median(old['rss']) - 1 if median(old['rss']) else 0.0
+        enough = min(len(old['wall']), len(new['wall'])) >= 3
+        p_value = permutation_p_value(old['wall'], new['wall']) if enough else None
+
+        flags = []
+        if slowdown >= MIN_SLOWDOWN:
+            if p_value is None:
+                flags.append('slower? (fewer than 3 samples)')
+            elif p_value < ALPHA:
+                flags.append('slower')
+        if growth >= MIN_MEMORY_GROWTH:
+            flags.append('more memory')
+        rows.append({
+            'host': key[0], 'benchmark': key[1], 'config': json.loads(key[2]),
+            'case': key[3], 'stage': key[4],
+            'base_wall': median(old['wall']), 'head_wall': median(new['wall']),
+            'slowdown': slowdown, 'p_value': p_value,
+            'base_rss': median(old['rss']), 'head_rss': median(new['rss']),
+            'memory_growth': growth,
+            'flags': flags,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--store', type=Path, default=HISTORY_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='append a benchmark JSON report')
+    record_parser.add_argument('reports', type=Path, nargs='+')
+
+    commands.add_parser('list', help='show the recorded commits per host')
+
+    compare_parser = commands.add_parser('compare', help='flag regressions from BASE to HEAD')
+    compare_parser.add_argument('base', help='commit (prefix)')
+    compare_parser.add_argument('head', help='commit (prefix)')
+    compare_parser.add_argument('--host', help='only this host fingerprint')
+    compare_parser.add_argument('--json', type=Path, help='also write the comparison to this file')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        for report in args.reports:
+            count = record(json.loads(report.read_text()), args.store)
+            print(f"Recorded {count} results from {report} in {args.store}")
+        return
+
+    entries = load(args.store)
+    if args.command == 'list':
+        runs = {}
+        for entry in entries:
+            runs.setdefault((entry['host'], entry['commit']), set()).add(entry['started_at'])
+        for (host, commit), started in runs.items():
+            print(f"{host}  {commit[:12]}  {len(started)} run(s), last {max(started)}")
+        return
+
+    base, head = resolve_commit(entries, args.base), resolve_commit(entries, args.head)
+    rows = compare(entries, base, head, args.host)
+    if not rows:
+        sys.exit(f"No cases were benchmarked on both {base[:12]} and {head[:12]} on the same host")
+
+    print(f"{base[:12]} -> {head[:12]}")
+    print(f"{'case':<18} {'stage':<9} {'wall s':>15} {'change':>8} {'p':>6} {'peak MB':>13}  flags")
+    for row in rows:
+        p_value = '-' if row['p_value'] is None else f"{row['p_value']:.3f}"
+        print(
+            f"{row['case']:<18} {row['stage']:<9} "
+            f"{row['base_wall']:>7.2f}>{row['head_wall']:<7.2f} {row['slowdown']:>+8.1%} {p_value:>6} "
+            f"{row['base_rss'] / 2**20:>6.0f}>{row['head_rss'] / 2**20:<6.0f}  {', '.join(row['flags'])}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps({'base': base, 'head': head, 'cases': rows}, indent=2))
+    # Unconfirmed slowdowns are shown but do not fail the comparison
+    if any(flag in ('slower', 'more memory') for row in rows for flag in row['flags']):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""Offline load test of the job orchestration with stand-ins for yt-dlp, ffmpeg and Demucs.
+
+Pushes N jobs through the download-convert-separate use case and the job
+queue, as the window does, with fake tools of configurable latency and
+failure rate (see benchmarks.fake_tools), and reports throughput,
+latency percentiles and any threads or processes left behind:
+
+    python -m benchmarks.load_test --jobs 100 --parallel 8 --separation-workers 2 \\
+        --latency demucs=2.0 --failure-rate ffmpeg=0.05 --cancel 0.1
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks import fake_tools
+from src.application.dtos import ProcessRequest
+from src.application.job_queue import BatchingSeparator, ConcurrencyLimitedSeparator, PipelinedExecutor
+from src.application.use_cases import ProcessAudioUseCase
+from src.infrastructure.converter import FfmpegConverter
+from src.infrastructure.downloader import YtDlpDownloader
+from src.infrastructure.event_log import EventLog
+from src.infrastructure.separator import DemucsSeparator
+from src.infrastructure.thread_budget import ThreadBudgetPool
+
+# Time given to worker threads and processes to wind down before counting leaks
+GRACE_SECONDS = 2.0
+
+
+def tool_settings(pairs: list[str], key: str, config: dict):
+    """Fold "tool=value" arguments into the fake tools config."""
+    for pair in pairs:
+        tool, _, value = pair.partition('=')
+        if tool not in (*fake_tools.TOOLS, '*'):
+            raise SystemExit(f"Unknown tool in {pair!r}; expected one of {', '.join(fake_tools.TOOLS)} or *")
+        config.setdefault(tool, {})[key] = float(value)
+
+
+def percentile(values: list[float], fraction: float):
+    """Nearest-rank percentile (None without values)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+def failure_reason(error: str) -> str:
+    """Error text without per-job details, so equal failures are counted together."""
+    # "Command '['/path/ffmpeg', '-i', ...]' returned non-zero exit status 1."
+    reason = re.sub(r"Command '\['([^']+)'.*?\]'", lambda m: f'{Path(m.group(1)).name}', error.splitlines()[0])
+    return reason[:120]
+
+
+def child_processes(pid: int = None) -> list[dict]:
+    """Live descendants of a process (Linux /proc; empty elsewhere)."""
+    pid = pid or os.getpid()
+    children = {}
+    for stat in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            text = stat.read_text()
+        except OSError:
+            continue
+        # "pid (comm) state ppid ...": comm may contain spaces and parentheses
+        fields = text[text.rindex(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(stat.parent.name))
+
+    found, pending = [], list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        pending.extend(children.get(child, []))
+        try:
+            cmdline = (Path('/proc') / str(child) / 'cmdline').read_bytes().replace(b'\0', b' ').decode().strip()
+        except OSError:
+            continue
+        found.append({'pid': child, 'command': cmdline})
+    return found
+
+
+def build_use_case(separation_workers: int, memory_limit: int = None) -> ProcessAudioUseCase:
+    """The same separator chain main.py builds, over the real adapters."""
+    thread_budgets = ThreadBudgetPool.for_workers(separation_workers, pin=False)
+    separator = ConcurrencyLimitedSeparator(
+        DemucsSeparator(thread_budgets=thread_budgets, memory_limit=memory_limit),
+        max_concurrent=len(thread_budgets.budgets)
+    )
+    return ProcessAudioUseCase(
+        downloader=YtDlpDownloader(),
+        converter=FfmpegConverter(),
+        separator=BatchingSeparator(separator)
+    )
+
+
+def run(args, work_dir: Path) -> dict:
+    use_case = build_use_case(
+        args.separation_workers, int(args.memory_limit * 2**20) if args.memory_limit else None
+    )
+    executor = PipelinedExecutor(max_concurrent_jobs=args.parallel)
+    rng = random.Random(args.seed)
+
+    job_ids = []
+    started = time.monotonic()
+    for index in range(args.jobs):
+        request = ProcessRequest(
+            youtube_url=f'https://www.youtube.com/watch?v=load{index:05d}',
+            output_directory=work_dir / 'output',
+            download_format=args.download_format,
+            preset=args.preset
+        )
+        job_ids.append(executor.submit(
+            request.youtube_url,
+            lambda on_progress, cancellation_token, request=request: use_case.execute(
+                request, on_progress=on_progress, cancellation_token=cancellation_token
+            )
+        ))
+
+    # Cancel a share of the jobs at random points of the run
+    cancellations = sorted(
+        (rng.uniform(0, args.cancel_within), job_id)
+        for job_id in job_ids if rng.random() < args.cancel
+    )
+
+    def cancel_jobs():
+        for at, job_id in cancellations:
+            time.sleep(max(0.0, started + at - time.monotonic()))
+            executor.cancel(job_id)
+
+    canceller = threading.Thread(target=cancel_jobs, name='load-test-canceller')
+    canceller.start()
+
+    deadline = started + args.timeout
+    while executor.has_active_jobs and time.monotonic() < deadline:
+        time.sleep(0.05)
+    wall = time.monotonic() - started
+    canceller.join()
+    timed_out = executor.has_active_jobs
+
+    jobs = executor.jobs()
+    completed = [job for job in jobs if job.status == 'completed']
+    latencies = [job.finished_at - job.submitted_at for job in completed]
+    service = [job.finished_at - job.started_at for job in completed]
+    statuses = {}
+    for job in jobs:
+        statuses[job.status] = statuses.get(job.status, 0) + 1
+    errors = {}
+    for job in jobs:
+        if job.status == 'failed' and job.result is not None:
+            reason = failure_reason(job.result.error or job.result.message)
+            errors[reason] = errors.get(reason, 0) + 1
+
+    return {
+        'wall_seconds': round(wall, 3),
+        'timed_out': timed_out,
+        'statuses': statuses,
+        'errors': errors,
+        'cancel_requests': len(cancellations),
+        'throughput_jobs_per_minute': round(len(completed) * 60 / wall, 2) if wall else None,
+        'latency_seconds': {
+            name: round(value, 3) if value is not None else None
+            for name, value in (
+                ('p50', percentile(latencies, 0.5)),
+                ('p90', percentile(latencies, 0.9)),
+                ('p99', percentile(latencies, 0.99)),
+                ('max', max(latencies, default=None)),
+            )
+        },
+        'service_seconds_p50': round(percentile(service, 0.5), 3) if service else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--parallel', type=int, default=4, help='jobs the queue runs at once')
+    parser.add_argument('--separation-workers', type=int, default=1)
+    parser.add_argument('--preset', default='balanced')
+    parser.add_argument('--download-format', choices=('mp3', 'wav'), default='mp3',
+                        help='mp3 downloads go through the converter, wav downloads skip it')
+    parser.add_argument('--latency', nargs='*', default=[], metavar='TOOL=SECONDS')
+    parser.add_argument('--jitter', nargs='*', default=[], metavar='TOOL=FRACTION')
+    parser.add_argument('--failure-rate', nargs='*', default=[], metavar='TOOL=P')
+    parser.add_argument('--progress-lines', nargs='*', default=[], metavar='TOOL=N')
+    parser.add_argument('--memory', nargs='*', default=[], metavar='demucs=MB',
+                        help='memory the Demucs stand-in holds at the default segment length')
+    parser.add_argument('--memory-limit', type=float, metavar='MB', help='memory limit per separation')
+    parser.add_argument('--audio-seconds', type=float, default=fake_tools.DEFAULTS['audio_seconds'],
+                        help='length of the fake downloads')
+    parser.add_argument('--cancel', type=float, default=0.0, help='share of jobs to cancel')
+    parser.add_argument('--cancel-within', type=float, default=10.0,
+                        help='cancellations are spread over this many seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=600.0)
+    parser.add_argument('--verbose', action='store_true', help="show the adapters' output")
+    parser.add_argument('--json', type=Path, help='also write the results to this file')
+    args = parser.parse_args()
+
+    config = {'yt-dlp': {'audio_seconds': args.audio_seconds}}
+    tool_settings(args.latency, 'latency', config)
+    tool_settings(args.jitter, 'jitter', config)
+    tool_settings(args.failure_rate, 'failure_rate', config)
+    tool_settings(args.progress_lines, 'progress_lines', config)
+    tool_settings(args.memory, 'memory_mb', config)
+
+    threads_before = set(threading.enumerate())
+    processes_before = {process['pid'] for process in child_processes()}
+
+    work_dir = Path(tempfile.mkdtemp(prefix='load-test-'))
+    try:
+        fake_tools.install(work_dir / 'bin', config)
+        log_path = work_dir / 'adapters.log'
+        with open(log_path, 'w') as log:
+            with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log):
+                # Events go to the console (or the log file), not to the app's log directory
+                event_log = EventLog(directory=None, console_level=logging.DEBUG if args.verbose else logging.INFO)
+                event_log.start()
+                try:
+                    report = run(args, work_dir)
+                finally:
+                    event_log.stop()
+
+        # Whatever is still running after a grace period has leaked
+        deadline = time.monotonic() + GRACE_SECONDS
+        while time.monotonic() < deadline:
+            threads = [t for t in threading.enumerate() if t not in threads_before and t.is_alive()]
+            processes = [p for p in child_processes() if p['pid'] not in processes_before]
+            if not threads and not processes:
+                break
+            time.sleep(0.1)
+        report['leaked_threads'] = [f'{t.name} (daemon)' if t.daemon else t.name for t in threads]
+        report['leaked_processes'] = processes
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'benchmark': 'load_test',
+        'config': {
+            'jobs': args.jobs, 'parallel': args.parallel,
+            'separation_workers': args.separation_workers, 'cancel': args.cancel,
+            'memory_limit_mb': args.memory_limit,
+            'seed': args.seed, 'tools': config,
+        },
+        **report,
+    }
+
+    latency = report['latency_seconds']
+    print(f"{args.jobs} jobs in {report['wall_seconds']:.1f}s"
+          + (' (timed out)' if report['timed_out'] else '') + ': '
+          + ', '.join(f'{count} {status}' for status, count in sorted(report['statuses'].items())))
+    print(f"{report['cancel_requests']} cancellation requests")
+    print(f"throughput {report['throughput_jobs_per_minute']} jobs/min; latency "
+          + ', '.join(f'{name} {value}s' for name, value in latency.items()))
+    for reason, count in report['errors'].items():
+        print(f"  {count} x {reason}")
+    print(f"leaked threads: {report['leaked_threads'] or 'none'}; "
+          f"leaked processes: {[p['command'] for p in report['leaked_processes']] or 'none'}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
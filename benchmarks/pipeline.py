@@ -0,0 +1,242 @@
+"""Wall time, real-time factor, peak memory and output size of the convert and separate stages.
+
+Every case is a deterministic synthetic track (signal kind, length and
+sample rate; the seed is derived from the case name), so results of two
+commits on the same host can be compared directly:
+
+    python -m benchmarks.pipeline --kinds mix noise --seconds 10 60 --json results.json
+
+Each stage runs in a fresh process forked from a small fork server
+(started before any audio is generated), so the peak RSS of one case is
+not carried over into the next; it covers that process and the largest
+child it waited for (ffmpeg, the Demucs CLI).
+"""
+import argparse
+import json
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context, get_all_start_methods
+from pathlib import Path
+from statistics import median
+
+from benchmarks.synthetic import synthetic_signal, write_wav
+
+# Bumped whenever the meaning of a field in the results changes
+SCHEMA_VERSION = 1
+
+KINDS = ('noise', 'tones', 'mix')
+LENGTHS = (10.0, 60.0, 240.0)
+SAMPLERATES = (44100, 48000)
+STAGES = ('convert', 'separate')
+
+# A forked child inherits the parent's peak RSS, so workers come from a fork server
+START_METHOD = 'forkserver' if 'forkserver' in get_all_start_methods() else 'spawn'
+
+
+def case_name(kind: str, seconds: float, samplerate: int) -> str:
+    return f'{kind}-{seconds:g}s-{samplerate // 1000}k'
+
+
+def case_seed(name: str) -> int:
+    """Stable across runs and Python versions (unlike hash())."""
+    return zlib.crc32(name.encode())
+
+
+def git_commit() -> dict:
+    """Commit the benchmarked tree is at, and whether it has local changes."""
+    root = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+    return {'commit': commit, 'dirty': dirty}
+
+
+def host_info() -> dict:
+    """What the timings depend on besides the code."""
+    cpu_model = platform.processor()
+    try:
+        for line in Path('/proc/cpuinfo').read_text().splitlines():
+            if line.startswith('model name'):
+                cpu_model = line.split(':', 1)[1].strip()
+                break
+    except OSError:
+        pass
+
+    from src.infrastructure.thread_budget import available_cpus
+
+    return {
+        'node': platform.node(),
+        'system': f'{platform.system()} {platform.release()}',
+        'machine': platform.machine(),
+        'cpu_model': cpu_model,
+        'cpus': len(available_cpus()),
+        'python': platform.python_version(),
+    }
+
+
+def peak_rss_bytes() -> int:
+    """Peak RSS of this process or the largest child it has waited for."""
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak if sys.platform == 'darwin' else peak * 1024  # kB on Linux
+
+
+def directory_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in Path(path).rglob('*') if file.is_file())
+
+
+def run_stage(stage: str, source: Path, output_dir: Path, engine: str, preset: str) -> dict:
+    """Run one stage on one input; executed in a fresh worker process."""
+    from src.domain.entities import AudioFile, AudioFormat, SeparationPreset
+
+    audio_file = AudioFile(path=source, format=AudioFormat.WAV)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    load_seconds = 0.0
+    if stage == 'convert':
+        from src.infrastructure.converter import FfmpegConverter
+        started = time.perf_counter()
+        FfmpegConverter().convert_to_wav(audio_file, output_dir)
+        seconds = time.perf_counter() - started
+    else:
+        if engine == 'in-process':
+            from src.infrastructure.demucs_engine import DemucsEngine
+            separator = DemucsEngine()
+            started = time.perf_counter()
+            separator.load()  # reported apart from the separation itself
+            load_seconds = time.perf_counter() - started
+        else:
+            from src.infrastructure.separator import DemucsSeparator
+            separator = DemucsSeparator()
+        started = time.perf_counter()
+        separator.separate(audio_file, output_dir, on_output=lambda line: None,
+                           preset=SeparationPreset.named(preset))
+        seconds = time.perf_counter() - started
+
+    return {
+        'seconds': seconds,
+        'load_seconds': load_seconds,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'output_bytes': directory_size(output_dir),
+    }
+
+
+def measure(stage: str, source: Path, output_dir: Path, engine: str, preset: str) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context(START_METHOD)) as pool:
+        return pool.submit(run_stage, stage, source, output_dir, engine, preset).result()
+
+
+def run_case(kind: str, seconds: float, samplerate: int, args, work_dir: Path) -> list[dict]:
+    name = case_name(kind, seconds, samplerate)
+    source = work_dir / 'inputs' / f'{name}.wav'
+    source.parent.mkdir(parents=True, exist_ok=True)
+    write_wav(source, synthetic_signal(kind, seconds, case_seed(name), samplerate), samplerate)
+
+    results = []
+    for stage in args.stages:
+        # The separator reads the converted file when both stages run
+        stage_input = work_dir / 'convert' / name / f'{name}.wav' if stage == 'separate' else source
+        if not stage_input.exists():
+            stage_input = source
+
+        samples = []
+        output_dir = work_dir / stage / name
+        for _ in range(args.repeat):
+            # Every run starts from scratch: the adapters skip existing outputs
+            shutil.rmtree(output_dir, ignore_errors=True)
+            samples.append(measure(stage, stage_input, output_dir, args.engine, args.preset))
+
+        wall = [sample['seconds'] for sample in samples]
+        results.append({
+            'case': name,
+            'stage': stage,
+            'kind': kind,
+            'audio_seconds': seconds,
+            'samplerate': samplerate,
+            'input_bytes': source.stat().st_size,
+            'wall_seconds': round(median(wall), 4),
+            'wall_samples': [round(value, 4) for value in wall],
+            'rtf': round(median(wall) / seconds, 4),
+            'load_seconds': round(median(sample['load_seconds'] for sample in samples), 4),
+            'peak_rss_bytes': max(sample['peak_rss_bytes'] for sample in samples),
+            'peak_rss_samples': [sample['peak_rss_bytes'] for sample in samples],
+            'output_bytes': samples[-1]['output_bytes'],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+    parser.add_argument('--seconds', type=float, nargs='+', default=list(LENGTHS))
+    parser.add_argument('--samplerates', type=int, nargs='+', default=list(SAMPLERATES))
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--engine', choices=('cli', 'in-process'), default='cli',
+                        help='separate with the Demucs CLI (as the app does) or the preloaded engine')
+    parser.add_argument('--preset', default='balanced')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case; the median is reported')
+    parser.add_argument('--json', type=Path, help='also write the results to this file')
+    parser.add_argument('--record', action='store_true',
+                        help='append the results to the benchmark history (see benchmarks.history)')
+    args = parser.parse_args()
+
+    report = {
+        'schema': SCHEMA_VERSION,
+        'benchmark': 'pipeline',
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        **git_commit(),
+        'host': host_info(),
+        'config': {
+            'engine': args.engine,
+            'preset': args.preset,
+            'repeat': args.repeat,
+        },
+        'results': [],
+    }
+
+    if START_METHOD == 'forkserver':
+        from multiprocessing import forkserver
+        forkserver.ensure_running()
+
+    work_dir = Path(tempfile.mkdtemp(prefix='pipeline-bench-'))
+    try:
+        print(f"{'case':<18} {'stage':<9} {'wall s':>8} {'RTF':>7} {'peak MB':>8} {'out MB':>8}")
+        for samplerate in args.samplerates:
+            for seconds in args.seconds:
+                for kind in args.kinds:
+                    for result in run_case(kind, seconds, samplerate, args, work_dir):
+                        report['results'].append(result)
+                        print(
+                            f"{result['case']:<18} {result['stage']:<9} {result['wall_seconds']:>8.2f} "
+                            f"{result['rtf']:>7.3f} {result['peak_rss_bytes'] / 2**20:>8.0f} "
+                            f"{result['output_bytes'] / 2**20:>8.1f}"
+                        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+    if args.record:
+        from benchmarks.history import HISTORY_PATH, record
+        record(report)
+        print(f"Recorded in {HISTORY_PATH}")
+
+
+if __name__ == '__main__':
+    main()
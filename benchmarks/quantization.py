@@ -0,0 +1,106 @@
+"""Quality and speed of int8 dynamic quantization against the fp32 model.
+
+Separates a fixed set of synthetic tracks (known stems, fixed seeds) with
+both models in this process and reports the real-time factor, the SDR of
+each stem against the ground truth, and how far int8 drifts from fp32:
+
+    python -m benchmarks.quantization --tracks 3 --track-seconds 20
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import SAMPLERATE, sdr, write_test_track
+from src.domain.entities import AudioFile, AudioFormat, STEM_NAMES
+from src.infrastructure.demucs_engine import DEFAULT_MODEL, DemucsEngine
+from src.infrastructure.thread_budget import available_cpus
+from src.infrastructure.wav_io import open_wav_memmap
+
+
+def read_stem(path: Path) -> np.ndarray:
+    samples, layout = open_wav_memmap(path)
+    return np.asarray(samples, dtype=np.float32) / layout.full_scale
+
+
+def run_mode(quantize: bool, tracks: list[tuple[Path, dict]], work_dir: Path, model: str) -> dict:
+    engine = DemucsEngine(model_name=model, quantize=quantize)
+    started = time.perf_counter()
+    engine.load()
+    load_seconds = time.perf_counter() - started
+
+    label = 'int8' if quantize else 'fp32'
+    rtfs, scores, outputs = [], {name: [] for name in STEM_NAMES}, []
+    for path, stems in tracks:
+        duration = len(stems['vocals']) / SAMPLERATE
+        started = time.perf_counter()
+        separated = engine.separate(AudioFile(path=path, format=AudioFormat.WAV), work_dir / label)
+        rtfs.append((time.perf_counter() - started) / duration)
+
+        estimates = {stem.stem: read_stem(stem.path) for stem in separated.all_stems}
+        for name in STEM_NAMES:
+            scores[name].append(sdr(stems[name], estimates[name]))
+        outputs.append(estimates)
+
+    return {
+        'mode': label,
+        'load_seconds': round(load_seconds, 2),
+        'rtf': round(float(np.mean(rtfs)), 3),
+        'sdr': {name: round(float(np.mean(values)), 2) for name, values in scores.items()},
+        'outputs': outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--tracks', type=int, default=3, help='size of the fixed test set')
+    parser.add_argument('--track-seconds', type=float, default=20.0)
+    parser.add_argument('--json', type=Path, help='also write the results to this file')
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix='quantization-bench-'))
+    try:
+        tracks = []
+        for seed in range(args.tracks):
+            path = work_dir / f'track{seed}.wav'
+            tracks.append((path, write_test_track(path, args.track_seconds, seed=seed)))
+
+        baseline = run_mode(False, tracks, work_dir, args.model)
+        quantized = run_mode(True, tracks, work_dir, args.model)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    # How close int8 stays to the fp32 output, per stem
+    pairs = list(zip(baseline.pop('outputs'), quantized.pop('outputs')))
+    drift = {
+        name: round(float(np.mean([sdr(fp32[name], int8[name]) for fp32, int8 in pairs])), 2)
+        for name in STEM_NAMES
+    }
+
+    print(f"{args.tracks} tracks of {args.track_seconds:.0f}s, {len(available_cpus())} CPUs, model {args.model}")
+    print(f"{'mode':>6} {'load s':>7} {'RTF':>6} " + ' '.join(f'{name:>7}' for name in STEM_NAMES) + '  (SDR dB)')
+    for result in (baseline, quantized):
+        print(
+            f"{result['mode']:>6} {result['load_seconds']:>7.1f} {result['rtf']:>6.2f} "
+            + ' '.join(f"{result['sdr'][name]:>7.2f}" for name in STEM_NAMES)
+        )
+    print(f"speed-up x{baseline['rtf'] / quantized['rtf']:.2f}; int8 vs fp32 SDR: "
+          + ', '.join(f'{name} {value:.1f} dB' for name, value in drift.items()))
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            'model': args.model,
+            'tracks': args.tracks,
+            'track_seconds': args.track_seconds,
+            'results': [baseline, quantized],
+            'int8_vs_fp32_sdr': drift,
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
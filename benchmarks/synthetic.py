@@ -0,0 +1,92 @@
+"""Deterministic synthetic tracks with known stems."""
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLERATE = 44100
+
+
+def synthetic_stems(seconds: float, seed: int = 0, samplerate: int = SAMPLERATE) -> dict[str, np.ndarray]:
+    """Generate vocals/drums/bass/other as float32 (frames, 2) arrays.
+
+    The same seed always gives the same audio, so results stay comparable
+    across runs and commits.
+    """
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * samplerate)
+    t = np.arange(frames) / samplerate
+    beat = 60.0 / rng.uniform(90, 140)
+
+    # Vocals: a sung melody with vibrato, changing note every beat
+    notes = 220.0 * 2 ** (rng.integers(0, 12, int(seconds / beat) + 1) / 12)
+    pitch = notes[(t / beat).astype(int)] * (1 + 0.01 * np.sin(2 * np.pi * 5.5 * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / samplerate
+    vocals = 0.25 * (np.sin(phase) + 0.3 * np.sin(2 * phase) + 0.1 * np.sin(3 * phase))
+
+    # Drums: decaying noise bursts on the beat, kick thumps on every other one
+    position = t % beat
+    drums = 0.4 * rng.standard_normal(frames) * np.exp(-position * 40)
+    drums += 0.5 * np.sin(2 * np.pi * 55 * position) * np.exp(-position * 12) * ((t // beat) % 2 == 0)
+
+    # Bass: root notes an octave below, four beats per note
+    roots = 55.0 * 2 ** (rng.integers(0, 7, int(seconds / (4 * beat)) + 1) / 12)
+    bass = 0.3 * np.sin(2 * np.pi * np.cumsum(roots[(t / (4 * beat)).astype(int)]) / samplerate)
+
+    # Other: a sustained major chord
+    other = sum(0.08 * np.sin(2 * np.pi * f * t) for f in (261.6, 329.6, 392.0))
+
+    stems = {'vocals': vocals, 'drums': drums, 'bass': bass, 'other': other}
+    pans = {'vocals': 0.5, 'drums': 0.5, 'bass': 0.5, 'other': 0.3}
+    stems = {
+        name: np.stack([signal * (1 - pans[name]) * 2, signal * pans[name] * 2], axis=1)
+        for name, signal in stems.items()
+    }
+
+    # Leave headroom so the mix never clips
+    scale = 0.9 / max(np.abs(sum(stems.values())).max(), 1e-9)
+    return {name: (signal * scale).astype(np.float32) for name, signal in stems.items()}
+
+
+def synthetic_signal(kind: str, seconds: float, seed: int = 0, samplerate: int = SAMPLERATE) -> np.ndarray:
+    """A stereo float32 test signal: 'noise', 'tones' or 'mix' (a full synthetic track)."""
+    if kind == 'mix':
+        return sum(synthetic_stems(seconds, seed, samplerate).values())
+
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * samplerate)
+    if kind == 'noise':
+        return (0.3 * rng.standard_normal((frames, 2))).clip(-1.0, 1.0).astype(np.float32)
+    if kind == 'tones':
+        t = np.arange(frames) / samplerate
+        freqs = rng.uniform(60, 4000, 6)
+        signal = sum(np.sin(2 * np.pi * f * t) for f in freqs) * (0.9 / len(freqs))
+        return np.stack([signal, signal[::-1]], axis=1).astype(np.float32)
+    raise ValueError(f"Unknown signal kind: {kind}")
+
+
+def write_wav(path: Path, samples: np.ndarray, samplerate: int = SAMPLERATE):
+    """Write float (frames, channels) samples as 16-bit PCM."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as writer:
+        writer.setnchannels(samples.shape[1])
+        writer.setsampwidth(2)
+        writer.setframerate(samplerate)
+        writer.writeframes(pcm.tobytes())
+
+
+def write_test_track(
+    path: Path, seconds: float, seed: int = 0, samplerate: int = SAMPLERATE
+) -> dict[str, np.ndarray]:
+    """Write the mix of a synthetic track and return its stems."""
+    stems = synthetic_stems(seconds, seed, samplerate)
+    write_wav(path, sum(stems.values()), samplerate)
+    return stems
+
+
+def sdr(reference: np.ndarray, estimate: np.ndarray) -> float:
+    """Signal-to-distortion ratio in dB (higher is better)."""
+    length = min(len(reference), len(estimate))
+    reference, estimate = reference[:length], estimate[:length]
+    noise = np.sum((reference - estimate) ** 2)
+    return float(10 * np.log10((np.sum(reference ** 2) + 1e-9) / (noise + 1e-9)))
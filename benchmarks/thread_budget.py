@@ -0,0 +1,95 @@
+"""Jobs-per-hour of separation for different numbers of concurrent workers.
+
+Each run separates the same synthetic track N times with the cores split
+evenly among the workers, e.g.:
+
+    python -m benchmarks.thread_budget --jobs 8 --workers 1 2 4 8
+"""
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.synthetic import write_test_track
+from src.application.job_queue import ConcurrencyLimitedSeparator
+from src.domain.entities import AudioFile, AudioFormat
+from src.infrastructure.thread_budget import ThreadBudgetPool, available_cpus
+
+
+def make_separator(workers: int, fork_server: bool, pin: bool):
+    budgets = ThreadBudgetPool.for_workers(workers, pin=pin)
+    if fork_server:
+        from src.infrastructure.fork_server import ForkServerSeparator
+        separator = ForkServerSeparator(thread_budgets=budgets)
+        separator.start()  # model load is not part of the measurement
+    else:
+        from src.infrastructure.separator import DemucsSeparator
+        separator = DemucsSeparator(thread_budgets=budgets)
+    return separator, ConcurrencyLimitedSeparator(separator, max_concurrent=len(budgets.budgets))
+
+
+def run(workers: int, jobs: int, track: Path, work_dir: Path, fork_server: bool, pin: bool) -> dict:
+    separator, limited = make_separator(workers, fork_server, pin)
+    output_dirs = [work_dir / f'w{workers}-job{i}' for i in range(jobs)]
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(
+                lambda out: limited.separate(AudioFile(path=track, format=AudioFormat.WAV), out),
+                output_dirs
+            ))
+        elapsed = time.perf_counter() - started
+    finally:
+        if fork_server:
+            separator.shutdown()
+        for out in output_dirs:
+            shutil.rmtree(out, ignore_errors=True)
+
+    return {
+        'workers': workers,
+        'jobs': jobs,
+        'seconds': round(elapsed, 2),
+        'jobs_per_hour': round(jobs * 3600 / elapsed, 1),
+    }
+
+
+def main():
+    cpus = len(available_cpus())
+    default_workers = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers)
+    parser.add_argument('--jobs', type=int, default=8, help='separations per run')
+    parser.add_argument('--track-seconds', type=float, default=30.0)
+    parser.add_argument('--fork-server', action='store_true', help='use the preloaded in-process engine')
+    parser.add_argument('--no-pin-cpus', action='store_true')
+    parser.add_argument('--json', type=Path, help='also write the results to this file')
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix='thread-budget-bench-'))
+    try:
+        track = work_dir / 'track.wav'
+        write_test_track(track, args.track_seconds)
+
+        results = []
+        print(f"{cpus} CPUs, {args.jobs} jobs of {args.track_seconds:.0f}s per run")
+        print(f"{'workers':>8} {'threads':>8} {'seconds':>9} {'jobs/hour':>10}")
+        for workers in args.workers:
+            result = run(workers, args.jobs, track, work_dir, args.fork_server, not args.no_pin_cpus)
+            results.append(result)
+            print(
+                f"{workers:>8} {cpus // workers:>8} {result['seconds']:>9.1f} "
+                f"{result['jobs_per_hour']:>10.1f}"
+            )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        args.json.write_text(json.dumps({'cpus': cpus, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,46 +1,193 @@
 """Main entry point for YouTube Audio Splitter application."""
+import argparse
+import logging
+import multiprocessing
 import sys
-from PyQt6.QtWidgets import QApplication
 
-from src.application.use_cases import (
-    ProcessAudioUseCase,
-    ProcessLocalFileUseCase,
+from src.startup import (
+    lazy_instance,
+    report_when_window_ready,
+    start_profiler_if_requested,
 )
-from src.infrastructure.converter import FfmpegConverter
-from src.infrastructure.downloader import YtDlpDownloader
-from src.infrastructure.separator import DemucsSeparator
-from src.presentation.main_window import MainWindow
+
+
+def parse_args(argv):
+    """Parse application options, leaving Qt's own arguments alone."""
+    parser = argparse.ArgumentParser(description='YouTube Audio Splitter')
+    parser.add_argument(
+        '--fork-server', action='store_true',
+        help='preload Demucs once and fork a worker per separation job'
+    )
+    parser.add_argument(
+        '--progressive', action='store_true',
+        help='with --fork-server, write stems chunk by chunk so they can be played early'
+    )
+    parser.add_argument(
+        '--checkpoint', action='store_true',
+        help='with --fork-server, checkpoint separations so they resume after a crash'
+    )
+    parser.add_argument(
+        '--quantize', action='store_true',
+        help='with --fork-server, run an int8 dynamically quantized model (cached after first use)'
+    )
+    parser.add_argument(
+        '--separation-workers', type=int, default=1, metavar='N',
+        help='separations run at once; the CPU cores are divided among them (default: 1)'
+    )
+    parser.add_argument(
+        '--no-pin-cpus', action='store_true',
+        help='only limit thread counts, do not pin separation workers to CPUs'
+    )
+    parser.add_argument(
+        '--memory-limit', type=float, metavar='GB',
+        help='memory one separation may use; near it, the job is retried with less '
+             'memory-hungry settings, or fails (default: no limit)'
+    )
+    parser.add_argument(
+        '--log-level', choices=('debug', 'info', 'warning', 'error'), default='info',
+        help='lowest level of events echoed to the console; debug includes the demucs '
+             'progress lines (default: info)'
+    )
+    parser.add_argument(
+        '--calibrate', action='store_true',
+        help='time each separation preset on this machine for estimates, then exit'
+    )
+    parser.add_argument(
+        '--profile-startup', action='store_true',
+        help='print per-module import times and time to first window'
+    )
+    return parser.parse_known_args(argv)
 
 
 def main():
     """Initialize and run the application."""
-    # Initialize infrastructure services
-    downloader = YtDlpDownloader()
-    converter = FfmpegConverter()
-    separator = DemucsSeparator()
+    profiler = start_profiler_if_requested(sys.argv[1:])
+    args, qt_argv = parse_args(sys.argv[1:])
+
+    # Structured event log of the pipeline (ring buffer, JSON-lines files, console)
+    from src.infrastructure.event_log import EventLog
+    event_log = EventLog(console_level=getattr(logging, args.log_level.upper())).start()
+
+    # Heavy modules are imported here rather than at module level, so that
+    # --help and the profiler do not pay for them up front.
+    from PyQt6.QtWidgets import QApplication
+
+    from src.application.job_queue import BatchingSeparator, ConcurrencyLimitedSeparator
+    from src.application.use_cases import (
+        ProcessAudioUseCase,
+        ProcessLocalFileUseCase,
+    )
+    from src.infrastructure.thread_budget import ThreadBudgetPool
+    from src.presentation.main_window import MainWindow
+
+    if profiler:
+        profiler.mark('core modules imported')
+
+    # Initialize infrastructure services (adapters are imported on first use)
+    downloader = lazy_instance('src.infrastructure.downloader', 'YtDlpDownloader')
+    converter = lazy_instance('src.infrastructure.converter', 'FfmpegConverter')
+    # One thread budget (cores, pinning) per concurrent separation
+    thread_budgets = ThreadBudgetPool.for_workers(args.separation_workers, pin=not args.no_pin_cpus)
+    memory_limit = int(args.memory_limit * 2**30) if args.memory_limit else None
+    if args.fork_server:
+        from src.infrastructure.fork_server import ForkServerSeparator
+        separator = ForkServerSeparator(
+            progressive=args.progressive,
+            checkpoint=args.checkpoint,
+            thread_budgets=thread_budgets,
+            quantize=args.quantize,
+            memory_limit=memory_limit
+        )
+    else:
+        separator = lazy_instance(
+            'src.infrastructure.separator', 'DemucsSeparator',
+            thread_budgets=thread_budgets, memory_limit=memory_limit
+        )
+
+    if args.calibrate:
+        from src.infrastructure.calibration import calibrate
+        if args.fork_server:
+            separator.start()  # model load is not part of the measurement
+        try:
+            calibrate(separator)
+        finally:
+            if args.fork_server:
+                separator.shutdown()
+        return
+
+    # Measured separation time per preset, for estimates
+    cost_model = lazy_instance('src.infrastructure.calibration', 'CalibratedCostModel')
+    # Per-stage profiles of jobs queued with "Profile"
+    job_profiler = lazy_instance('src.infrastructure.profiling', 'JobProfiler')
+
+    # Queued jobs download and convert in parallel; separation is limited
+    # to one job per thread budget
+    pipelined_separator = ConcurrencyLimitedSeparator(
+        separator, max_concurrent=len(thread_budgets.budgets)
+    )
+    # Short clips of concurrent jobs share one model run
+    pipelined_separator = BatchingSeparator(pipelined_separator)
+    # Long silences are cut out before separation and restored in the stems
+    pipelined_separator = lazy_instance(
+        'src.infrastructure.silence', 'SilenceSkippingSeparator', pipelined_separator
+    )
+    # Songs separated before (from another upload) reuse their stems; preview
+    # excerpts bypass the index so they are never recorded in it
+    preview_separator = pipelined_separator
+    pipelined_separator = lazy_instance(
+        'src.infrastructure.fingerprint', 'FingerprintReuseSeparator', pipelined_separator
+    )
+
+    # Work done on the stems once separation has finished
+    post_separation_steps = [
+        # Stems are only indexed here, once they are in their final directory
+        lazy_instance('src.infrastructure.fingerprint', 'FingerprintIndexStep', pipelined_separator),
+        lazy_instance('src.infrastructure.waveform', 'WaveformPeaksStep'),
+        lazy_instance('src.infrastructure.remix', 'RemixExportStep'),
+        lazy_instance('src.infrastructure.stem_container', 'StemContainerExportStep'),
+        # Last: the steps above read the WAV stems
+        lazy_instance('src.infrastructure.stem_encoder', 'StemEncodeStep'),
+    ]
 
     # Initialize use cases
     process_audio_use_case = ProcessAudioUseCase(
         downloader=downloader,
         converter=converter,
-        separator=separator
+        separator=pipelined_separator,
+        post_separation_steps=post_separation_steps,
+        preview_separator=preview_separator,
+        cost_model=cost_model,
+        profiler=job_profiler
     )
 
     process_local_file_use_case = ProcessLocalFileUseCase(
         converter=converter,
-        separator=separator
+        separator=pipelined_separator,
+        post_separation_steps=post_separation_steps,
+        preview_separator=preview_separator,
+        cost_model=cost_model,
+        profiler=job_profiler
     )
 
     # Initialize and show GUI
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_argv)
+    if args.fork_server:
+        app.aboutToQuit.connect(separator.shutdown)
+    app.aboutToQuit.connect(event_log.stop)
     window = MainWindow(
         process_audio_use_case=process_audio_use_case,
-        process_local_file_use_case=process_local_file_use_case
+        process_local_file_use_case=process_local_file_use_case,
+        cost_model=cost_model,
+        event_log=event_log
     )
     window.show()
 
+    if profiler:
+        report_when_window_ready(profiler)
+
     sys.exit(app.exec())
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     main()
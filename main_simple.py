@@ -1,14 +1,29 @@
 """Simplified main entry point - KISS."""
 import sys
-from PyQt6.QtWidgets import QApplication
-from src.gui import MainWindow
+
+from src.startup import report_when_window_ready, start_profiler_if_requested
 
 
 def main():
     """Run the application."""
-    app = QApplication(sys.argv)
+    profiler = start_profiler_if_requested(sys.argv[1:])
+    qt_argv = [arg for arg in sys.argv if arg != '--profile-startup']
+
+    # Structured event log of the pipeline (ring buffer, JSON-lines files, console)
+    from src.infrastructure.event_log import EventLog
+    event_log = EventLog().start()
+
+    from PyQt6.QtWidgets import QApplication
+    from src.gui import MainWindow
+
+    app = QApplication(qt_argv)
+    app.aboutToQuit.connect(event_log.stop)
     window = MainWindow()
     window.show()
+
+    if profiler:
+        report_when_window_ready(profiler)
+
     sys.exit(app.exec())
 
 
@@ -1,7 +1,9 @@
 """Data Transfer Objects for application layer."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from ..domain.entities import DEFAULT_PRESET, MixSpec, SeparatedAudio
+
 
 @dataclass
 class DownloadRequest:
@@ -18,6 +20,14 @@ class ProcessRequest:
     output_directory: Path
     download_format: str  # 'wav' or 'mp3'
     should_split: bool = True
+    mixes: list[MixSpec] = field(default_factory=list)
+    start_time: float | None = None  # seconds; only this clip is processed
+    end_time: float | None = None
+    preview: bool = False  # publish stems of a short excerpt before the full run
+    preset: str = DEFAULT_PRESET  # name in SEPARATION_PRESETS
+    stem_format: str = 'wav'  # 'wav', 'flac', 'mp3' or 'opus'
+    stem_container: bool = False  # also write a multi-track .stem.mp4
+    profile: bool = False  # write per-stage profiles next to the output
 
 
 @dataclass
@@ -25,6 +35,14 @@ class LocalFileProcessRequest:
     """Request to process a local audio file."""
     file_path: Path
     output_directory: Path
+    mixes: list[MixSpec] = field(default_factory=list)
+    start_time: float | None = None  # seconds; only this clip is processed
+    end_time: float | None = None
+    preview: bool = False  # publish stems of a short excerpt before the full run
+    preset: str = DEFAULT_PRESET  # name in SEPARATION_PRESETS
+    stem_format: str = 'wav'  # 'wav', 'flac', 'mp3' or 'opus'
+    stem_container: bool = False  # also write a multi-track .stem.mp4
+    profile: bool = False  # write per-stage profiles next to the output
 
 
 @dataclass
@@ -33,6 +51,9 @@ class ProcessingProgress:
     status: str
     message: str
     percentage: int = 0
+    separated_audio: SeparatedAudio | None = None  # set when stems are playable early
+    available_seconds: float | None = None  # progressive separation: seconds written so far
+    estimated_seconds: float | None = None  # expected separation time, from the cost model
 
 
 @dataclass
@@ -42,3 +63,4 @@ class ProcessingResult:
     message: str
     output_path: Path | None = None
     error: str | None = None
+    separated_audio: SeparatedAudio | None = None
@@ -0,0 +1,415 @@
+"""Concurrent job queue for processing many sources at once."""
+import itertools
+import logging
+import threading
+import time
+import wave
+from contextlib import AbstractContextManager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..domain.correlation import current_job_id, current_stage, job_scope, stage_scope
+from ..domain.entities import AudioFile, SeparatedAudio, SeparationPreset
+from ..domain.services import IAudioSeparator, IBatchAudioSeparator
+from .dtos import ProcessingProgress, ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+# run(on_progress, cancellation_token) -> ProcessingResult
+JobRunner = Callable[
+    [Callable[[ProcessingProgress], None], Callable[[], bool]],
+    ProcessingResult
+]
+
+# Set on a PipelinedExecutor worker thread: while a job only waits (for a
+# batch), it hands its slot back under this context manager so the
+# executor can start another queued job
+_job_slot_handed_back: ContextVar[Optional[Callable[[], AbstractContextManager]]] = ContextVar(
+    'job_slot_handed_back', default=None
+)
+
+
+@dataclass
+class QueuedJob:
+    """Snapshot of a job in the queue."""
+    job_id: str
+    label: str
+    status: str = "queued"  # queued, running, completed, failed, cancelled
+    message: str = "Queued"
+    percentage: int = 0
+    submitted_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[ProcessingResult] = None
+    preview: Optional[SeparatedAudio] = None  # stems playable before the job finishes
+    estimated_seconds: Optional[float] = None  # cost model's separation estimate
+    estimated_at: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """Estimate remaining time from the cost model, else from progress made so far."""
+        if self.status != "running" or self.started_at is None:
+            return None
+        if self.estimated_seconds is not None and self.estimated_at is not None:
+            return max(0.0, self.estimated_seconds - (time.monotonic() - self.estimated_at))
+        if not 0 < self.percentage < 100:
+            return None
+        elapsed = time.monotonic() - self.started_at
+        return elapsed * (100 - self.percentage) / self.percentage
+
+
+class ConcurrencyLimitedSeparator:
+    """Separator wrapper that bounds how many separations run at once.
+
+    Downloads and conversions of queued jobs keep running while the
+    CPU-heavy separation stage waits for a free slot.
+    """
+
+    def __init__(self, separator: IAudioSeparator, max_concurrent: int = 1):
+        self.separator = separator
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> SeparatedAudio:
+        if on_output:
+            on_output("Waiting for a free separation slot...")
+        with self._slots:
+            return self.separator.separate(audio_file, output_dir, on_output=on_output, preset=preset)
+
+    def separate_batch(
+        self,
+        items: list[tuple[AudioFile, Path]],
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> list[SeparatedAudio]:
+        """Run a whole batch in one separation slot."""
+        if on_output:
+            on_output("Waiting for a free separation slot...")
+        with self._slots:
+            return self.separator.separate_batch(items, on_output=on_output, preset=preset)
+
+
+class _BatchEntry:
+    """A separate() call waiting for its batch."""
+
+    def __init__(self, audio_file: AudioFile, output_dir: Path, on_output, preset):
+        self.audio_file = audio_file
+        self.output_dir = output_dir
+        self.on_output = on_output
+        self.preset = preset
+        self.job_id = current_job_id()
+        self.stage = current_stage()
+        self.done = threading.Event()
+        self.result: Optional[SeparatedAudio] = None
+        self.error: Optional[BaseException] = None
+
+
+class BatchingSeparator:
+    """Separator wrapper that runs short tracks of concurrent jobs as one batch.
+
+    Short tracks (e.g. Shorts) wait briefly for others; whatever has
+    gathered is separated with a single separate_batch() call, so model
+    start-up and per-call overhead are paid once per batch. Tracks that
+    arrive while a batch runs form the next one. Only tracks with the same
+    preset share a batch. Long tracks are passed straight through.
+
+    Waiting tracks of PipelinedExecutor jobs hand their job slot back (up to
+    max_batch of them), so queued jobs keep starting and their short tracks
+    fill the next batch instead of waiting behind the job concurrency limit.
+    """
+
+    def __init__(
+        self,
+        separator: IBatchAudioSeparator,
+        max_track_seconds: float = 90.0,
+        max_batch: int = 8,
+        gather_seconds: float = 1.0
+    ):
+        self.separator = separator
+        self.max_track_seconds = max_track_seconds
+        self.max_batch = max_batch
+        self.gather_seconds = gather_seconds
+        self._lock = threading.Lock()
+        self._pending: list[_BatchEntry] = []
+        self._dispatching = False
+        self._slots_handed_back = 0
+
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> SeparatedAudio:
+        if not self._is_short(audio_file):
+            return self.separator.separate(audio_file, output_dir, on_output=on_output, preset=preset)
+
+        entry = _BatchEntry(audio_file, output_dir, on_output, preset)
+        with self._lock:
+            self._pending.append(entry)
+            dispatch = not self._dispatching
+            self._dispatching = True
+
+        if dispatch:
+            threading.Thread(target=self._dispatch, name='separation-batcher', daemon=True).start()
+        with self._job_slot_handed_back():
+            entry.done.wait()
+
+        if entry.error is not None:
+            raise entry.error
+        return entry.result
+
+    @contextmanager
+    def _job_slot_handed_back(self):
+        """Hand the waiting job's executor slot back, unless max_batch jobs already did."""
+        hand_back = _job_slot_handed_back.get()
+        with self._lock:
+            if hand_back is not None and self._slots_handed_back < self.max_batch:
+                self._slots_handed_back += 1
+            else:
+                hand_back = None
+        if hand_back is None:
+            yield
+            return
+        try:
+            with hand_back():
+                yield
+        finally:
+            with self._lock:
+                self._slots_handed_back -= 1
+
+    def _is_short(self, audio_file: AudioFile) -> bool:
+        try:
+            with wave.open(str(audio_file.path), 'rb') as reader:
+                duration = reader.getnframes() / reader.getframerate()
+        except (wave.Error, OSError, EOFError):
+            return False
+        return duration <= self.max_track_seconds
+
+    def _dispatch(self):
+        """Run batches until nothing is pending (on the batcher thread)."""
+        time.sleep(self.gather_seconds)
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._dispatching = False
+                    return
+                preset = self._pending[0].preset
+                batch = [entry for entry in self._pending if entry.preset == preset][:self.max_batch]
+                self._pending = [entry for entry in self._pending if entry not in batch]
+            self._run_batch(batch, preset)
+
+    def _run_batch(self, batch: list[_BatchEntry], preset: Optional[SeparationPreset]):
+        def on_output(line: str):
+            for entry in batch:
+                if entry.on_output:
+                    entry.on_output(line)
+
+        # Events of a shared run belong to all of its jobs
+        job_ids = ','.join(entry.job_id for entry in batch if entry.job_id) or None
+        with job_scope(job_ids), stage_scope(batch[0].stage):
+            self._separate_batch(batch, preset, on_output)
+
+    def _separate_batch(self, batch: list[_BatchEntry], preset: Optional[SeparationPreset], on_output):
+        try:
+            if len(batch) == 1:
+                entry = batch[0]
+                results = [self.separator.separate(
+                    entry.audio_file, entry.output_dir, on_output=on_output, preset=preset
+                )]
+            else:
+                results = self.separator.separate_batch(
+                    [(entry.audio_file, entry.output_dir) for entry in batch],
+                    on_output=on_output,
+                    preset=preset
+                )
+            for entry, result in zip(batch, results):
+                entry.result = result
+        except Exception as e:
+            for entry in batch:
+                entry.error = e
+        finally:
+            for entry in batch:
+                entry.done.set()
+
+
+class PipelinedExecutor:
+    """Runs queued jobs on worker threads with a configurable concurrency limit."""
+
+    def __init__(
+        self,
+        max_concurrent_jobs: int = 2,
+        on_update: Optional[Callable[[QueuedJob], None]] = None
+    ):
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.on_update = on_update
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: dict[str, QueuedJob] = {}
+        self._runners: dict[str, JobRunner] = {}
+        self._pending: list[str] = []
+        self._running: set[str] = set()
+        self._waiting: set[str] = set()  # running, but handed their slot back
+        self._cancelled: set[str] = set()
+
+    def submit(self, label: str, runner: JobRunner) -> str:
+        """Queue a job and return its id."""
+        with self._lock:
+            job_id = f"job-{next(self._ids)}"
+            job = QueuedJob(job_id=job_id, label=label, submitted_at=time.monotonic())
+            self._jobs[job_id] = job
+            self._runners[job_id] = runner
+            self._pending.append(job_id)
+        self._notify(job)
+        self._dispatch()
+        return job_id
+
+    def set_max_concurrent_jobs(self, limit: int):
+        """Change the concurrency limit; extra slots are filled immediately."""
+        with self._lock:
+            self.max_concurrent_jobs = max(1, limit)
+        self._dispatch()
+
+    def cancel(self, job_id: str):
+        """Cancel a queued job, or request cancellation of a running one."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return
+            self._cancelled.add(job_id)
+            if job_id not in self._pending:
+                job = replace(job, message="Cancelling...")
+                self._jobs[job_id] = job
+                cancelled_while_queued = False
+            else:
+                self._pending.remove(job_id)
+                self._runners.pop(job_id, None)
+                job = replace(
+                    job, status="cancelled", message="Cancelled",
+                    finished_at=time.monotonic()
+                )
+                self._jobs[job_id] = job
+                cancelled_while_queued = True
+        self._notify(job)
+        if cancelled_while_queued:
+            self._dispatch()
+
+    def cancel_all(self):
+        """Cancel every job that has not finished."""
+        for job in self.jobs():
+            self.cancel(job.job_id)
+
+    def jobs(self) -> list[QueuedJob]:
+        """Return snapshots of all jobs in submission order."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def forget_finished(self):
+        """Drop finished jobs from the queue."""
+        with self._lock:
+            for job_id in [j.job_id for j in self._jobs.values() if j.is_finished]:
+                del self._jobs[job_id]
+                self._cancelled.discard(job_id)
+
+    @property
+    def has_active_jobs(self) -> bool:
+        with self._lock:
+            return bool(self._pending or self._running)
+
+    def _dispatch(self):
+        started = []
+        with self._lock:
+            while self._pending and len(self._running - self._waiting) < self.max_concurrent_jobs:
+                job_id = self._pending.pop(0)
+                self._running.add(job_id)
+                job = replace(
+                    self._jobs[job_id], status="running", message="Starting...",
+                    started_at=time.monotonic()
+                )
+                self._jobs[job_id] = job
+                started.append((job, self._runners.pop(job_id)))
+
+        for job, runner in started:
+            self._notify(job)
+            threading.Thread(
+                target=self._run, args=(job.job_id, runner), name=job.job_id
+            ).start()
+
+    def _run(self, job_id: str, runner: JobRunner):
+        def on_progress(progress: ProcessingProgress):
+            changes = {'message': progress.message, 'percentage': progress.percentage}
+            if progress.separated_audio is not None:
+                changes['preview'] = progress.separated_audio
+            if progress.estimated_seconds is not None:
+                changes['estimated_seconds'] = progress.estimated_seconds
+                changes['estimated_at'] = time.monotonic()
+            self._update(job_id, **changes)
+
+        def cancellation_token() -> bool:
+            return job_id in self._cancelled
+
+        # Each job runs on its own thread, so this context is the job's
+        _job_slot_handed_back.set(lambda: self._slot_handed_back(job_id))
+        with job_scope(job_id):
+            logger.info(f"Started {self._jobs[job_id].label}")
+            try:
+                result = runner(on_progress, cancellation_token)
+            except Exception as e:
+                logger.exception("Job runner failed")
+                result = ProcessingResult(success=False, message="Processing failed", error=str(e))
+
+            if result.success:
+                status, message, percentage = "completed", "Completed", 100
+                logger.info("Completed")
+            elif cancellation_token():
+                status, message, percentage = "cancelled", "Cancelled", None
+                logger.info("Cancelled")
+            else:
+                status, message, percentage = "failed", f"Failed: {result.error or result.message}", None
+                logger.error(message)
+
+        with self._lock:
+            self._running.discard(job_id)
+        self._update(
+            job_id, status=status, message=message, percentage=percentage,
+            finished_at=time.monotonic(), result=result
+        )
+        self._dispatch()
+
+    @contextmanager
+    def _slot_handed_back(self, job_id: str):
+        """Let another queued job start while this one waits; it counts again afterwards."""
+        with self._lock:
+            self._waiting.add(job_id)
+        self._dispatch()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._waiting.discard(job_id)
+
+    def _update(self, job_id: str, percentage: Optional[int] = None, **changes):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if percentage is not None:
+                changes['percentage'] = percentage
+            job = replace(job, **changes)
+            self._jobs[job_id] = job
+        self._notify(job)
+
+    def _notify(self, job: QueuedJob):
+        if self.on_update:
+            self.on_update(job)
@@ -1,15 +1,35 @@
 """Use cases for audio processing application."""
+import logging
+import os
+import re
+import shutil
+import tempfile
+import wave
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
 from typing import Callable, Optional
 
+from ..domain.correlation import stage_scope
 from ..domain.entities import (
     AudioFile,
     AudioFormat,
     AudioSource,
     ProcessingJob,
     ProcessingStatus,
+    SEPARATION_PRESETS,
+    SeparatedAudio,
+    SeparationPreset,
+    STEM_NAMES,
+    TimeRange,
+)
+from ..domain.services import (
+    IAudioConverter,
+    IAudioDownloader,
+    IAudioSeparator,
+    IJobProfiler,
+    IPostSeparationStep,
+    ISeparationCostModel,
 )
-from ..domain.services import IAudioConverter, IAudioDownloader, IAudioSeparator
 from .dtos import (
     DownloadRequest,
     LocalFileProcessRequest,
@@ -18,6 +38,215 @@ from .dtos import (
     ProcessingResult,
 )
 
+logger = logging.getLogger(__name__)
+
+_TQDM_PERCENT = re.compile(r'(\d{1,3})%\|')
+# Progressive separators report "<done> of <total> seconds available in <stem dir>"
+_AVAILABLE = re.compile(r'([\d.]+) of ([\d.]+) seconds available in (.+)$')
+
+# Length of the excerpt separated for a preview, and how it is separated
+PREVIEW_SECONDS = 30.0
+PREVIEW_PRESET = SEPARATION_PRESETS['fast']
+
+
+def _output_reporter(
+    on_progress: Optional[Callable[[ProcessingProgress], None]],
+    percentage: int
+) -> Optional[Callable[[str], None]]:
+    """Forward separator output lines as splitting progress.
+
+    Demucs progress bars ("45%|####") are scaled into the range between
+    the splitting step's start percentage and 99. Progressive separators
+    also publish the partially written stems and how much of them is ready.
+    """
+    if not on_progress:
+        return None
+
+    def report(line: str):
+        available = _AVAILABLE.search(line)
+        if available:
+            done, total = float(available.group(1)), float(available.group(2))
+            fraction = min(done / total, 1.0) if total else 0.0
+            on_progress(ProcessingProgress(
+                status="splitting",
+                message=f"{done:.0f} seconds available",
+                percentage=percentage + int((99 - percentage) * fraction),
+                separated_audio=SeparatedAudio.from_directory(Path(available.group(3))),
+                available_seconds=done
+            ))
+            return
+
+        current = percentage
+        match = _TQDM_PERCENT.search(line)
+        if match:
+            current += (99 - percentage) * min(int(match.group(1)), 100) // 100
+        on_progress(ProcessingProgress(
+            status="splitting",
+            message=line,
+            percentage=current
+        ))
+
+    return report
+
+
+def _run_post_separation_steps(
+    steps: list[IPostSeparationStep],
+    job: ProcessingJob,
+    on_progress: Optional[Callable[[ProcessingProgress], None]]
+):
+    """Run the configured post-separation steps on a separated job."""
+    for step in steps:
+        if on_progress:
+            on_progress(ProcessingProgress(
+                status="splitting",
+                message=step.description,
+                percentage=99
+            ))
+        step.run(job)
+
+
+@contextmanager
+def _stage(profiler: Optional[IJobProfiler], job: ProcessingJob, stage: str):
+    """Tag the events of a stage with its name, and profile it when the job
+    asked for it and a profiler is configured."""
+    profiled = profiler.stage(job, stage) if profiler is not None and job.profile else nullcontext()
+    with stage_scope(stage), profiled:
+        yield
+
+
+def _report_separation_start(
+    on_progress: Optional[Callable[[ProcessingProgress], None]],
+    cost_model: Optional[ISeparationCostModel],
+    job: ProcessingJob,
+    percentage: int
+):
+    """Announce the splitting step, with the cost model's time estimate if there is one."""
+    if not on_progress:
+        return
+
+    estimate = None
+    if cost_model:
+        duration = _wav_duration(job.converted_file.path)
+        if duration is not None:
+            estimate = cost_model.estimate(job.preset, duration)
+
+    message = "Separating audio into stems..."
+    if estimate is not None:
+        minutes, seconds = divmod(int(estimate), 60)
+        message = f"Separating audio into stems ({job.preset.name}, about {minutes}:{seconds:02d})..."
+    on_progress(ProcessingProgress(
+        status="splitting",
+        message=message,
+        percentage=percentage,
+        estimated_seconds=estimate
+    ))
+
+
+def _wav_duration(path: Path) -> Optional[float]:
+    try:
+        with wave.open(str(path), 'rb') as reader:
+            return reader.getnframes() / reader.getframerate()
+    except (wave.Error, OSError, EOFError):
+        return None
+
+
+def _separate(
+    converter: IAudioConverter,
+    separator: IAudioSeparator,
+    preview_separator: IAudioSeparator,
+    job: ProcessingJob,
+    on_progress: Optional[Callable[[ProcessingProgress], None]],
+    percentage: int
+) -> SeparatedAudio:
+    """Separate the job's converted file, with a preview pass first if requested.
+
+    For a preview, the first PREVIEW_SECONDS are separated and their stems
+    published at the final stem paths. The full separation runs in a
+    staging directory and each finished stem then replaces its preview file
+    with os.replace, so readers never see a partially written stem. Each job
+    stages in its own directory; if the full pass fails, the published
+    preview stems are removed again so they are not mistaken for output.
+    """
+    converted_file = job.converted_file
+    output_dir = job.output_directory
+
+    if not job.preview:
+        return separator.separate(
+            converted_file,
+            output_dir,
+            on_output=_output_reporter(on_progress, percentage),
+            preset=job.preset
+        )
+
+    # Jobs of the queue share output directories, so each stages in its own
+    staging_root = Path(tempfile.mkdtemp(prefix='.preview-', dir=output_dir))
+    preview_root = staging_root / 'preview'
+    full_root = staging_root / 'full'
+    preview = None
+    try:
+        preview_root.mkdir()
+        excerpt = converter.convert_to_wav(
+            converted_file,
+            preview_root,
+            time_range=TimeRange(0.0, PREVIEW_SECONDS)
+        )
+        # Named like the full track, so both passes produce the same stem layout
+        excerpt_path = preview_root / converted_file.path.name
+        os.replace(excerpt.path, excerpt_path)
+
+        excerpt_stems = preview_separator.separate(
+            AudioFile(path=excerpt_path, format=AudioFormat.WAV),
+            preview_root,
+            preset=PREVIEW_PRESET
+        )
+        preview = _move_stems(excerpt_stems, preview_root, output_dir)
+        if on_progress:
+            on_progress(ProcessingProgress(
+                status="preview",
+                message="Preview ready, separating full track...",
+                percentage=percentage,
+                separated_audio=preview
+            ))
+
+        full = separator.separate(
+            converted_file,
+            full_root,
+            on_output=_output_reporter(on_progress, percentage),
+            preset=job.preset
+        )
+        return _move_stems(full, full_root, output_dir)
+    except BaseException:
+        if preview is not None:
+            _remove_stems(preview)
+        raise
+    finally:
+        shutil.rmtree(staging_root, ignore_errors=True)
+
+
+def _move_stems(separated: SeparatedAudio, from_root: Path, to_root: Path) -> SeparatedAudio:
+    """Atomically move stems to the same relative location under another root."""
+    stems = {}
+    for name in STEM_NAMES:
+        stem = getattr(separated, name)
+        if stem is None:
+            stems[name] = None
+            continue
+        target = to_root / stem.path.relative_to(from_root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(stem.path, target)
+        stems[name] = AudioFile(path=target, format=stem.format)
+    return SeparatedAudio(**stems)
+
+
+def _remove_stems(separated: SeparatedAudio):
+    """Delete stem files, and their directory once it is empty."""
+    for stem in separated.all_stems:
+        stem.path.unlink(missing_ok=True)
+        try:
+            stem.path.parent.rmdir()
+        except OSError:
+            pass
+
 
 class DownloadAudioUseCase:
     """Use case for downloading audio from YouTube."""
@@ -62,6 +291,7 @@ class DownloadAudioUseCase:
             )
 
         except Exception as e:
+            logger.exception("Download failed")
             return ProcessingResult(
                 success=False,
                 message="Download failed",
@@ -76,11 +306,19 @@ class ProcessAudioUseCase:
         self,
         downloader: IAudioDownloader,
         converter: IAudioConverter,
-        separator: IAudioSeparator
+        separator: IAudioSeparator,
+        post_separation_steps: Optional[list[IPostSeparationStep]] = None,
+        preview_separator: Optional[IAudioSeparator] = None,
+        cost_model: Optional[ISeparationCostModel] = None,
+        profiler: Optional[IJobProfiler] = None
     ):
         self.downloader = downloader
         self.converter = converter
         self.separator = separator
+        self.post_separation_steps = post_separation_steps or []
+        self.preview_separator = preview_separator or separator
+        self.cost_model = cost_model
+        self.profiler = profiler
 
     def execute(
         self,
@@ -98,7 +336,14 @@ class ProcessAudioUseCase:
                 source=source,
                 output_directory=request.output_directory,
                 download_format=audio_format,
-                should_split=request.should_split
+                should_split=request.should_split,
+                mixes=request.mixes,
+                time_range=TimeRange.from_bounds(request.start_time, request.end_time),
+                preview=request.preview,
+                preset=SeparationPreset.named(request.preset),
+                stem_format=AudioFormat(request.stem_format),
+                stem_container=request.stem_container,
+                profile=request.profile
             )
 
             # Ensure output directory exists
@@ -122,11 +367,14 @@ class ProcessAudioUseCase:
                     percentage=10
                 ))
 
-            downloaded_file = self.downloader.download(
-                source,
-                job.output_directory,
-                request.download_format
-            )
+            # The clip is cut during download, so conversion gets no time range
+            with _stage(self.profiler, job, 'download'):
+                downloaded_file = self.downloader.download(
+                    source,
+                    job.output_directory,
+                    request.download_format,
+                    time_range=job.time_range
+                )
             job.set_downloaded_file(downloaded_file)
 
             # Check cancellation
@@ -147,10 +395,11 @@ class ProcessAudioUseCase:
                     percentage=40
                 ))
 
-            converted_file = self.converter.convert_to_wav(
-                downloaded_file,
-                job.output_directory
-            )
+            with _stage(self.profiler, job, 'convert'):
+                converted_file = self.converter.convert_to_wav(
+                    downloaded_file,
+                    job.output_directory
+                )
             job.set_converted_file(converted_file)
 
             # Check if splitting is needed
@@ -179,18 +428,20 @@ class ProcessAudioUseCase:
 
             # Step 3: Separate audio
             job.mark_splitting()
-            if on_progress:
-                on_progress(ProcessingProgress(
-                    status="splitting",
-                    message="Separating audio into stems...",
-                    percentage=70
-                ))
-
-            separated_audio = self.separator.separate(
-                converted_file,
-                job.output_directory
-            )
+            _report_separation_start(on_progress, self.cost_model, job, 70)
+
+            with _stage(self.profiler, job, 'separate'):
+                separated_audio = _separate(
+                    self.converter,
+                    self.separator,
+                    self.preview_separator,
+                    job,
+                    on_progress,
+                    70
+                )
             job.set_separated_audio(separated_audio)
+            with _stage(self.profiler, job, 'post_separation'):
+                _run_post_separation_steps(self.post_separation_steps, job, on_progress)
 
             # Complete
             job.mark_completed()
@@ -204,10 +455,12 @@ class ProcessAudioUseCase:
             return ProcessingResult(
                 success=True,
                 message="Audio processed and separated successfully",
-                output_path=job.output_directory
+                output_path=job.output_directory,
+                separated_audio=job.separated_audio
             )
 
         except Exception as e:
+            logger.exception("Processing failed")
             if on_progress:
                 on_progress(ProcessingProgress(
                     status="failed",
@@ -227,10 +480,18 @@ class ProcessLocalFileUseCase:
     def __init__(
         self,
         converter: IAudioConverter,
-        separator: IAudioSeparator
+        separator: IAudioSeparator,
+        post_separation_steps: Optional[list[IPostSeparationStep]] = None,
+        preview_separator: Optional[IAudioSeparator] = None,
+        cost_model: Optional[ISeparationCostModel] = None,
+        profiler: Optional[IJobProfiler] = None
     ):
         self.converter = converter
         self.separator = separator
+        self.post_separation_steps = post_separation_steps or []
+        self.preview_separator = preview_separator or separator
+        self.cost_model = cost_model
+        self.profiler = profiler
 
     def execute(
         self,
@@ -257,8 +518,24 @@ class ProcessLocalFileUseCase:
 
             input_file = AudioFile(path=request.file_path, format=audio_format)
 
+            job = ProcessingJob(
+                source=AudioSource.from_local_file(str(request.file_path)),
+                output_directory=request.output_directory,
+                download_format=audio_format,
+                should_split=True,
+                mixes=request.mixes,
+                time_range=TimeRange.from_bounds(request.start_time, request.end_time),
+                preview=request.preview,
+                preset=SeparationPreset.named(request.preset),
+                stem_format=AudioFormat(request.stem_format),
+                stem_container=request.stem_container,
+                profile=request.profile
+            )
+            job.set_downloaded_file(input_file)
+
             # Check cancellation
             if cancellation_token and cancellation_token():
+                job.mark_cancelled()
                 return ProcessingResult(
                     success=False,
                     message="Process cancelled",
@@ -266,6 +543,7 @@ class ProcessLocalFileUseCase:
                 )
 
             # Step 1: Convert to WAV
+            job.mark_converting()
             if on_progress:
                 on_progress(ProcessingProgress(
                     status="converting",
@@ -273,13 +551,17 @@ class ProcessLocalFileUseCase:
                     percentage=20
                 ))
 
-            converted_file = self.converter.convert_to_wav(
-                input_file,
-                request.output_directory
-            )
+            with _stage(self.profiler, job, 'convert'):
+                converted_file = self.converter.convert_to_wav(
+                    input_file,
+                    request.output_directory,
+                    time_range=job.time_range
+                )
+            job.set_converted_file(converted_file)
 
             # Check cancellation
             if cancellation_token and cancellation_token():
+                job.mark_cancelled()
                 return ProcessingResult(
                     success=False,
                     message="Process cancelled",
@@ -287,19 +569,24 @@ class ProcessLocalFileUseCase:
                 )
 
             # Step 2: Separate audio
-            if on_progress:
-                on_progress(ProcessingProgress(
-                    status="splitting",
-                    message="Separating audio into stems...",
-                    percentage=50
-                ))
-
-            separated_audio = self.separator.separate(
-                converted_file,
-                request.output_directory
-            )
+            job.mark_splitting()
+            _report_separation_start(on_progress, self.cost_model, job, 50)
+
+            with _stage(self.profiler, job, 'separate'):
+                separated_audio = _separate(
+                    self.converter,
+                    self.separator,
+                    self.preview_separator,
+                    job,
+                    on_progress,
+                    50
+                )
+            job.set_separated_audio(separated_audio)
+            with _stage(self.profiler, job, 'post_separation'):
+                _run_post_separation_steps(self.post_separation_steps, job, on_progress)
 
             # Complete
+            job.mark_completed()
             if on_progress:
                 on_progress(ProcessingProgress(
                     status="completed",
@@ -310,10 +597,12 @@ class ProcessLocalFileUseCase:
             return ProcessingResult(
                 success=True,
                 message="Local file processed successfully",
-                output_path=request.output_directory
+                output_path=request.output_directory,
+                separated_audio=job.separated_audio
             )
 
         except Exception as e:
+            logger.exception("Processing failed")
             if on_progress:
                 on_progress(ProcessingProgress(
                     status="failed",
@@ -0,0 +1,40 @@
+"""Which job, and which stage of it, the running code is working for.
+
+The application layer sets both around each job and stage; events logged
+anywhere below (adapters, wrappers, watchdogs) are tagged with them, so the
+event log can be followed per job.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+_job_id: ContextVar[Optional[str]] = ContextVar('job_id', default=None)
+_stage: ContextVar[Optional[str]] = ContextVar('stage', default=None)
+
+
+def current_job_id() -> Optional[str]:
+    return _job_id.get()
+
+
+def current_stage() -> Optional[str]:
+    return _stage.get()
+
+
+@contextmanager
+def job_scope(job_id: Optional[str]):
+    """Tag what runs inside with a job's correlation id."""
+    token = _job_id.set(job_id)
+    try:
+        yield
+    finally:
+        _job_id.reset(token)
+
+
+@contextmanager
+def stage_scope(stage: Optional[str]):
+    """Tag what runs inside with a pipeline stage (download, convert, separate, ...)."""
+    token = _stage.set(stage)
+    try:
+        yield
+    finally:
+        _stage.reset(token)
@@ -1,5 +1,5 @@
 """Domain entities for audio processing."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
 from typing import Optional
@@ -9,6 +9,8 @@ class AudioFormat(Enum):
     """Audio format enumeration."""
     WAV = "wav"
     MP3 = "mp3"
+    FLAC = "flac"
+    OPUS = "opus"
 
 
 class ProcessingStatus(Enum):
@@ -22,6 +24,10 @@ class ProcessingStatus(Enum):
     CANCELLED = "cancelled"
 
 
+# Stems produced by the 4-stem Demucs models
+STEM_NAMES = ('vocals', 'drums', 'bass', 'other')
+
+
 @dataclass
 class AudioSource:
     """Represents an audio source (YouTube URL or local file)."""
@@ -47,6 +53,60 @@ class AudioSource:
         return cls(url_or_path=file_path, is_local=True)
 
 
+@dataclass(frozen=True)
+class TimeRange:
+    """A clip of the source in seconds; end=None means until the end."""
+    start: float = 0.0
+    end: Optional[float] = None
+
+    def __post_init__(self):
+        if self.start < 0:
+            raise ValueError(f"Clip start must not be negative: {self.start}")
+        if self.end is not None and self.end <= self.start:
+            raise ValueError(f"Clip end ({self.end}) must be after start ({self.start})")
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    @property
+    def label(self) -> str:
+        """Short tag for file names, e.g. '90-120' or '90-end'."""
+        end = 'end' if self.end is None else f'{self.end:g}'
+        return f'{self.start:g}-{end}'
+
+    @classmethod
+    def from_bounds(cls, start: Optional[float], end: Optional[float]) -> Optional['TimeRange']:
+        """Build a range from optional request fields; None when neither is set."""
+        if start is None and end is None:
+            return None
+        return cls(start=start or 0.0, end=end)
+
+    @classmethod
+    def parse(cls, text: str) -> Optional['TimeRange']:
+        """Parse 'start-end' with [[h:]m:]s times, e.g. '1:30-2:00' or '90-'."""
+        text = text.strip()
+        if not text:
+            return None
+        start, sep, end = text.partition('-')
+        if not sep:
+            raise ValueError(f"Clip must look like start-end: {text!r}")
+        return cls(
+            start=_parse_seconds(start) if start.strip() else 0.0,
+            end=_parse_seconds(end) if end.strip() else None
+        )
+
+
+def _parse_seconds(text: str) -> float:
+    seconds = 0.0
+    try:
+        for part in text.strip().split(':'):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"Invalid time: {text!r}")
+    return seconds
+
+
 @dataclass
 class AudioFile:
     """Represents an audio file."""
@@ -82,6 +142,85 @@ class SeparatedAudio:
         """Return all available stems."""
         return [stem for stem in [self.vocals, self.drums, self.bass, self.other] if stem is not None]
 
+    @classmethod
+    def from_directory(cls, stem_dir: Path) -> 'SeparatedAudio':
+        """Collect the stem WAV files Demucs wrote into a directory."""
+        stem_dir = Path(stem_dir)
+        stems = {}
+        for name in STEM_NAMES:
+            path = stem_dir / f'{name}.wav'
+            stems[name] = AudioFile(path=path, format=AudioFormat.WAV) if path.exists() else None
+        return cls(**stems)
+
+
+@dataclass
+class MixSpec:
+    """A named mix of stems, with a gain in dB per included stem."""
+    name: str
+    gains_db: dict[str, float]
+
+    def __post_init__(self):
+        if not self.name or self.name in STEM_NAMES:
+            raise ValueError(f"Invalid mix name: {self.name!r}")
+        unknown = set(self.gains_db) - set(STEM_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown stems in mix {self.name!r}: {', '.join(sorted(unknown))}")
+
+    @classmethod
+    def parse(cls, text: str) -> 'MixSpec':
+        """Parse 'name=stem[@dB]+stem[@dB]...', e.g. 'karaoke=drums+bass+other+vocals@-12'."""
+        name, sep, body = text.partition('=')
+        if not sep or not body:
+            raise ValueError(f"Mix must look like name=stem+stem: {text!r}")
+        gains_db = {}
+        for part in body.split('+'):
+            stem, _, db = part.partition('@')
+            try:
+                gains_db[stem.strip()] = float(db) if db else 0.0
+            except ValueError:
+                raise ValueError(f"Invalid gain in mix {text!r}: {db!r}")
+        return cls(name=name.strip(), gains_db=gains_db)
+
+
+@dataclass(frozen=True)
+class SeparationPreset:
+    """Named Demucs settings that trade separation quality for speed."""
+    name: str
+    shifts: int  # random time shifts averaged per segment (0: none)
+    overlap: float  # overlap between segments, 0..1
+    segment: Optional[int] = None  # segment length in seconds (None: model default)
+
+    @property
+    def relative_cost(self) -> float:
+        """Approximate model passes per second of audio."""
+        return max(1, self.shifts) / (1.0 - self.overlap)
+
+    @classmethod
+    def named(cls, name: str) -> 'SeparationPreset':
+        try:
+            return SEPARATION_PRESETS[name]
+        except KeyError:
+            raise ValueError(f"Unknown separation preset: {name!r}")
+
+    def with_shorter_segments(self) -> list['SeparationPreset']:
+        """Variants with shorter segments, which need less memory, longest first."""
+        return [
+            replace(self, segment=segment) for segment in DOWNSHIFT_SEGMENTS
+            if self.segment is None or segment < self.segment
+        ]
+
+
+SEPARATION_PRESETS = {
+    preset.name: preset for preset in (
+        SeparationPreset('fast', shifts=0, overlap=0.1),
+        SeparationPreset('balanced', shifts=1, overlap=0.25),  # demucs defaults
+        SeparationPreset('quality', shifts=4, overlap=0.5),
+    )
+}
+DEFAULT_PRESET = 'balanced'
+# Segment lengths (seconds) retried in turn when a separation nears its memory limit
+DOWNSHIFT_SEGMENTS = (4, 2)
+
 
 @dataclass
 class ProcessingJob:
@@ -95,6 +234,16 @@ class ProcessingJob:
     converted_file: Optional[AudioFile] = None
     separated_audio: Optional[SeparatedAudio] = None
     error_message: Optional[str] = None
+    mixes: list[MixSpec] = field(default_factory=list)
+    time_range: Optional[TimeRange] = None
+    preview: bool = False
+    preset: SeparationPreset = field(default_factory=lambda: SEPARATION_PRESETS[DEFAULT_PRESET])
+    stem_format: AudioFormat = AudioFormat.WAV  # stems and mixes are encoded to this at the end
+    stem_container: bool = False  # also export the mix and stems as one .stem.mp4
+    profile: bool = False  # profile each stage (see IJobProfiler)
+    mixed_files: list[AudioFile] = field(default_factory=list)
+    stem_container_file: Optional[Path] = None
+    profile_dir: Optional[Path] = None
 
     def __post_init__(self):
         self.output_directory = Path(self.output_directory)
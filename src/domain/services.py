@@ -1,31 +1,97 @@
 """Domain services for audio processing."""
 from pathlib import Path
-from typing import Protocol
+from typing import Callable, ContextManager, Optional, Protocol
 
-from .entities import AudioFile, AudioSource, SeparatedAudio
+from .entities import (
+    AudioFile,
+    AudioSource,
+    ProcessingJob,
+    SeparatedAudio,
+    SeparationPreset,
+    TimeRange,
+)
 
 
 class IAudioDownloader(Protocol):
     """Interface for audio downloader."""
 
-    def download(self, source: AudioSource, output_dir: Path, format: str) -> AudioFile:
-        """Download audio from source."""
+    def download(
+        self,
+        source: AudioSource,
+        output_dir: Path,
+        format: str,
+        time_range: Optional[TimeRange] = None
+    ) -> AudioFile:
+        """Download audio from source, optionally only the given clip."""
         ...
 
 
 class IAudioConverter(Protocol):
     """Interface for audio converter."""
 
-    def convert_to_wav(self, input_file: AudioFile, output_dir: Path) -> AudioFile:
-        """Convert audio file to WAV format."""
+    def convert_to_wav(
+        self,
+        input_file: AudioFile,
+        output_dir: Path,
+        time_range: Optional[TimeRange] = None
+    ) -> AudioFile:
+        """Convert audio file to WAV format, optionally trimming it to a clip."""
         ...
 
 
 class IAudioSeparator(Protocol):
     """Interface for audio separator."""
 
-    def separate(self, audio_file: AudioFile, output_dir: Path) -> SeparatedAudio:
-        """Separate audio into stems."""
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> SeparatedAudio:
+        """Separate audio into stems, reporting tool output lines to on_output.
+
+        preset selects shifts/overlap/segment; None uses the separator's defaults.
+        """
+        ...
+
+
+class IBatchAudioSeparator(IAudioSeparator, Protocol):
+    """Interface for separators that can separate several files in one model run."""
+
+    def separate_batch(
+        self,
+        items: list[tuple[AudioFile, Path]],
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> list[SeparatedAudio]:
+        """Separate each (audio file, output directory) pair, in order."""
+        ...
+
+
+class ISeparationCostModel(Protocol):
+    """Interface for estimating separation time before a job runs."""
+
+    def estimate(self, preset: SeparationPreset, duration_seconds: float) -> Optional[float]:
+        """Expected separation time in seconds, or None when unknown."""
+        ...
+
+
+class IPostSeparationStep(Protocol):
+    """Interface for work done on the stems after separation."""
+
+    description: str
+
+    def run(self, job: ProcessingJob) -> None:
+        """Process the job's separated audio."""
+        ...
+
+
+class IJobProfiler(Protocol):
+    """Interface for profiling the stages of jobs that request it."""
+
+    def stage(self, job: ProcessingJob, name: str) -> ContextManager[None]:
+        """Profile the work done inside the context as one stage of the job."""
         ...
 
 
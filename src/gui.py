@@ -2,26 +2,36 @@
 import os
 import subprocess
 import sys
-import threading
 from pathlib import Path
 
-from PyQt6.QtCore import Q_ARG, QMetaObject, Qt
+from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QButtonGroup, QFileDialog, QHBoxLayout, QLabel,
     QLineEdit, QPushButton, QRadioButton, QSizePolicy,
     QSpacerItem, QVBoxLayout, QWidget
 )
 
+from .application.dtos import ProcessingProgress, ProcessingResult
+from .domain.entities import SeparatedAudio
+from .presentation.job_queue_panel import JobQueuePanel
+from .presentation.progress_bridge import ProgressBridge
 from .services import AudioProcessor
 
+# Rough completion per AudioProcessor stage message, for the queue's progress bars
+STAGE_PROGRESS = {
+    "Downloading...": 10,
+    "Converting to WAV...": 40,
+    "Separating audio...": 70,
+}
+
 
 class MainWindow(QWidget):
     """Main application window - simplified."""
 
     def __init__(self):
         super().__init__()
-        self.processor = AudioProcessor()
-        self.thread = None
+        self.progress = ProgressBridge(parent=self)
+        self.progress.updated.connect(lambda _, text: self.status.setText(text))
         self.init_ui()
 
     def init_ui(self):
@@ -29,7 +39,7 @@ class MainWindow(QWidget):
         layout = QVBoxLayout()
 
         # URL input
-        layout.addWidget(QLabel('YouTube URL:'))
+        layout.addWidget(QLabel('YouTube URLs (space separated):'))
         self.url_input = QLineEdit()
         layout.addWidget(self.url_input)
         layout.addItem(QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed))
@@ -76,7 +86,7 @@ class MainWindow(QWidget):
         layout.addLayout(dir_layout)
 
         # Local file button
-        local_btn = QPushButton('Process Local File')
+        local_btn = QPushButton('Process Local Files')
         local_btn.clicked.connect(self.select_local_file)
         layout.addWidget(local_btn)
 
@@ -93,7 +103,7 @@ class MainWindow(QWidget):
         self.download_only_btn.toggled.connect(self.update_button_text)
 
         # Cancel button
-        self.cancel_btn = QPushButton('Cancel')
+        self.cancel_btn = QPushButton('Cancel All')
         self.cancel_btn.setEnabled(False)
         self.cancel_btn.clicked.connect(self.cancel)
         self.cancel_btn.setStyleSheet(
@@ -102,6 +112,13 @@ class MainWindow(QWidget):
         )
         layout.addWidget(self.cancel_btn)
 
+        # Job queue
+        self.queue = JobQueuePanel(max_concurrent_jobs=2, parent=self)
+        self.queue.jobs_changed.connect(lambda: self.set_processing(self.queue.has_active_jobs))
+        self.queue.job_activated.connect(self.open_player)
+        self.players = []
+        layout.addWidget(self.queue)
+
         # Status
         self.status = QLabel('')
         self.status.setStyleSheet(
@@ -112,7 +129,8 @@ class MainWindow(QWidget):
 
         self.setLayout(layout)
         self.setWindowTitle('YouTube Audio Splitter')
-        self.setGeometry(300, 300, 500, 250)
+        self.setGeometry(300, 300, 640, 560)
+        self.setAcceptDrops(True)
 
     def select_directory(self):
         """Select output directory."""
@@ -131,22 +149,18 @@ class MainWindow(QWidget):
             subprocess.run(["xdg-open", path])
 
     def select_local_file(self):
-        """Select and process local file."""
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select Audio File", "",
+        """Select and queue local files."""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select Audio Files", "",
             "Audio Files (*.wav *.mp3);;All Files (*)"
         )
-        if file_path:
-            self.thread = threading.Thread(
-                target=self._process_local, args=(file_path,)
-            )
-            self.thread.start()
-            self.set_processing(True)
+        for file_path in file_paths:
+            self.queue_local(file_path)
 
     def start_process(self):
-        """Start YouTube processing."""
-        url = self.url_input.text().strip()
-        if not url:
+        """Queue every entered YouTube URL."""
+        urls = self.url_input.text().split()
+        if not urls:
             self.update_status("Error: Enter URL")
             return
 
@@ -155,85 +169,105 @@ class MainWindow(QWidget):
             self.update_status("Error: Select output directory")
             return
 
-        self.thread = threading.Thread(target=self._process_youtube, args=(url, output_dir))
-        self.thread.start()
-        self.set_processing(True)
+        for url in urls:
+            self.queue_youtube(url)
+        self.url_input.clear()
+        self.update_status(f"Queued {len(urls)} URL(s)")
 
-    def _process_youtube(self, url: str, output_dir: str):
-        """Process YouTube URL in thread."""
-        try:
-            format_choice = 'wav' if self.wav_btn.isChecked() else 'mp3'
-            split = self.download_split_btn.isChecked()
+    def queue_youtube(self, url: str):
+        """Queue a YouTube URL with the current options."""
+        output_dir = Path(self.output_path.text().strip())
+        format_choice = 'wav' if self.wav_btn.isChecked() else 'mp3'
+        split = self.download_split_btn.isChecked()
+        self.queue.submit(url, self._runner(
+            lambda processor, report: processor.process_youtube(
+                url, output_dir, format_choice, split, on_progress=report
+            )
+        ))
 
-            self.processor.process_youtube(
-                url, Path(output_dir), format_choice, split,
-                on_progress=self.update_status
+    def queue_local(self, file_path: str):
+        """Queue a local file."""
+        output_dir = Path(self.output_path.text().strip())
+        self.queue.submit(Path(file_path).name, self._runner(
+            lambda processor, report: processor.process_local(
+                Path(file_path), output_dir, on_progress=report
             )
-            self.update_status("✓ Completed!")
-        except InterruptedError:
-            self.update_status("✗ Cancelled")
-        except Exception as e:
-            self.update_status(f"✗ Error: {e}")
-        finally:
-            self.set_processing(False)
+        ))
+
+    def _runner(self, work):
+        """Adapt an AudioProcessor call to the job queue's runner signature."""
+        def run(on_progress, cancellation_token) -> ProcessingResult:
+            processor = AudioProcessor(cancellation_token=cancellation_token)
+            percentage = 0
+
+            def report(text: str):
+                nonlocal percentage
+                percentage = STAGE_PROGRESS.get(text, percentage)
+                on_progress(ProcessingProgress(status="running", message=text, percentage=percentage))
+
+            try:
+                output_path = work(processor, report)
+            except InterruptedError:
+                return ProcessingResult(success=False, message="Cancelled")
+            return ProcessingResult(success=True, message="Completed", output_path=output_path)
+        return run
+
+    def dragEnterEvent(self, event):
+        """Accept dropped files and URLs."""
+        if event.mimeData().hasUrls() or event.mimeData().hasText():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        """Queue dropped files and URLs."""
+        mime = event.mimeData()
+        if mime.hasUrls():
+            for url in mime.urls():
+                if url.isLocalFile():
+                    self.queue_local(url.toLocalFile())
+                else:
+                    self.queue_youtube(url.toString())
+        elif mime.hasText():
+            for url in mime.text().split():
+                self.queue_youtube(url)
+        event.acceptProposedAction()
 
-    def _process_local(self, file_path: str):
-        """Process local file in thread."""
+    def open_player(self, job):
+        """Open the stem player for a finished job."""
+        if not job.result or not job.result.output_path:
+            return
+        separated = SeparatedAudio.from_directory(job.result.output_path)
+        if not separated.all_stems:
+            self.update_status("No stems to play")
+            return
+
+        from .presentation.stem_player import StemPlayerWindow
         try:
-            output_dir = self.output_path.text()
-            self.processor.process_local(
-                Path(file_path), Path(output_dir),
-                on_progress=self.update_status
-            )
-            self.update_status("✓ Completed!")
-        except InterruptedError:
-            self.update_status("✗ Cancelled")
+            player = StemPlayerWindow(separated, title=f'Stems - {job.label}')
         except Exception as e:
             self.update_status(f"✗ Error: {e}")
-        finally:
-            self.set_processing(False)
+            return
+        self.players.append(player)
+        player.destroyed.connect(lambda: self.players.remove(player))
+        player.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        player.show()
 
     def cancel(self):
-        """Cancel processing."""
-        self.processor.cancel()
-        self.cancel_btn.setEnabled(False)
+        """Cancel all queued and running jobs."""
+        self.queue.cancel_all()
 
     def update_status(self, text: str):
-        """Update status label (thread-safe)."""
-        QMetaObject.invokeMethod(
-            self.status, "setText",
-            Qt.ConnectionType.QueuedConnection,
-            Q_ARG(str, text)
-        )
+        """Update status label (thread-safe, throttled)."""
+        self.progress.publish('status', text)
 
     def set_processing(self, processing: bool):
-        """Enable/disable widgets during processing."""
-        enabled = not processing
-        self.url_input.setEnabled(enabled)
-        self.output_path.setEnabled(enabled)
-        self.wav_btn.setEnabled(enabled)
-        self.mp3_btn.setEnabled(enabled)
-        self.download_only_btn.setEnabled(enabled)
-        self.download_split_btn.setEnabled(enabled)
-        self.process_btn.setEnabled(enabled)
+        """Enable the cancel button while jobs are queued or running."""
         self.cancel_btn.setEnabled(processing)
-
         if processing:
-            self.process_btn.setText("Processing...")
-            self.process_btn.setStyleSheet(
-                "QPushButton { font-size: 20px; background-color: #555; "
-                "color: #888; padding: 8px; margin: 8px; }"
-            )
             self.cancel_btn.setStyleSheet(
                 "QPushButton { font-size: 20px; background-color: #b33; "
                 "color: #fee; padding: 8px; margin: 8px; }"
             )
         else:
-            self.update_button_text()
-            self.process_btn.setStyleSheet(
-                "QPushButton { font-size: 20px; background-color: #006400; "
-                "color: #f4f4f4; padding: 8px; margin: 8px; }"
-            )
             self.cancel_btn.setStyleSheet(
                 "QPushButton { font-size: 20px; background-color: #555; "
                 "color: #888; padding: 8px; margin: 8px; }"
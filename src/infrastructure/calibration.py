@@ -0,0 +1,145 @@
+"""Measured separation cost per preset on this host."""
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from ..domain.entities import (
+    AudioFile,
+    AudioFormat,
+    DEFAULT_PRESET,
+    SEPARATION_PRESETS,
+    SeparationPreset,
+)
+from ..domain.services import IAudioSeparator
+
+CALIBRATION_PATH = Path.home() / '.youtube_audio_splitter' / 'calibration.json'
+
+# Two lengths separate the fixed per-job overhead from the per-second cost
+CALIBRATION_SECONDS = (10.0, 30.0)
+
+
+def host_key() -> str:
+    """Identifies the machine (and its core count) the measurements belong to."""
+    return f'{platform.node()}-{os.cpu_count()}cpu'
+
+
+class CalibratedCostModel:
+    """Estimates separation time as overhead + real-time factor * duration.
+
+    Presets that were not measured are scaled from a measured one by their
+    relative cost (shifts and overlap).
+    """
+
+    def __init__(self, path: Path = CALIBRATION_PATH, host: Optional[str] = None):
+        self.path = Path(path)
+        self.host = host or host_key()
+        try:
+            self._data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self._data = {}
+
+    @property
+    def measurements(self) -> dict:
+        """Measurements of this host, by preset name."""
+        return self._data.get(self.host, {})
+
+    def is_calibrated(self) -> bool:
+        return bool(self.measurements)
+
+    def rtf(self, preset: SeparationPreset) -> Optional[float]:
+        """Seconds of separation per second of audio."""
+        measured = self.measurements.get(preset.name)
+        if measured:
+            return measured['rtf']
+        reference = self._reference()
+        if reference is None:
+            return None
+        name, measured = reference
+        return measured['rtf'] * preset.relative_cost / SEPARATION_PRESETS[name].relative_cost
+
+    def estimate(self, preset: SeparationPreset, duration_seconds: float) -> Optional[float]:
+        """Expected separation time in seconds, or None when uncalibrated."""
+        rtf = self.rtf(preset)
+        if rtf is None:
+            return None
+        measured = self.measurements.get(preset.name) or self._reference()[1]
+        return measured['overhead'] + rtf * duration_seconds
+
+    def record(self, preset: SeparationPreset, overhead: float, rtf: float):
+        """Store a measurement for this host."""
+        self._data.setdefault(self.host, {})[preset.name] = {
+            'overhead': round(overhead, 3),
+            'rtf': round(rtf, 4),
+            'measured_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix('.tmp')
+        temp.write_text(json.dumps(self._data, indent=2))
+        os.replace(temp, self.path)
+
+    def _reference(self) -> Optional[tuple[str, dict]]:
+        measurements = {n: m for n, m in self.measurements.items() if n in SEPARATION_PRESETS}
+        if not measurements:
+            return None
+        name = DEFAULT_PRESET if DEFAULT_PRESET in measurements else next(iter(measurements))
+        return name, measurements[name]
+
+
+def calibrate(
+    separator: IAudioSeparator,
+    presets: Iterable[SeparationPreset] = SEPARATION_PRESETS.values(),
+    cost_model: Optional[CalibratedCostModel] = None,
+    on_output: Optional[Callable[[str], None]] = print
+) -> CalibratedCostModel:
+    """Time each preset on synthetic tracks and store the results."""
+    cost_model = cost_model or CalibratedCostModel()
+    work_dir = Path(tempfile.mkdtemp(prefix='separation-calibration-'))
+    try:
+        tracks = []
+        for seconds in CALIBRATION_SECONDS:
+            path = work_dir / f'calibration-{seconds:.0f}s.wav'
+            _write_calibration_track(path, seconds)
+            tracks.append((seconds, AudioFile(path=path, format=AudioFormat.WAV)))
+
+        for preset in presets:
+            timings = []
+            for seconds, audio_file in tracks:
+                started = time.perf_counter()
+                separator.separate(audio_file, work_dir / preset.name, preset=preset)
+                timings.append(time.perf_counter() - started)
+
+            (short, short_time), (long, long_time) = zip(CALIBRATION_SECONDS, timings)
+            rtf = max((long_time - short_time) / (long - short), 1e-3)
+            overhead = max(0.0, short_time - rtf * short)
+            cost_model.record(preset, overhead, rtf)
+            if on_output:
+                on_output(f"{preset.name:>10}: {rtf:.2f}x real time + {overhead:.1f}s per job")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return cost_model
+
+
+def _write_calibration_track(path: Path, seconds: float, samplerate: int = 44100):
+    """Tones, pulses and noise, so the model does representative work."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    signal = (
+        0.2 * np.sin(2 * np.pi * 220 * t * (1 + 0.01 * np.sin(2 * np.pi * 5 * t)))
+        + 0.2 * np.sin(2 * np.pi * 55 * t)
+        + 0.2 * rng.standard_normal(len(t)) * np.exp(-(t % 0.5) * 30)
+    )
+    pcm = (np.clip(signal, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(str(path), 'wb') as writer:
+        writer.setnchannels(2)
+        writer.setsampwidth(2)
+        writer.setframerate(samplerate)
+        writer.writeframes(np.repeat(pcm, 2).tobytes())
@@ -1,10 +1,14 @@
 """Audio format converter implementation."""
+import logging
 import subprocess
 from pathlib import Path
+from typing import Optional
 
-from ..domain.entities import AudioFile, AudioFormat
+from ..domain.entities import AudioFile, AudioFormat, TimeRange
 from .executable_resolver import ExecutableResolver
 
+logger = logging.getLogger(__name__)
+
 
 class FfmpegConverter:
     """Converts audio files using FFmpeg."""
@@ -12,23 +16,35 @@ class FfmpegConverter:
     def __init__(self):
         self.resolver = ExecutableResolver()
 
-    def convert_to_wav(self, input_file: AudioFile, output_dir: Path) -> AudioFile:
-        """Convert audio file to WAV format."""
-        # If already WAV, just return it
-        if input_file.format == AudioFormat.WAV and input_file.path.parent == output_dir:
-            return input_file
-
-        output_file = output_dir / f'{input_file.stem}.wav'
+    def convert_to_wav(
+        self,
+        input_file: AudioFile,
+        output_dir: Path,
+        time_range: Optional[TimeRange] = None
+    ) -> AudioFile:
+        """Convert audio file to WAV format, optionally trimming it to a clip."""
+        if time_range:
+            output_file = output_dir / f'{input_file.stem} [{time_range.label}].wav'
+        else:
+            # If already WAV, just return it
+            if input_file.format == AudioFormat.WAV and input_file.path.parent == output_dir:
+                return input_file
+            output_file = output_dir / f'{input_file.stem}.wav'
 
         # Skip if output already exists
         if output_file.exists():
-            print(f"[!] WAV file already exists, skipping conversion: {output_file}")
+            logger.info(f"WAV file already exists, skipping conversion: {output_file}")
             return AudioFile(path=output_file, format=AudioFormat.WAV)
 
         ffmpeg_path = self.resolver.get_executable_path('ffmpeg')
 
-        command = [
-            ffmpeg_path,
+        command = [ffmpeg_path]
+        if time_range:
+            # Input seeking: ffmpeg only decodes the clip
+            command += ['-ss', f'{time_range.start:g}']
+            if time_range.end is not None:
+                command += ['-to', f'{time_range.end:g}']
+        command += [
             '-i', str(input_file.path),
             '-vn',  # No video
             '-acodec', 'pcm_s16le',  # WAV codec
@@ -0,0 +1,331 @@
+"""In-process Demucs separation engine."""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..domain.entities import AudioFile, SeparatedAudio, SeparationPreset
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'htdemucs'
+
+# Dynamically quantized models are converted once and kept here
+QUANTIZED_MODEL_DIR = Path.home() / '.youtube_audio_splitter' / 'models'
+
+# Progressive/checkpointed mode: audio separated per step, and context added
+# on each side so chunk boundaries are as clean as in a whole-track run
+CHUNK_SECONDS = 30.0
+CONTEXT_SECONDS = 5.0
+CHECKPOINT_FILE = '.checkpoint.json'
+
+
+class DemucsEngine:
+    """Runs a Demucs model inside the current process.
+
+    torch and demucs are only imported by load(), so creating an engine is cheap
+    and the model weights are read once per engine instead of once per job.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        device: str = 'cpu',
+        progressive: bool = False,
+        checkpoint: bool = False,
+        quantize: bool = False
+    ):
+        if quantize and device != 'cpu':
+            raise ValueError("Quantized inference is only available on the CPU")
+        self.model_name = model_name
+        self.device = device
+        self.progressive = progressive
+        self.checkpoint = checkpoint
+        self.quantize = quantize
+        self.model = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def load(self):
+        """Import torch/demucs and load the model weights."""
+        if self.model is not None:
+            return
+
+        if self.quantize:
+            self.model = self._load_quantized()
+            return
+
+        from demucs.pretrained import get_model
+
+        model = get_model(self.model_name)
+        model.to(self.device)
+        model.eval()
+        self.model = model
+
+    def quantized_model_path(self) -> Path:
+        """Cache file of the int8 model (per torch version, as pickles are not portable)."""
+        import torch
+
+        version = torch.__version__.split('+')[0]
+        return QUANTIZED_MODEL_DIR / f'{self.model_name}-int8-dynamic-torch{version}.pt'
+
+    def _load_quantized(self):
+        """Load the int8 model from the cache, converting it on first use.
+
+        Linear and LSTM layers (the transformer and LSTM parts of the
+        models) get int8 weights with activations quantized on the fly.
+        """
+        import torch
+        from demucs.pretrained import get_model
+
+        path = self.quantized_model_path()
+        if path.exists():
+            try:
+                model = torch.load(path, map_location='cpu', weights_only=False)
+                model.eval()
+                return model
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable quantized model {path}: {e}")
+
+        logger.info(f"Quantizing {self.model_name} to int8 (one-time conversion)")
+        model = get_model(self.model_name)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_suffix('.tmp')
+        torch.save(model, temp)
+        os.replace(temp, path)
+        return model
+
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None,
+        chunked: bool = False
+    ) -> SeparatedAudio:
+        """Separate audio file into stems, using the same layout as the Demucs CLI.
+
+        chunked separates CHUNK_SECONDS at a time, which bounds memory use on
+        long tracks (always the case in progressive and checkpoint modes).
+        """
+        import torch
+        from demucs.separate import load_track
+
+        self.load()
+
+        wav = load_track(audio_file.path, self.model.audio_channels, self.model.samplerate)
+
+        # Same normalisation as demucs.separate
+        ref = wav.mean(0)
+        mean, std = ref.mean(), ref.std()
+        wav = (wav - mean) / std
+
+        stem_dir = Path(output_dir) / self.model_name / audio_file.stem
+        stem_dir.mkdir(parents=True, exist_ok=True)
+
+        with torch.no_grad():
+            if chunked or self.progressive or self.checkpoint:
+                self._separate_chunked(audio_file, wav, mean, std, stem_dir, on_output, preset)
+            else:
+                self._separate_whole(wav, mean, std, stem_dir, preset)
+
+        return SeparatedAudio.from_directory(stem_dir)
+
+    def separate_batch(
+        self,
+        items: list[tuple[AudioFile, Path]],
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> list[SeparatedAudio]:
+        """Separate several tracks in one batched forward pass.
+
+        Tracks are normalised individually, zero-padded to the longest one
+        and stacked; each result is cropped back to its own length.
+        """
+        import torch
+        from demucs.apply import apply_model
+        from demucs.audio import save_audio
+        from demucs.separate import load_track
+
+        self.load()
+
+        wavs, stats = [], []
+        for audio_file, _ in items:
+            wav = load_track(audio_file.path, self.model.audio_channels, self.model.samplerate)
+            ref = wav.mean(0)
+            mean, std = ref.mean(), ref.std()
+            wavs.append((wav - mean) / std)
+            stats.append((mean, std))
+
+        batch = torch.zeros(len(wavs), self.model.audio_channels, max(w.shape[-1] for w in wavs))
+        for index, wav in enumerate(wavs):
+            batch[index, :, :wav.shape[-1]] = wav
+
+        if on_output:
+            on_output(f"Separating {len(items)} tracks in one batch...")
+        with torch.no_grad():
+            sources = apply_model(
+                self.model, batch,
+                device=self.device, split=True, progress=False, **_apply_options(preset)
+            )
+
+        results = []
+        for (audio_file, output_dir), wav, (mean, std), track in zip(items, wavs, stats, sources):
+            stem_dir = Path(output_dir) / self.model_name / audio_file.stem
+            stem_dir.mkdir(parents=True, exist_ok=True)
+            track = track[..., :wav.shape[-1]] * std + mean
+            for source, name in zip(track, self.model.sources):
+                save_audio(source, str(stem_dir / f'{name}.wav'), samplerate=self.model.samplerate)
+            results.append(SeparatedAudio.from_directory(stem_dir))
+        return results
+
+    def _separate_whole(self, wav, mean, std, stem_dir: Path, preset: Optional[SeparationPreset]):
+        from demucs.apply import apply_model
+        from demucs.audio import save_audio
+
+        sources = apply_model(
+            self.model, wav[None],
+            device=self.device, split=True, progress=False, **_apply_options(preset)
+        )[0]
+        sources = sources * std + mean
+
+        for source, name in zip(sources, self.model.sources):
+            save_audio(source, str(stem_dir / f'{name}.wav'), samplerate=self.model.samplerate)
+
+    def _separate_chunked(
+        self,
+        audio_file: AudioFile,
+        wav,
+        mean,
+        std,
+        stem_dir: Path,
+        on_output,
+        preset: Optional[SeparationPreset]
+    ):
+        """Separate chunk by chunk, appending each chunk to the stem files.
+
+        In progressive mode a "N of M seconds available in <dir>" line is
+        reported after every chunk. With checkpointing, the offset reached
+        is recorded next to the stems after every chunk, and a later run on
+        the same input continues from there.
+        """
+        from demucs.apply import apply_model
+
+        from .wav_io import GrowingWavWriter
+
+        samplerate = self.model.samplerate
+        total = wav.shape[-1]
+        chunk = int(CHUNK_SECONDS * samplerate)
+        context = int(CONTEXT_SECONDS * samplerate)
+
+        checkpoint = _Checkpoint(
+            stem_dir, audio_file.path, self.model_name, samplerate, chunk,
+            preset.name if preset else None
+        )
+        resume_from = checkpoint.load(self.model.sources) if self.checkpoint else 0
+        if resume_from:
+            logger.info(f"Resuming separation of {audio_file.path.name} at {resume_from / samplerate:.1f}s")
+            if on_output:
+                on_output(f"Resuming from checkpoint at {resume_from / samplerate:.0f} seconds...")
+
+        writers = [
+            GrowingWavWriter(stem_dir / f'{name}.wav', samplerate, wav.shape[0], resume_frames=resume_from)
+            for name in self.model.sources
+        ]
+        try:
+            for start in range(resume_from, total, chunk):
+                end = min(start + chunk, total)
+                padded_start = max(0, start - context)
+                padded_end = min(total, end + context)
+
+                sources = apply_model(
+                    self.model, wav[None, :, padded_start:padded_end],
+                    device=self.device, split=True, progress=False, **_apply_options(preset)
+                )[0]
+                sources = sources[..., start - padded_start:end - padded_start] * std + mean
+
+                for source, writer in zip(sources, writers):
+                    writer.append(source.transpose(0, 1).cpu().numpy())
+                if self.checkpoint:
+                    checkpoint.save(end)
+
+                if on_output and self.progressive:
+                    on_output(
+                        f"{end / samplerate:.1f} of {total / samplerate:.1f} "
+                        f"seconds available in {stem_dir}"
+                    )
+        finally:
+            for writer in writers:
+                writer.close()
+        checkpoint.clear()
+
+
+def _apply_options(preset: Optional[SeparationPreset]) -> dict:
+    """apply_model keyword arguments for a preset (None: demucs defaults)."""
+    if preset is None:
+        return {'shifts': 1, 'overlap': 0.25}
+    options = {'shifts': preset.shifts, 'overlap': preset.overlap}
+    if preset.segment is not None:
+        options['segment'] = preset.segment
+    return options
+
+
+class _Checkpoint:
+    """Sidecar recording how far a chunked separation got, and on which input."""
+
+    def __init__(
+        self,
+        stem_dir: Path,
+        source: Path,
+        model_name: str,
+        samplerate: int,
+        chunk_frames: int,
+        preset_name: Optional[str]
+    ):
+        self.path = stem_dir / CHECKPOINT_FILE
+        self.stem_dir = stem_dir
+        stat = source.stat()
+        self.identity = {
+            'source': str(source.resolve()),
+            'source_size': stat.st_size,
+            'source_mtime_ns': stat.st_mtime_ns,
+            'model': model_name,
+            'samplerate': samplerate,
+            'chunk_frames': chunk_frames,
+            'preset': preset_name,
+        }
+
+    def load(self, stem_names: list[str]) -> int:
+        """Frames already separated, or 0 if there is no usable checkpoint."""
+        from .wav_io import read_wav_layout
+
+        try:
+            state = json.loads(self.path.read_text())
+            frames_done = int(state.pop('frames_done'))
+        except (OSError, ValueError, KeyError):
+            return 0
+        if state != self.identity:
+            return 0
+        try:
+            if any(read_wav_layout(self.stem_dir / f'{name}.wav').frames < frames_done for name in stem_names):
+                return 0
+        except (OSError, ValueError):
+            return 0
+        return frames_done
+
+    def save(self, frames_done: int):
+        """Atomically record the offset; the stem data is already flushed."""
+        temp = self.path.with_suffix('.tmp')
+        temp.write_text(json.dumps({**self.identity, 'frames_done': frames_done}))
+        os.replace(temp, self.path)
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
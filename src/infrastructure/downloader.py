@@ -1,12 +1,16 @@
 """YouTube audio downloader implementation."""
+import logging
 import os
 import subprocess
 import time
 from pathlib import Path
+from typing import Optional
 
-from ..domain.entities import AudioFile, AudioFormat, AudioSource
+from ..domain.entities import AudioFile, AudioFormat, AudioSource, TimeRange
 from .executable_resolver import ExecutableResolver
 
+logger = logging.getLogger(__name__)
+
 
 class YtDlpDownloader:
     """Downloads audio from YouTube using yt-dlp."""
@@ -14,13 +18,22 @@ class YtDlpDownloader:
     def __init__(self):
         self.resolver = ExecutableResolver()
 
-    def download(self, source: AudioSource, output_dir: Path, format: str) -> AudioFile:
-        """Download audio from YouTube URL."""
+    def download(
+        self,
+        source: AudioSource,
+        output_dir: Path,
+        format: str,
+        time_range: Optional[TimeRange] = None
+    ) -> AudioFile:
+        """Download audio from YouTube URL, optionally only the given clip."""
         if source.is_local:
             raise ValueError("YtDlpDownloader can only download from YouTube URLs")
 
         yt_dlp_path = self.resolver.get_executable_path('yt-dlp')
-        output_template = str(output_dir / '%(title)s.%(ext)s')
+        if time_range:
+            output_template = str(output_dir / f'%(title)s [{time_range.label}].%(ext)s')
+        else:
+            output_template = str(output_dir / '%(title)s.%(ext)s')
         codec = format
 
         command = [
@@ -30,8 +43,15 @@ class YtDlpDownloader:
             '--extract-audio',
             '--audio-format', codec,
             '--no-playlist',
-            source.url_or_path
         ]
+        if time_range:
+            # Only the clip is fetched; cut at exact times rather than keyframes
+            end = 'inf' if time_range.end is None else f'{time_range.end:g}'
+            command += [
+                '--download-sections', f'*{time_range.start:g}-{end}',
+                '--force-keyframes-at-cuts',
+            ]
+        command.append(source.url_or_path)
 
         # Get expected filename
         process = subprocess.Popen(
@@ -51,7 +71,7 @@ class YtDlpDownloader:
 
         # Check if file already exists
         if final_path.exists():
-            print(f"[!] File already exists, skipping download: {final_path}")
+            logger.info(f"File already exists, skipping download: {final_path}")
             audio_format = AudioFormat.WAV if format == 'wav' else AudioFormat.MP3
             return AudioFile(path=final_path, format=audio_format)
 
@@ -81,10 +101,10 @@ class YtDlpDownloader:
         retries = 0
         while retries < max_retries:
             if file_path.exists():
-                print(f"[!] File found: {file_path}")
+                logger.info(f"File found: {file_path}")
                 return True
             else:
-                print(f"[!] Waiting for file: {retries}/{max_retries} - {file_path}")
+                logger.info(f"Waiting for file: {retries}/{max_retries} - {file_path}")
             time.sleep(delay)
             retries += 1
         return False
@@ -0,0 +1,210 @@
+"""Structured event log of the pipeline.
+
+Modules log through the standard logging module (logging.getLogger(__name__)).
+Every event is stamped with the correlation id of its job and its stage
+(see domain.correlation), then
+
+- kept in an in-memory ring buffer the window reads from, and
+- written as JSON lines to rotating files under ~/.youtube_audio_splitter/logs
+  and echoed to the console, both by a background thread.
+
+The logging call itself only builds the message and queues it, so a
+chatty subprocess never waits on disk or terminal I/O.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from ..domain.correlation import current_job_id, current_stage
+
+LOG_DIR = Path.home() / '.youtube_audio_splitter' / 'logs'
+LOG_FILE_NAME = 'events.jsonl'
+# Rotation: events.jsonl plus this many older files of at most MAX_FILE_BYTES
+MAX_FILE_BYTES = 5 * 2**20
+BACKUP_COUNT = 5
+# Events kept in memory for the window
+RING_SIZE = 10000
+# Loggers below this one are the pipeline's (module names start with src.)
+ROOT_LOGGER = 'src'
+
+
+@dataclass(frozen=True)
+class Event:
+    """One logged event."""
+    seq: int  # increases by one per event of this process
+    time: float  # seconds since the epoch
+    level: str  # DEBUG, INFO, WARNING, ERROR
+    message: str
+    job: Optional[str]
+    stage: Optional[str]
+    source: str  # logger name, i.e. the module
+
+    def matches(self, job: Optional[str] = None, level: int = logging.NOTSET) -> bool:
+        """Whether the event belongs to a job (if given) and has at least a level."""
+        if job is not None and job not in (self.job or '').split(','):
+            return False
+        return logging.getLevelName(self.level) >= level
+
+    def format(self) -> str:
+        tags = ' '.join(filter(None, (self.job, self.stage)))
+        clock = time.strftime('%H:%M:%S', time.localtime(self.time))
+        return f"{clock} {self.level:<7} {f'[{tags}] ' if tags else ''}{self.message}"
+
+
+class CorrelationFilter(logging.Filter):
+    """Stamps records with the job and stage of the thread that logs them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'job'):
+            record.job = current_job_id()
+        if not hasattr(record, 'stage'):
+            record.stage = current_stage()
+        return True
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent events in memory."""
+
+    def __init__(self, capacity: int = RING_SIZE):
+        super().__init__()
+        self._events: deque[Event] = deque(maxlen=capacity)
+        self._seq = 0
+
+    def emit(self, record: logging.LogRecord):
+        # Runs under the handler's lock, so sequence numbers follow insertion order
+        self._seq += 1
+        self._events.append(Event(
+            seq=self._seq, time=record.created, level=record.levelname,
+            message=record.getMessage(), job=record.job, stage=record.stage, source=record.name
+        ))
+
+    def events(
+        self,
+        after: int = 0,
+        job: Optional[str] = None,
+        level: int = logging.NOTSET
+    ) -> list[Event]:
+        """Buffered events with seq > after, optionally of one job and at least a level."""
+        with self.lock:
+            events = list(self._events)
+        return [event for event in events if event.seq > after and event.matches(job, level)]
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per event."""
+
+    def __init__(self, session: str):
+        super().__init__()
+        self.session = session
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            'time': datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'session': self.session,
+            'job': record.job,
+            'stage': record.stage,
+            'source': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        return json.dumps(event, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The "[!] message" lines the adapters always printed, tagged with the job."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        tags = ' '.join(filter(None, (record.job, record.stage)))
+        return f"[!] {f'[{tags}] ' if tags else ''}{record.getMessage()}"
+
+
+class EventLog:
+    """Routes the pipeline's log records to the ring buffer, the files and the console."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = LOG_DIR,
+        console_level: int = logging.INFO,
+        capacity: int = RING_SIZE
+    ):
+        # Tells apart the runs of the app in the files
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.ring = RingBufferHandler(capacity)
+        self.directory = directory
+
+        handlers = []
+        if directory is not None:
+            try:
+                directory.mkdir(parents=True, exist_ok=True)
+                file_handler = logging.handlers.RotatingFileHandler(
+                    directory / LOG_FILE_NAME, maxBytes=MAX_FILE_BYTES,
+                    backupCount=BACKUP_COUNT, encoding='utf-8', delay=True
+                )
+                file_handler.setFormatter(JsonLinesFormatter(self.session))
+                handlers.append(file_handler)
+            except OSError as e:
+                print(f"[!] Event log files disabled: {e}", file=sys.stderr)
+        console = logging.StreamHandler(sys.stdout)
+        console.setLevel(console_level)
+        console.setFormatter(ConsoleFormatter())
+        handlers.append(console)
+
+        # Unbounded, so put() never waits. The logging thread only merges the
+        # message (and any traceback); JSON, console text and I/O are left to the listener
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._queue_handler = logging.handlers.QueueHandler(self._queue)
+        self._listener = logging.handlers.QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._lock = threading.Lock()
+        self._started = False
+
+        # Stamped on the logging thread, where the job's context is set
+        correlation = CorrelationFilter()
+        self.ring.addFilter(correlation)
+        self._queue_handler.addFilter(correlation)
+
+    def start(self) -> 'EventLog':
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        self._listener.start()
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(self.ring)
+        logger.addHandler(self._queue_handler)
+        logger.propagate = False
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Detach and write out everything still queued."""
+        with self._lock:
+            if not self._started:
+                return
+            self._started = False
+        logger = logging.getLogger(ROOT_LOGGER)
+        logger.removeHandler(self._queue_handler)
+        logger.removeHandler(self.ring)
+        logger.propagate = True
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+    def events(self, after: int = 0, job: Optional[str] = None, level: int = logging.NOTSET) -> list[Event]:
+        return self.ring.events(after, job, level)
+
+    @property
+    def path(self) -> Optional[Path]:
+        return self.directory / LOG_FILE_NAME if self.directory is not None else None
@@ -3,13 +3,28 @@ import os
 import sys
 from pathlib import Path
 
+# Stand-in executables, e.g. "ffmpeg=/tmp/fakes/ffmpeg" entries separated by os.pathsep
+OVERRIDES_ENV = 'SPLITTER_EXECUTABLES'
+
 
 class ExecutableResolver:
     """Resolves executable paths for bundled and development environments."""
 
+    # Set by override(); takes precedence over the environment variable
+    overrides: dict[str, str] = {}
+
+    @classmethod
+    def override(cls, executable_name: str, path: str):
+        """Use a stand-in for an executable (fakes for load tests, a custom build, ...)."""
+        cls.overrides[executable_name] = str(path)
+
     @staticmethod
     def get_executable_path(executable_name: str) -> str:
         """Get the path to an executable, handling both bundled and development environments."""
+        override = ExecutableResolver.overrides.get(executable_name) or _environment_overrides().get(executable_name)
+        if override:
+            return override
+
         if getattr(sys, 'frozen', False):
             # Application is bundled (py2app)
             app_dir = os.path.dirname(sys.executable)
@@ -18,3 +33,12 @@ class ExecutableResolver:
             # Development environment
             executable_path = executable_name
         return executable_path
+
+
+def _environment_overrides() -> dict[str, str]:
+    overrides = {}
+    for entry in os.environ.get(OVERRIDES_ENV, '').split(os.pathsep):
+        name, separator, path = entry.partition('=')
+        if separator and name and path:
+            overrides[name.strip()] = str(Path(path.strip()).expanduser())
+    return overrides
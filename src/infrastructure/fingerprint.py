@@ -0,0 +1,369 @@
+"""Spectral fingerprints to recognise songs that were already separated."""
+import logging
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from ..domain.entities import (
+    AudioFile,
+    AudioFormat,
+    DEFAULT_PRESET,
+    ProcessingJob,
+    SeparatedAudio,
+    SeparationPreset,
+    STEM_NAMES,
+)
+from ..domain.services import IAudioSeparator
+from .wav_io import open_wav_memmap, silent_blocks, write_wav
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = Path.home() / '.youtube_audio_splitter' / 'fingerprints-v3.sqlite'
+
+# Analysis rate, frame and hop: 0.37 s frames every 12 ms. The large
+# overlap keeps sub-fingerprints stable when sources are not hop-aligned.
+# Every source is resampled to TARGET_RATE, so 44.1 and 48 kHz uploads of a
+# song share the hop and can match.
+TARGET_RATE = 5512
+FRAME = 2048
+HOP = 64
+# Anti-aliasing low-pass before resampling: cutoff below TARGET_RATE / 2
+LOWPASS_HZ = 2500.0
+LOWPASS_TAPS = 63
+# 33 log-spaced bands give 32 bits per frame
+BAND_EDGES_HZ = np.geomspace(300.0, 2000.0, 34)
+FRAMES_PER_BATCH = 1024
+
+# A match must agree on most bits and cover nearly all of the new track,
+# otherwise reused stems would miss audio that the old source lacks
+MAX_BIT_ERROR_RATE = 0.25
+MIN_COVERAGE = 0.95
+MIN_VOTES = 8
+# Window cross-correlated to refine the offset to single samples
+ALIGN_SECONDS = 8.0
+
+HASH_BATCH = 500
+
+
+@dataclass
+class Fingerprint:
+    """32-bit sub-fingerprints, one per hop."""
+    hashes: np.ndarray  # uint32
+    hop_seconds: float
+
+    @property
+    def duration(self) -> float:
+        return len(self.hashes) * self.hop_seconds
+
+
+@dataclass
+class FingerprintMatch:
+    """An indexed track the query is part of, and where."""
+    stem_dir: Path
+    offset_seconds: float  # query time t is at t + offset in the indexed track
+    bit_error_rate: float
+
+
+def compute_fingerprint(path: Path) -> Fingerprint:
+    """Fingerprint a WAV file from band-energy differences (Haitsma-Kalker style)."""
+    samples, layout = open_wav_memmap(path)
+    mono = _resample_mono(samples, layout.frames, layout.samplerate)
+
+    if len(mono) < FRAME + HOP:
+        return Fingerprint(np.zeros(0, dtype=np.uint32), HOP / TARGET_RATE)
+
+    freqs = np.fft.rfftfreq(FRAME, 1.0 / TARGET_RATE)
+    edges = np.searchsorted(freqs, BAND_EDGES_HZ)
+    window = np.hanning(FRAME).astype(np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(mono, FRAME)[::HOP]
+
+    energies = np.empty((len(frames), len(edges) - 1), dtype=np.float64)
+    for first in range(0, len(frames), FRAMES_PER_BATCH):
+        batch = frames[first:first + FRAMES_PER_BATCH] * window
+        power = np.abs(np.fft.rfft(batch, axis=1)) ** 2
+        energies[first:first + len(batch)] = np.add.reduceat(power, edges, axis=1)[:, :len(edges) - 1]
+
+    band_diff = energies[:, :-1] - energies[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    weights = (1 << np.arange(bits.shape[1], dtype=np.uint64))
+    hashes = (bits.astype(np.uint64) @ weights).astype(np.uint32)
+    return Fingerprint(hashes, HOP / TARGET_RATE)
+
+
+def _resample_mono(samples: np.ndarray, frames: int, samplerate: int) -> np.ndarray:
+    """Mix down to mono and resample to TARGET_RATE.
+
+    Block averaging (streamed from the memory map) first brings the rate
+    down to less than 4x TARGET_RATE; a windowed-sinc low-pass and
+    linear interpolation then land exactly on TARGET_RATE.
+    """
+    factor = max(1, samplerate // (2 * TARGET_RATE))
+    rate = samplerate / factor
+    usable = frames - frames % factor
+    mono = np.empty(usable // factor, dtype=np.float32)
+    step = factor * (1 << 16)
+    for start in range(0, usable, step):
+        block = np.asarray(samples[start:min(start + step, usable)], dtype=np.float32)
+        mono[start // factor:(start + len(block)) // factor] = block.mean(axis=1).reshape(-1, factor).mean(axis=1)
+
+    cutoff = LOWPASS_HZ / rate
+    taps = np.sinc(2 * cutoff * (np.arange(LOWPASS_TAPS) - LOWPASS_TAPS // 2)) * np.hamming(LOWPASS_TAPS)
+    mono = np.convolve(mono, (taps / taps.sum()).astype(np.float32), mode='same')
+
+    count = int(len(mono) * TARGET_RATE / rate)
+    positions = np.arange(count, dtype=np.float64) * (rate / TARGET_RATE)
+    return np.interp(positions, np.arange(len(mono)), mono).astype(np.float32)
+
+
+def bit_error_rate(a: np.ndarray, b: np.ndarray) -> float:
+    """Share of differing bits between two equally long hash arrays."""
+    if not len(a):
+        return 1.0
+    differing = np.unpackbits(np.bitwise_xor(a, b).view(np.uint8)).sum()
+    return float(differing) / (32 * len(a))
+
+
+class FingerprintIndex:
+    """SQLite index from sub-fingerprint to (track, position) for fast lookup."""
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS tracks ('
+                'id INTEGER PRIMARY KEY, stem_dir TEXT UNIQUE, hop_seconds REAL, hashes BLOB, '
+                'preset TEXT)'
+            )
+            db.execute('CREATE TABLE IF NOT EXISTS hashes (hash INTEGER, track_id INTEGER, position INTEGER)')
+            db.execute('CREATE INDEX IF NOT EXISTS hashes_by_hash ON hashes (hash)')
+
+    def add(self, fingerprint: Fingerprint, stem_dir: Path, preset: str = DEFAULT_PRESET):
+        """Index a fingerprint for the stems in stem_dir (replacing an older entry)."""
+        with self._lock, self._connect() as db:
+            self._remove(db, str(stem_dir))
+            cursor = db.execute(
+                'INSERT INTO tracks (stem_dir, hop_seconds, hashes, preset) VALUES (?, ?, ?, ?)',
+                (str(stem_dir), fingerprint.hop_seconds, fingerprint.hashes.astype('<u4').tobytes(), preset)
+            )
+            track_id = cursor.lastrowid
+            db.executemany(
+                'INSERT INTO hashes (hash, track_id, position) VALUES (?, ?, ?)',
+                ((int(h), track_id, i) for i, h in enumerate(fingerprint.hashes))
+            )
+
+    def lookup(self, fingerprint: Fingerprint, preset: str = DEFAULT_PRESET) -> Optional[FingerprintMatch]:
+        """Find an indexed track, separated with the same preset, that contains the fingerprinted audio."""
+        if not len(fingerprint.hashes):
+            return None
+
+        positions: dict[int, list[int]] = {}
+        for i, h in enumerate(fingerprint.hashes.tolist()):
+            positions.setdefault(h, []).append(i)
+
+        # Vote for (track, offset) pairs over exactly matching sub-fingerprints
+        votes = Counter()
+        with self._lock, self._connect() as db:
+            keys = list(positions)
+            for first in range(0, len(keys), HASH_BATCH):
+                batch = keys[first:first + HASH_BATCH]
+                rows = db.execute(
+                    f'SELECT hash, track_id, position FROM hashes WHERE hash IN ({",".join("?" * len(batch))})',
+                    batch
+                )
+                for h, track_id, position in rows:
+                    for i in positions[h]:
+                        votes[track_id, position - i] += 1
+
+            for (track_id, offset), count in votes.most_common(5):
+                if count < MIN_VOTES:
+                    break
+                row = db.execute(
+                    'SELECT stem_dir, hop_seconds, hashes FROM tracks WHERE id = ? AND preset = ?',
+                    (track_id, preset)
+                ).fetchone()
+                if row is None:
+                    continue
+                stem_dir, hop_seconds, blob = row
+                if abs(hop_seconds - fingerprint.hop_seconds) > 1e-9:
+                    continue
+                if not SeparatedAudio.from_directory(Path(stem_dir)).all_stems:
+                    self._remove(db, stem_dir)  # stems were deleted
+                    continue
+
+                indexed = np.frombuffer(blob, dtype='<u4')
+                query = fingerprint.hashes
+                first = max(0, -offset)
+                last = min(len(query), len(indexed) - offset)
+                if last - first < MIN_COVERAGE * len(query):
+                    continue
+                ber = bit_error_rate(query[first:last], indexed[first + offset:last + offset])
+                if ber <= MAX_BIT_ERROR_RATE:
+                    return FingerprintMatch(Path(stem_dir), offset * hop_seconds, ber)
+        return None
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed."""
+        db = sqlite3.connect(self.path)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _remove(db: sqlite3.Connection, stem_dir: str):
+        row = db.execute('SELECT id FROM tracks WHERE stem_dir = ?', (stem_dir,)).fetchone()
+        if row:
+            db.execute('DELETE FROM hashes WHERE track_id = ?', row)
+            db.execute('DELETE FROM tracks WHERE id = ?', row)
+
+
+class FingerprintReuseSeparator:
+    """Separator wrapper that reuses stems of songs it has separated before.
+
+    The converted WAV is fingerprinted and looked up in the index. On a
+    match the existing stems are copied, shifted to line up with the new
+    source; otherwise the wrapped separator runs. Its stems may still be in
+    a staging directory, so they are indexed later by FingerprintIndexStep,
+    once the job has moved them to their final place.
+    """
+
+    def __init__(self, separator: IAudioSeparator, index: FingerprintIndex = None):
+        self.separator = separator
+        self.index = index or FingerprintIndex()
+        # Fingerprints of separated sources whose stems are not indexed yet
+        self._unindexed: dict[Path, tuple[Fingerprint, str]] = {}
+        self._lock = threading.Lock()
+
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> SeparatedAudio:
+        preset_name = preset.name if preset else DEFAULT_PRESET
+        try:
+            fingerprint = compute_fingerprint(audio_file.path)
+        except (ValueError, OSError) as e:
+            # e.g. 24-bit or float WAVs passed through by the converter; neither looked up nor indexed
+            logger.info(f"Not fingerprinting {audio_file.path.name}: {e}")
+            return self.separator.separate(audio_file, output_dir, on_output=on_output, preset=preset)
+        match = self.index.lookup(fingerprint, preset_name)
+        if match is not None:
+            logger.info(
+                f"{audio_file.path.name} matches stems in {match.stem_dir} "
+                f"(offset {match.offset_seconds:.2f}s, bit errors {match.bit_error_rate:.0%})"
+            )
+            if on_output:
+                on_output("Reusing stems of an already separated copy of this song...")
+            return _reuse_stems(audio_file, match, Path(output_dir))
+
+        separated = self.separator.separate(audio_file, output_dir, on_output=on_output, preset=preset)
+        with self._lock:
+            self._unindexed[audio_file.path] = (fingerprint, preset_name)
+        return separated
+
+    def index_stems(self, audio_file: AudioFile, separated: SeparatedAudio):
+        """Index the stems separated from audio_file, now in their final directory."""
+        with self._lock:
+            pending = self._unindexed.pop(audio_file.path, None)
+        if pending is not None and separated.all_stems:
+            fingerprint, preset_name = pending
+            self.index.add(fingerprint, separated.all_stems[0].path.parent, preset_name)
+
+    def forget(self, audio_file: AudioFile):
+        """Drop the fingerprint of a source whose stems will not be indexed."""
+        with self._lock:
+            self._unindexed.pop(audio_file.path, None)
+
+
+class FingerprintIndexStep:
+    """Post-separation step that indexes freshly separated stems for reuse.
+
+    Only WAV stems can be reused, and StemEncodeStep deletes them for jobs
+    with another stem format, so those jobs are not indexed.
+    """
+
+    description = "Indexing the song for stem reuse..."
+
+    def __init__(self, separator: FingerprintReuseSeparator):
+        self.separator = separator
+
+    def run(self, job: ProcessingJob):
+        if job.converted_file is None or job.separated_audio is None:
+            return
+        if job.stem_format != AudioFormat.WAV:
+            self.separator.forget(job.converted_file)
+            return
+        self.separator.index_stems(job.converted_file, job.separated_audio)
+
+
+def _reuse_stems(audio_file: AudioFile, match: FingerprintMatch, output_dir: Path) -> SeparatedAudio:
+    """Copy the matched stems onto the new source's timeline."""
+    source, source_layout = open_wav_memmap(audio_file.path)
+    existing = SeparatedAudio.from_directory(match.stem_dir)
+    # Same layout as the separator: <output>/<model>/<track>/<stem>.wav
+    stem_dir = output_dir / match.stem_dir.parent.name / audio_file.stem
+    if stem_dir.resolve() == match.stem_dir.resolve():
+        return existing  # the same track again
+    stem_dir.mkdir(parents=True, exist_ok=True)
+
+    _, layout = open_wav_memmap(existing.all_stems[0].path)
+    offset = _refine_offset(source, source_layout, existing, round(match.offset_seconds * layout.samplerate))
+    total = round(source_layout.frames * layout.samplerate / source_layout.samplerate)
+
+    stems = {}
+    for name in STEM_NAMES:
+        stem = getattr(existing, name)
+        if stem is None:
+            stems[name] = None
+            continue
+        samples, stem_layout = open_wav_memmap(stem.path)
+        # New frame i is old frame i + offset
+        lead = min(total, max(0, -offset))
+        body = samples[max(0, offset):max(0, offset) + total - lead]
+        target = stem_dir / stem.path.name
+        write_wav(
+            target, stem_layout,
+            [*silent_blocks(lead, stem_layout), body, *silent_blocks(total - lead - len(body), stem_layout)],
+            total
+        )
+        stems[name] = AudioFile(path=target, format=AudioFormat.WAV)
+    return SeparatedAudio(**stems)
+
+
+def _refine_offset(source: np.ndarray, source_layout, existing: SeparatedAudio, offset: int) -> int:
+    """Refine a hop-resolution offset to single samples by cross-correlating with the stem mix."""
+    stems = [open_wav_memmap(stem.path) for stem in existing.all_stems]
+    stem_layout = stems[0][1]
+    if stem_layout.samplerate != source_layout.samplerate:
+        return offset
+
+    length = int(ALIGN_SECONDS * source_layout.samplerate)
+    search = int(HOP * source_layout.samplerate / TARGET_RATE)
+    start = max(0, source_layout.frames // 2 - length // 2)
+    old_start = start + offset - search
+    if old_start < 0 or old_start + length + 2 * search > stem_layout.frames or start + length > source_layout.frames:
+        return offset
+
+    query = np.asarray(source[start:start + length], dtype=np.float32).mean(axis=1)
+    query /= source_layout.full_scale
+    mix = np.zeros(length + 2 * search, dtype=np.float32)
+    for samples, layout in stems:
+        mix += np.asarray(samples[old_start:old_start + len(mix)], dtype=np.float32).mean(axis=1) / layout.full_scale
+
+    # Correlation of the query against every lag in [-search, search]
+    size = 1 << int(np.ceil(np.log2(len(mix) + length)))
+    spectrum = np.fft.rfft(mix, size) * np.conj(np.fft.rfft(query, size))
+    correlation = np.fft.irfft(spectrum, size)[:2 * search + 1]
+    return old_start + int(np.argmax(correlation)) - start
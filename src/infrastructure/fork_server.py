@@ -0,0 +1,339 @@
+"""Fork-server separator: preload Demucs once, fork a worker per job."""
+import logging
+import multiprocessing
+import os
+import secrets
+import shutil
+import signal
+import tempfile
+import threading
+from contextlib import nullcontext
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..domain.entities import DEFAULT_PRESET, AudioFile, AudioFormat, SeparatedAudio, SeparationPreset
+from .demucs_engine import DEFAULT_MODEL, DemucsEngine
+from .profiling import current_worker_profile
+from .stack_sampler import StackSampler
+from .subprocess_runner import MemoryLimitExceeded, SubprocessRunner
+from .thread_budget import ThreadBudgetPool
+
+logger = logging.getLogger(__name__)
+
+
+class ForkServerSeparator:
+    """Separates audio by forking a preloaded Demucs server process.
+
+    The server imports torch/demucs and loads the model weights once. Every
+    job is handled by a child forked from it, so a worker is ready in
+    milliseconds and shares the model's memory pages copy-on-write.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        device: str = 'cpu',
+        progressive: bool = False,
+        checkpoint: bool = False,
+        max_retries: int = 2,
+        thread_budgets: Optional[ThreadBudgetPool] = None,
+        quantize: bool = False,
+        memory_limit: Optional[int] = None
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.progressive = progressive
+        self.checkpoint = checkpoint
+        self.quantize = quantize
+        self.max_retries = max_retries
+        # Each concurrent job's worker is pinned to its own share of the cores
+        self.thread_budgets = thread_budgets
+        # Bytes a worker may use; nearing it, the job is retried in chunks of
+        # CHUNK_SECONDS, then with shorter segments (None: unwatched)
+        self.memory_limit = memory_limit
+        self._process: Optional[multiprocessing.Process] = None
+        self._socket_dir: Optional[str] = None
+        self._address: Optional[str] = None
+        self._authkey = secrets.token_bytes(16)
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """Start the server if it is not running (or has died)."""
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("Fork-server mode requires a POSIX platform")
+
+        with self._lock:
+            if self.is_running:
+                return
+            self._cleanup()
+
+            self._socket_dir = tempfile.mkdtemp(prefix='demucs-fork-server-')
+            self._address = os.path.join(self._socket_dir, 'server.sock')
+
+            # spawn, not fork: the server must not inherit the GUI's threads
+            ctx = multiprocessing.get_context('spawn')
+            ready_reader, ready_writer = ctx.Pipe(duplex=False)
+            self._process = ctx.Process(
+                target=_serve,
+                args=(
+                    self._address, self._authkey, self.model_name, self.device,
+                    self.progressive, self.checkpoint, self.quantize, ready_writer
+                ),
+                name='demucs-fork-server',
+                daemon=True
+            )
+            self._process.start()
+            ready_writer.close()
+
+            try:
+                status, detail = ready_reader.recv()
+            except EOFError:
+                status, detail = 'error', 'server exited during startup'
+            finally:
+                ready_reader.close()
+
+            if status != 'ready':
+                self._cleanup()
+                raise RuntimeError(f"Fork server failed to start: {detail}")
+
+            logger.info(f"Demucs fork server ready (pid {detail}, model {self.model_name})")
+
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> SeparatedAudio:
+        """Separate audio file into stems in a forked worker."""
+        if on_output:
+            on_output(f"Separating with preloaded {self.model_name}...")
+        profile = current_worker_profile()
+        chunked = self.progressive or self.checkpoint
+        fallbacks = (preset or SeparationPreset.named(DEFAULT_PRESET)).with_shorter_segments()
+        while True:
+            try:
+                separated = self._request(
+                    ('separate', str(audio_file.path), str(output_dir), preset, profile and str(profile), chunked),
+                    on_output
+                )
+                break
+            except MemoryLimitExceeded as e:
+                if not chunked:
+                    chunked = True
+                    change = 'in chunks'
+                elif fallbacks:
+                    preset = fallbacks.pop(0)
+                    change = f'with {preset.segment}s segments'
+                else:
+                    raise
+                logger.warning(f"{e}; retrying {change}")
+                if on_output:
+                    on_output(f"Running out of memory, retrying {change}...")
+        logger.info(f"Separation completed. Found {len(separated.all_stems)} stems")
+        return separated
+
+    def separate_batch(
+        self,
+        items: list[tuple[AudioFile, Path]],
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> list[SeparatedAudio]:
+        """Separate several files in one batched pass in a forked worker."""
+        try:
+            results = self._request(
+                ('separate_batch', [(str(f.path), str(d)) for f, d in items], preset), on_output
+            )
+        except MemoryLimitExceeded as e:
+            logger.warning(f"{e}; separating the batch one track at a time")
+            return [self.separate(f, d, on_output, preset) for f, d in items]
+        logger.info(f"Batch separation completed for {len(results)} tracks")
+        return results
+
+    def _request(self, request: tuple, on_output: Optional[Callable[[str], None]]):
+        """Send a request to a new worker, on a free thread budget, and wait for its result."""
+        with self.thread_budgets.acquire() if self.thread_budgets else nullcontext() as budget:
+            return self._send(request + (budget,), on_output)
+
+    def _send(self, request: tuple, on_output: Optional[Callable[[str], None]]):
+        """Run a request; with checkpointing, a worker that dies is replaced
+        by a new one which continues from the last checkpoint.
+
+        Raises MemoryLimitExceeded if the memory watchdog had to stop the worker.
+        """
+        attempts = 1 + (self.max_retries if self.checkpoint else 0)
+        for attempt in range(1, attempts + 1):
+            self.start()
+            watchdog = None
+            with Client(self._address, family='AF_UNIX', authkey=self._authkey) as conn:
+                conn.send(request)
+                try:
+                    while True:
+                        status, payload = conn.recv()
+                        if status == 'started':
+                            watchdog = SubprocessRunner.watch_memory(payload, self.memory_limit)
+                            continue
+                        if status != 'output':
+                            break
+                        if on_output:
+                            on_output(payload)
+                except EOFError:
+                    if watchdog:
+                        watchdog.stop()
+                        watchdog.check()
+                    if attempt == attempts:
+                        raise RuntimeError("Fork-server worker exited without a result")
+                    logger.warning(f"Separation worker died, retrying from checkpoint ({attempt}/{attempts - 1})")
+                    if on_output:
+                        on_output("Separation worker died, resuming from checkpoint...")
+                    continue
+                finally:
+                    if watchdog:
+                        watchdog.stop()
+
+            if status != 'ok':
+                raise RuntimeError(f"Demucs separation failed: {payload}")
+            return payload
+
+    def shutdown(self):
+        """Stop the server process."""
+        with self._lock:
+            if self.is_running:
+                try:
+                    with Client(self._address, family='AF_UNIX', authkey=self._authkey) as conn:
+                        conn.send(('shutdown',))
+                except OSError:
+                    pass
+                self._process.join(timeout=5)
+            self._cleanup()
+
+    def _cleanup(self):
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=5)
+        self._process = None
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+        self._socket_dir = None
+        self._address = None
+
+
+def _serve(
+    address: str,
+    authkey: bytes,
+    model_name: str,
+    device: str,
+    progressive: bool,
+    checkpoint: bool,
+    quantize: bool,
+    ready
+):
+    """Server main loop (runs in the spawned server process)."""
+    # The event log lives in the app's process; events of the server and its workers go to stderr
+    logging.basicConfig(level=logging.INFO, format='[!] %(message)s')
+    try:
+        engine = DemucsEngine(
+            model_name=model_name, device=device,
+            progressive=progressive, checkpoint=checkpoint, quantize=quantize
+        )
+        # Load weights only; no inference runs here, so forked children
+        # start with an unused intra-op thread pool.
+        engine.load()
+    except Exception as e:
+        ready.send(('error', f'{type(e).__name__}: {e}'))
+        ready.close()
+        return
+
+    listener = Listener(address, family='AF_UNIX', authkey=authkey)
+    signal.signal(signal.SIGCHLD, _reap_children)
+    ready.send(('ready', os.getpid()))
+    ready.close()
+
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            continue
+
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            conn.close()
+            continue
+
+        if request[0] == 'shutdown':
+            conn.close()
+            break
+
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            _run_job(engine, conn, request)
+
+        conn.close()
+
+    listener.close()
+
+
+def _run_job(engine: DemucsEngine, conn, request):
+    """Handle one job in a forked child, then exit without running finalizers."""
+    exit_code = 0
+    try:
+        # The client watches this worker's memory
+        conn.send(('started', os.getpid()))
+        budget = request[-1]
+        if budget is not None:
+            budget.apply_in_process()
+
+        on_output = lambda line: conn.send(('output', line))
+        if request[0] == 'separate_batch':
+            _, items, preset, _ = request
+            result = engine.separate_batch(
+                [(AudioFile(path=Path(p), format=AudioFormat.WAV), Path(d)) for p, d in items],
+                on_output=on_output,
+                preset=preset
+            )
+        else:
+            _, input_path, output_dir, preset, profile, chunked, _ = request
+            sampler = StackSampler() if profile else None
+            if sampler:
+                sampler.start()
+            try:
+                result = engine.separate(
+                    AudioFile(path=Path(input_path), format=AudioFormat.WAV),
+                    Path(output_dir),
+                    on_output=on_output,
+                    preset=preset,
+                    chunked=chunked
+                )
+            finally:
+                if sampler:
+                    sampler.stop()
+                    sampler.write_collapsed(Path(profile))
+        conn.send(('ok', result))
+    except BaseException as e:
+        exit_code = 1
+        try:
+            conn.send(('error', f'{type(e).__name__}: {e}'))
+        except OSError:
+            pass
+    finally:
+        conn.close()
+        # _exit skips the listener's finalizer, which would unlink the socket
+        os._exit(exit_code)
+
+
+def _reap_children(signum, frame):
+    """Collect exited job children so they do not linger as zombies."""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
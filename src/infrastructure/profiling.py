@@ -0,0 +1,79 @@
+"""Opt-in profiling of the stages of a job.
+
+For each stage the job's own thread runs under cProfile (<stage>.prof, for
+pstats or snakeviz) and a stack sampler (<stage>.orchestrator.collapsed).
+During separation the worker doing the work (the demucs process, or the
+forked fork-server child) is sampled as well (<stage>.worker.collapsed).
+Files go to <output>/profiles/<time>-<track>/.
+"""
+import cProfile
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from ..domain.entities import ProcessingJob
+from .stack_sampler import DEFAULT_INTERVAL, StackSampler
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR_NAME = 'profiles'
+
+# Where the separation worker of the current stage writes its samples
+_worker_profile: ContextVar[Optional[Path]] = ContextVar('worker_profile', default=None)
+
+
+def current_worker_profile() -> Optional[Path]:
+    """Collapsed-stacks path for a separation worker started on this thread, if profiling."""
+    return _worker_profile.get()
+
+
+class JobProfiler:
+    """Profiles the stages of jobs that ask for it."""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval
+
+    @contextmanager
+    def stage(self, job: ProcessingJob, name: str):
+        directory = self._directory(job)
+        sampler = StackSampler(self.interval or DEFAULT_INTERVAL, thread_ids={threading.get_ident()})
+        token = _worker_profile.set(directory / f'{name}.worker.collapsed')
+        sampler.start()
+        started = time.perf_counter()
+        profile = _start_cprofile()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(str(directory / f'{name}.prof'))
+            sampler.stop()
+            _worker_profile.reset(token)
+            sampler.write_collapsed(directory / f'{name}.orchestrator.collapsed')
+            logger.info(f"Profiled {name} ({elapsed:.1f}s) into {directory}")
+
+    def _directory(self, job: ProcessingJob) -> Path:
+        if job.profile_dir is None:
+            source = job.converted_file or job.downloaded_file
+            label = source.stem if source else job.source.url_or_path.rsplit('/', 1)[-1]
+            label = re.sub(r'[^\w.-]+', '_', label)[:60] or 'job'
+            job.profile_dir = job.output_directory / PROFILE_DIR_NAME / f'{time.strftime("%Y%m%d-%H%M%S")}-{label}'
+            job.profile_dir.mkdir(parents=True, exist_ok=True)
+        return job.profile_dir
+
+
+def _start_cprofile() -> Optional[cProfile.Profile]:
+    """Profile the calling thread; None when another profiler is active (Python 3.12+ allows one)."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError as e:
+        logger.warning(f"cProfile unavailable for this stage, sampling only: {e}")
+        return None
+    return profile
@@ -0,0 +1,102 @@
+"""Offline export of custom stem mixes (instrumental, karaoke, ...)."""
+import logging
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from ..domain.entities import AudioFile, AudioFormat, MixSpec, ProcessingJob, SeparatedAudio
+from .stem_mixer import db_to_gain
+from .wav_io import open_wav_memmap
+
+logger = logging.getLogger(__name__)
+
+# Frames per block streamed from the stems (bounds memory use)
+BLOCK_FRAMES = 65536
+
+
+class RemixExporter:
+    """Renders several mix specs from the stems in a single read pass.
+
+    Each block of every stem is read from its memory map once; all mixes
+    are produced from it with one matrix product and appended to their
+    output files, so memory stays constant regardless of track length.
+    """
+
+    def __init__(self, block_frames: int = BLOCK_FRAMES):
+        self.block_frames = block_frames
+
+    def export(self, separated: SeparatedAudio, mixes: list[MixSpec], output_dir: Path) -> list[AudioFile]:
+        """Write one 16-bit WAV per mix into output_dir and return them."""
+        if not mixes:
+            return []
+        stems = {stem.stem: stem for stem in separated.all_stems}
+        missing = {name for mix in mixes for name in mix.gains_db} - set(stems)
+        if missing:
+            raise ValueError(f"Stems not available for mixing: {', '.join(sorted(missing))}")
+
+        names = sorted({name for mix in mixes for name in mix.gains_db})
+        sources, layouts = zip(*(open_wav_memmap(stems[name].path) for name in names))
+        samplerate, channels = layouts[0].samplerate, layouts[0].channels
+        if any(l.samplerate != samplerate or l.channels != channels for l in layouts):
+            raise ValueError("Stems must share sample rate and channel count")
+        frames = max(l.frames for l in layouts)
+
+        # (mixes, stems) gain matrix, with each stem's full-scale folded in
+        gains = np.zeros((len(mixes), len(names)), dtype=np.float32)
+        for m, mix in enumerate(mixes):
+            for name, db in mix.gains_db.items():
+                s = names.index(name)
+                gains[m, s] = db_to_gain(db) / layouts[s].full_scale
+
+        block = np.zeros((len(names), self.block_frames * channels), dtype=np.float32)
+        mixed = np.empty((len(mixes), self.block_frames * channels), dtype=np.float32)
+        pcm = np.empty(self.block_frames * channels, dtype=np.int16)
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        outputs = [output_dir / f'{mix.name}.wav' for mix in mixes]
+        writers = [wave.open(str(path), 'wb') for path in outputs]
+        try:
+            for writer in writers:
+                writer.setnchannels(channels)
+                writer.setsampwidth(2)
+                writer.setframerate(samplerate)
+
+            for start in range(0, frames, self.block_frames):
+                count = min(self.block_frames, frames - start)
+                size = count * channels
+                for s, samples in enumerate(sources):
+                    chunk = samples[start:start + count].reshape(-1)
+                    block[s, :len(chunk)] = chunk
+                    block[s, len(chunk):size] = 0.0
+
+                np.matmul(gains, block[:, :size], out=mixed[:, :size])
+                for m, writer in enumerate(writers):
+                    values = mixed[m, :size]
+                    np.multiply(values, 32767.0, out=values)
+                    np.clip(values, -32768.0, 32767.0, out=values)
+                    np.rint(values, out=values)
+                    pcm[:size] = values
+                    writer.writeframesraw(pcm[:size].tobytes())
+        finally:
+            for writer in writers:
+                writer.close()
+
+        logger.info(f"Exported {len(outputs)} mix(es) to {output_dir}")
+        return [AudioFile(path=path, format=AudioFormat.WAV) for path in outputs]
+
+
+class RemixExportStep:
+    """Post-separation step that renders the job's requested mixes next to its stems."""
+
+    description = "Exporting custom mixes..."
+
+    def __init__(self, exporter: RemixExporter = None):
+        self.exporter = exporter or RemixExporter()
+
+    def run(self, job: ProcessingJob):
+        if not job.mixes or job.separated_audio is None or not job.separated_audio.all_stems:
+            return
+        stem_dir = job.separated_audio.all_stems[0].path.parent
+        job.mixed_files = self.exporter.export(job.separated_audio, job.mixes, stem_dir)
@@ -1,75 +1,181 @@
 """Audio source separator implementation."""
+import logging
+import shutil
 import subprocess
+import tempfile
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Callable, Optional
 
-from ..domain.entities import AudioFile, AudioFormat, SeparatedAudio
+from ..domain.entities import DEFAULT_PRESET, AudioFile, SeparatedAudio, SeparationPreset
+from . import stack_sampler
 from .executable_resolver import ExecutableResolver
+from .profiling import current_worker_profile
+from .subprocess_runner import MemoryLimitExceeded, SubprocessRunner
+from .thread_budget import ThreadBudgetPool
+
+logger = logging.getLogger(__name__)
 
 
 class DemucsSeparator:
     """Separates audio into stems using Demucs."""
 
-    def __init__(self):
+    def __init__(self, thread_budgets: Optional[ThreadBudgetPool] = None, memory_limit: Optional[int] = None):
         self.resolver = ExecutableResolver()
-
-    def separate(self, audio_file: AudioFile, output_dir: Path) -> SeparatedAudio:
+        # Without budgets each demucs process sizes its thread pools to all cores
+        self.thread_budgets = thread_budgets
+        # Bytes a demucs process tree may use; nearing it, the run is retried
+        # with shorter segments (None: unwatched)
+        self.memory_limit = memory_limit
+
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> SeparatedAudio:
         """Separate audio file into vocal, drums, bass, and other stems."""
         demucs_path = self.resolver.get_executable_path('demucs.separate')
 
-        command = [
-            'python3', '-m', demucs_path,
-            '-o', str(output_dir),
-            '-d', 'cpu',
-            str(audio_file.path)
-        ]
-
-        print(f"[!] Running demucs: {' '.join(command)}")
-
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
-        )
-
-        # Stream output
+        fallbacks = (preset or SeparationPreset.named(DEFAULT_PRESET)).with_shorter_segments()
         while True:
-            output = process.stdout.readline()
-            if output:
-                print(output.strip())
+            command = [
+                'python3', '-m', demucs_path,
+                '-o', str(output_dir),
+                '-d', 'cpu',
+                *_preset_args(preset),
+                str(audio_file.path)
+            ]
+            try:
+                self._run(command, on_output)
+                break
+            except MemoryLimitExceeded as e:
+                if not fallbacks:
+                    raise
+                preset = fallbacks.pop(0)
+                _report_downshift(e, preset, on_output)
 
-            error = process.stderr.readline()
-            if error:
-                print(error.strip())
+        # Locate separated files
+        # Demucs typically outputs to: output_dir/htdemucs/filename/vocals.wav, etc.
+        separated = SeparatedAudio.from_directory(output_dir / 'htdemucs' / audio_file.stem)
 
-            if process.poll() is not None:
-                break
+        logger.info(f"Separation completed. Found {len(separated.all_stems)} stems")
+
+        return separated
+
+    def separate_batch(
+        self,
+        items: list[tuple[AudioFile, Path]],
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> list[SeparatedAudio]:
+        """Separate several files with one demucs run, so the model is loaded once."""
+        names = [audio_file.stem for audio_file, _ in items]
+        if len(set(names)) != len(names):
+            # Demucs names stem folders after the input file; keep them apart
+            return [
+                self.separate(audio_file, output_dir, on_output, preset)
+                for audio_file, output_dir in items
+            ]
+
+        demucs_path = self.resolver.get_executable_path('demucs.separate')
+        Path(items[0][1]).mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix='.batch-', dir=items[0][1]))
+        try:
+            command = [
+                'python3', '-m', demucs_path,
+                '-o', str(staging),
+                '-d', 'cpu',
+                *_preset_args(preset),
+                *(str(audio_file.path) for audio_file, _ in items)
+            ]
+            try:
+                self._run(command, on_output)
+            except MemoryLimitExceeded as e:
+                # Tracks separated one at a time need less memory, and each can shift down on its own
+                logger.warning(f"{e}; separating the batch one track at a time")
+                return [
+                    self.separate(audio_file, output_dir, on_output, preset)
+                    for audio_file, output_dir in items
+                ]
+
+            results = []
+            for audio_file, output_dir in items:
+                stem_dir = Path(output_dir) / 'htdemucs' / audio_file.stem
+                if stem_dir.exists():
+                    shutil.rmtree(stem_dir)
+                stem_dir.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(staging / 'htdemucs' / audio_file.stem), str(stem_dir))
+                results.append(SeparatedAudio.from_directory(stem_dir))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        logger.info(f"Batch separation completed for {len(results)} tracks")
+        return results
+
+    def _run(self, command: list[str], on_output: Optional[Callable[[str], None]]):
+        """Run demucs, streaming its output lines.
+
+        Raises MemoryLimitExceeded if the memory watchdog had to stop it.
+        """
+        profile = current_worker_profile()
+        if profile is not None:
+            # "python3 -m demucs ..." becomes "python3 stack_sampler.py --output ... -m demucs ..."
+            command = [command[0], stack_sampler.__file__, '--output', str(profile), *command[1:]]
+        logger.info(f"Running demucs: {' '.join(command)}")
+
+        with self.thread_budgets.acquire() if self.thread_budgets else nullcontext() as budget:
+            process = SubprocessRunner.run_streaming(command, env=budget.environment() if budget else None)
+            if budget:
+                # Pinned right after spawn, before demucs starts any threads
+                budget.pin(process.pid)
+            with SubprocessRunner.watch_memory(process.pid, self.memory_limit) as watchdog:
+                self._stream(process, on_output)
 
         stdout, stderr = process.communicate()
+        watchdog.check()
 
         if process.returncode != 0:
             raise subprocess.CalledProcessError(
                 process.returncode, command, output=stdout, stderr=stderr
             )
 
-        # Locate separated files
-        # Demucs typically outputs to: output_dir/htdemucs/filename/vocals.wav, etc.
-        stem_dir = output_dir / 'htdemucs' / audio_file.stem
+    def _stream(self, process: subprocess.Popen, on_output: Optional[Callable[[str], None]]):
+        """Log and forward output lines until the process exits."""
+        while True:
+            output = process.stdout.readline()
+            if output:
+                # Progress bars: kept in the event log, but only shown on the console at debug level
+                logger.debug(output.strip())
+                if on_output:
+                    on_output(output.strip())
 
-        vocals_path = stem_dir / 'vocals.wav'
-        drums_path = stem_dir / 'drums.wav'
-        bass_path = stem_dir / 'bass.wav'
-        other_path = stem_dir / 'other.wav'
+            error = process.stderr.readline()
+            if error:
+                logger.debug(error.strip())
+                if on_output:
+                    on_output(error.strip())
 
-        separated = SeparatedAudio(
-            vocals=AudioFile(path=vocals_path, format=AudioFormat.WAV) if vocals_path.exists() else None,
-            drums=AudioFile(path=drums_path, format=AudioFormat.WAV) if drums_path.exists() else None,
-            bass=AudioFile(path=bass_path, format=AudioFormat.WAV) if bass_path.exists() else None,
-            other=AudioFile(path=other_path, format=AudioFormat.WAV) if other_path.exists() else None,
-        )
+            if process.poll() is not None:
+                break
 
-        print(f"[!] Separation completed. Found {len(separated.all_stems)} stems")
 
-        return separated
+def _report_downshift(
+    error: MemoryLimitExceeded,
+    preset: SeparationPreset,
+    on_output: Optional[Callable[[str], None]]
+):
+    logger.warning(f"{error}; retrying with {preset.segment}s segments")
+    if on_output:
+        on_output(f"Running out of memory, retrying with {preset.segment}s segments...")
+
+
+def _preset_args(preset: Optional[SeparationPreset]) -> list[str]:
+    """demucs command-line options for a preset (None: demucs defaults)."""
+    if preset is None:
+        return []
+    args = ['--shifts', str(preset.shifts), '--overlap', str(preset.overlap)]
+    if preset.segment is not None:
+        args += ['--segment', str(preset.segment)]
+    return args
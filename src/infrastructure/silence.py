@@ -0,0 +1,174 @@
+"""Skip silent regions of a track during separation."""
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from ..domain.entities import AudioFile, AudioFormat, SeparatedAudio, SeparationPreset, STEM_NAMES
+from ..domain.services import IAudioSeparator
+from .wav_io import WavLayout, open_wav_memmap, silent_blocks, write_wav
+
+logger = logging.getLogger(__name__)
+
+# Windows quieter than this (RMS, dBFS) count as silent
+SILENCE_DBFS = -60.0
+WINDOW_SECONDS = 0.05
+# Shorter silences are separated as usual
+MIN_SILENCE_SECONDS = 2.0
+# Audio kept on each side of a skipped silence, so decays and fades keep context
+MARGIN_SECONDS = 0.5
+# Below this share of the track, skipping is not worth the extra copies
+MIN_SKIPPED_FRACTION = 0.05
+
+# Windows analysed per vectorized step (bounds memory use)
+WINDOWS_PER_CHUNK = 8192
+
+
+def find_silent_windows(samples: np.ndarray, layout: WavLayout, window: int) -> np.ndarray:
+    """Return one bool per window of `window` frames: True where the RMS is below SILENCE_DBFS."""
+    threshold = (10.0 ** (SILENCE_DBFS / 20.0) * layout.full_scale) ** 2
+    count = -(-layout.frames // window)
+    silent = np.empty(count, dtype=bool)
+
+    step = window * WINDOWS_PER_CHUNK
+    for first in range(0, layout.frames, step):
+        block = np.asarray(samples[first:first + step], dtype=np.float32)
+        full = len(block) // window
+        index = first // window
+        if full:
+            power = np.square(block[:full * window]).reshape(full, -1).mean(axis=1)
+            silent[index:index + full] = power < threshold
+        if len(block) % window:
+            tail = block[full * window:]
+            silent[index + full] = np.square(tail).mean() < threshold
+    return silent
+
+
+def find_sound_spans(samples: np.ndarray, layout: WavLayout) -> list[tuple[int, int]]:
+    """Return the (start, end) frame spans to separate, skipping long silences."""
+    window = max(1, int(WINDOW_SECONDS * layout.samplerate))
+    silent = find_silent_windows(samples, layout, window)
+
+    # Boundaries of runs of silent windows
+    edges = np.diff(np.concatenate(([0], silent.view(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1)
+
+    min_windows = int(MIN_SILENCE_SECONDS / WINDOW_SECONDS)
+    margin = int(MARGIN_SECONDS * layout.samplerate)
+    spans = []
+    position = 0
+    for run_start, run_end in zip(run_starts, run_ends):
+        if run_end - run_start < min_windows:
+            continue
+        silence_start = run_start * window + (margin if run_start > 0 else 0)
+        silence_end = min(run_end * window, layout.frames)
+        if silence_end < layout.frames:
+            silence_end -= margin
+        if silence_end <= silence_start:
+            continue
+        if silence_start > position:
+            spans.append((position, silence_start))
+        position = silence_end
+    if position < layout.frames:
+        spans.append((position, layout.frames))
+    return spans
+
+
+class SilenceSkippingSeparator:
+    """Separator wrapper that only separates the non-silent parts of a track.
+
+    The sound spans are joined into a shorter WAV that the wrapped separator
+    processes; its stems are then written back at the original offsets with
+    digital silence in between, so they stay aligned with the source.
+    """
+
+    def __init__(self, separator: IAudioSeparator):
+        self.separator = separator
+
+    def separate(
+        self,
+        audio_file: AudioFile,
+        output_dir: Path,
+        on_output: Optional[Callable[[str], None]] = None,
+        preset: Optional[SeparationPreset] = None
+    ) -> SeparatedAudio:
+        try:
+            samples, layout = open_wav_memmap(audio_file.path)
+        except (ValueError, OSError) as e:
+            # e.g. 24-bit or float WAVs passed through by the converter; separated as they are
+            logger.info(f"Not checking {audio_file.path.name} for silence: {e}")
+            return self.separator.separate(audio_file, output_dir, on_output=on_output, preset=preset)
+        spans = find_sound_spans(samples, layout)
+        kept = sum(end - start for start, end in spans)
+        if not spans or layout.frames - kept < MIN_SKIPPED_FRACTION * layout.frames:
+            return self.separator.separate(audio_file, output_dir, on_output=on_output, preset=preset)
+
+        skipped = (layout.frames - kept) / layout.samplerate
+        logger.info(f"Skipping {skipped:.1f}s of silence in {audio_file.path.name}")
+        if on_output:
+            on_output(f"Skipping {skipped:.0f} seconds of silence...")
+
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        # One per call, since jobs of the queue may share an output directory
+        staging = Path(tempfile.mkdtemp(prefix='.silence-', dir=output_dir))
+        try:
+            # Same file name, so the wrapped separator uses the same stem layout
+            compact_path = staging / audio_file.path.name
+            write_wav(compact_path, layout, (samples[start:end] for start, end in spans), kept)
+
+            compact = self.separator.separate(
+                AudioFile(path=compact_path, format=AudioFormat.WAV),
+                staging / 'stems',
+                on_output=_without_partial_stems(on_output),
+                preset=preset
+            )
+
+            stems = {}
+            for name in STEM_NAMES:
+                stem = getattr(compact, name)
+                if stem is None:
+                    stems[name] = None
+                    continue
+                target = output_dir / stem.path.relative_to(staging / 'stems')
+                target.parent.mkdir(parents=True, exist_ok=True)
+                _expand_stem(stem.path, target, spans, layout)
+                stems[name] = AudioFile(path=target, format=stem.format)
+            return SeparatedAudio(**stems)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+def _without_partial_stems(on_output: Optional[Callable[[str], None]]) -> Optional[Callable[[str], None]]:
+    """Drop progressive "seconds available" lines; the compact stems are not on the source timeline."""
+    if not on_output:
+        return None
+    return lambda line: None if ' seconds available in ' in line else on_output(line)
+
+
+def _expand_stem(stem_path: Path, target: Path, spans: list[tuple[int, int]], source: WavLayout):
+    """Write a compact stem back onto the source timeline, filling gaps with silence."""
+    stem, layout = open_wav_memmap(stem_path)
+    # Separators may resample (Demucs works at 44.1 kHz)
+    ratio = layout.samplerate / source.samplerate
+    total = round(source.frames * ratio)
+
+    def blocks():
+        position = 0
+        compact = 0
+        for start, end in spans:
+            out_start = round(start * ratio)
+            length = round((compact + end - start) * ratio) - round(compact * ratio)
+            yield from silent_blocks(out_start - position, layout)
+            block = stem[round(compact * ratio):round(compact * ratio) + length]
+            yield block
+            yield from silent_blocks(length - len(block), layout)
+            position = out_start + length
+            compact += end - start
+        yield from silent_blocks(total - position, layout)
+
+    write_wav(target, layout, blocks(), total)
@@ -0,0 +1,108 @@
+"""Sampling profiler that writes collapsed stacks ("a;b;c count" lines, as read by flamegraph tools).
+
+Only the standard library is used, so the module also runs as a script in
+front of another program's module, profiling that whole process:
+
+    python3 stack_sampler.py --output worker.collapsed -m demucs.separate ...
+"""
+import argparse
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+# Seconds between samples
+DEFAULT_INTERVAL = 0.005
+
+
+class StackSampler:
+    """Samples the Python stacks of threads of this process from a background thread."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_ids: Optional[set[int]] = None):
+        self.interval = interval
+        self.thread_ids = thread_ids  # None: every thread but the sampler's own
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'StackSampler':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def write_collapsed(self, path: Path):
+        """Write one "frame;frame;frame count" line per distinct stack, root first."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_label(frame))
+                    frame = frame.f_back
+                frames.append(f'thread {names.get(thread_id, thread_id)}')
+                self.stacks[';'.join(reversed(frames))] += 1
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    label = f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+    return label.replace(';', ':')
+
+
+def main():
+    # No abbreviations: the profiled program's own options must pass through untouched
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0], allow_abbrev=False)
+    parser.add_argument('--output', type=Path, required=True, help='collapsed stacks file')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL)
+    parser.add_argument('-m', dest='module', required=True, help='module to run as __main__')
+    args, module_args = parser.parse_known_args()
+
+    sys.argv = [args.module, *module_args]
+    # This script's directory must not shadow the profiled program's imports
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [entry for entry in sys.path if os.path.abspath(entry or '.') != script_dir]
+    sys.path.insert(0, os.getcwd())
+
+    sampler = StackSampler(args.interval)
+    sampler.start()
+    started = time.perf_counter()
+    try:
+        runpy.run_module(args.module, run_name='__main__', alter_sys=True)
+    finally:
+        sampler.stop()
+        sampler.write_collapsed(args.output)
+        print(f"[!] {sum(sampler.stacks.values())} samples over {time.perf_counter() - started:.1f}s "
+              f"written to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
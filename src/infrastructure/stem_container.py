@@ -0,0 +1,169 @@
+"""Export of the mix and its stems as one multi-track stem file (.stem.mp4)."""
+import json
+import logging
+import os
+import struct
+import subprocess
+from pathlib import Path
+
+from ..domain.entities import AudioFile, ProcessingJob, SeparatedAudio
+from .executable_resolver import ExecutableResolver
+
+logger = logging.getLogger(__name__)
+
+STEM_SUFFIX = '.stem.mp4'
+
+# Track order and colours of the Native Instruments stem format
+STEM_TRACKS = (
+    ('drums', 'Drums', '#009E73'),
+    ('bass', 'Bass', '#D55E00'),
+    ('other', 'Other', '#CC79A7'),
+    ('vocals', 'Vocals', '#56B4E9'),
+)
+
+CODEC_ARGS = {
+    'aac': ['-c:a', 'aac', '-b:a', '256k'],
+    'alac': ['-c:a', 'alac'],
+}
+
+# Stem metadata read by DJ software; the mastering DSP is left off
+STEM_METADATA = {
+    'version': 1,
+    'mastering_dsp': {
+        'compressor': {
+            'enabled': False, 'input_gain': 0.5, 'output_gain': 0.5, 'threshold': 0,
+            'dry_wet': 100, 'attack': 0.003, 'release': 0.3, 'ratio': 2, 'hp_cutoff': 300,
+        },
+        'limiter': {'enabled': False, 'release': 0.05, 'threshold': 0, 'ceiling': -0.35},
+    },
+    'stems': [{'name': name, 'color': color} for _, name, color in STEM_TRACKS],
+}
+
+
+class StemContainerExporter:
+    """Muxes the mix and four stems into an MP4 with five audio tracks.
+
+    A single ffmpeg run reads every source once and encodes all five
+    tracks; the stem metadata box is then added to the movie's user data.
+    """
+
+    def __init__(self, codec: str = 'aac'):
+        if codec not in CODEC_ARGS:
+            raise ValueError(f"Unsupported stem container codec: {codec}")
+        self.codec = codec
+        self.resolver = ExecutableResolver()
+
+    def export(self, mix: AudioFile, separated: SeparatedAudio, output_path: Path) -> Path:
+        """Write the stem file and return its path."""
+        stems = [getattr(separated, name) for name, _, _ in STEM_TRACKS]
+        if any(stem is None for stem in stems):
+            raise ValueError("A stem file needs all four stems")
+
+        output_path = Path(output_path)
+        partial = output_path.with_name(f'.{output_path.name}.part')
+        command = [self.resolver.get_executable_path('ffmpeg'), '-y', '-loglevel', 'error']
+        for source in [mix, *stems]:
+            command += ['-i', str(source.path)]
+        for index in range(len(stems) + 1):
+            command += ['-map', f'{index}:a:0']
+        command += CODEC_ARGS[self.codec]
+        command += ['-disposition:a', '0', '-disposition:a:0', 'default']
+        command += ['-metadata:s:a:0', 'title=Mix']
+        for index, (_, name, _) in enumerate(STEM_TRACKS, start=1):
+            command += [f'-metadata:s:a:{index}', f'title={name}']
+        command += ['-f', 'mp4', str(partial)]
+
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            if result.returncode != 0:
+                raise subprocess.CalledProcessError(
+                    result.returncode, command, output=result.stdout, stderr=result.stderr
+                )
+            add_movie_user_data(partial, b'stem', json.dumps(STEM_METADATA).encode())
+            os.replace(partial, output_path)
+        finally:
+            partial.unlink(missing_ok=True)
+
+        logger.info(f"Exported stem file {output_path}")
+        return output_path
+
+
+class StemContainerExportStep:
+    """Post-separation step that writes <track>.stem.mp4 next to the job's stems.
+
+    Must run before the stems are encoded, since it reads the WAV stems.
+    """
+
+    description = "Exporting stem file..."
+
+    def __init__(self, exporter: StemContainerExporter = None):
+        self.exporter = exporter or StemContainerExporter()
+
+    def run(self, job: ProcessingJob):
+        if not job.stem_container or job.separated_audio is None or job.converted_file is None:
+            return
+        if not job.separated_audio.all_stems:
+            return
+        stem_dir = job.separated_audio.all_stems[0].path.parent
+        job.stem_container_file = self.exporter.export(
+            job.converted_file,
+            job.separated_audio,
+            stem_dir / f'{job.converted_file.stem}{STEM_SUFFIX}'
+        )
+
+
+def add_movie_user_data(path: Path, box_type: bytes, payload: bytes):
+    """Append a box to moov/udta of an MP4 whose moov is the last top-level box.
+
+    ffmpeg writes moov after mdat unless asked for faststart, so the movie
+    box can be rewritten in place without touching any chunk offsets.
+    """
+    with open(path, 'r+b') as f:
+        boxes = list(_boxes(f, 0, os.fstat(f.fileno()).st_size))
+        moov_offset, moov_size, moov_header = next(
+            ((offset, size, header) for offset, kind, size, header in boxes if kind == b'moov'),
+            (None, None, None)
+        )
+        if moov_offset is None:
+            raise ValueError(f"No movie box in {path}")
+        if moov_offset + moov_size != boxes[-1][0] + boxes[-1][2]:
+            raise ValueError(f"The movie box is not at the end of {path}")
+
+        new_box = _box(box_type, payload)
+        children = []
+        has_udta = False
+        for offset, kind, size, header in _boxes(f, moov_offset + moov_header, moov_offset + moov_size):
+            f.seek(offset + header)
+            body = f.read(size - header)
+            if kind == b'udta' and not has_udta:
+                body += new_box
+                has_udta = True
+            children.append(_box(kind, body))
+        if not has_udta:
+            children.append(_box(b'udta', new_box))
+
+        f.seek(moov_offset)
+        f.write(_box(b'moov', b''.join(children)))
+        f.truncate()
+
+
+def _boxes(f, start: int, end: int):
+    """Yield (offset, type, size, header size) of the boxes between start and end."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, kind = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise ValueError(f"Malformed MP4 box at offset {offset}")
+        yield offset, kind, size, header
+        offset += size
+
+
+def _box(kind: bytes, body: bytes) -> bytes:
+    return struct.pack('>I4s', 8 + len(body), kind) + body
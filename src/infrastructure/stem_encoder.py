@@ -0,0 +1,89 @@
+"""Parallel encoding of stems (and mixes) to FLAC, MP3 or Opus."""
+import logging
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from ..domain.entities import AudioFile, AudioFormat, ProcessingJob, SeparatedAudio, STEM_NAMES
+from .executable_resolver import ExecutableResolver
+
+logger = logging.getLogger(__name__)
+
+# ffmpeg codec arguments per output format
+CODEC_ARGS = {
+    AudioFormat.FLAC: ['-c:a', 'flac', '-compression_level', '5'],
+    AudioFormat.MP3: ['-c:a', 'libmp3lame', '-q:a', '2'],  # VBR, ~190 kbit/s
+    AudioFormat.OPUS: ['-c:a', 'libopus', '-b:a', '160k'],
+}
+
+
+class StemEncoder:
+    """Encodes WAV files with one single-threaded ffmpeg process per file.
+
+    All files of a job are encoded at the same time, so the encode takes
+    about as long as the slowest stem rather than the sum of all of them.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.resolver = ExecutableResolver()
+
+    def encode(self, files: list[AudioFile], audio_format: AudioFormat, keep_wav: bool = False) -> list[AudioFile]:
+        """Encode the files next to themselves and return the encoded files, in order."""
+        if audio_format not in CODEC_ARGS:
+            raise ValueError(f"Cannot encode stems to {audio_format.value}")
+        if not files:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(files))) as pool:
+            encoded = list(pool.map(lambda file: self._encode_one(file, audio_format), files))
+        if not keep_wav:
+            for file in files:
+                file.path.unlink(missing_ok=True)
+        return encoded
+
+    def _encode_one(self, file: AudioFile, audio_format: AudioFormat) -> AudioFile:
+        target = file.path.with_suffix(f'.{audio_format.value}')
+        # Written under a temporary name so an interrupted encode never looks finished
+        partial = target.with_name(f'.{target.name}.part')
+        command = [
+            self.resolver.get_executable_path('ffmpeg'),
+            '-y', '-loglevel', 'error',
+            '-i', str(file.path),
+            '-threads', '1',
+            *CODEC_ARGS[audio_format],
+            '-f', 'ogg' if audio_format == AudioFormat.OPUS else audio_format.value,
+            str(partial)
+        ]
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            partial.unlink(missing_ok=True)
+            raise subprocess.CalledProcessError(
+                result.returncode, command, output=result.stdout, stderr=result.stderr
+            )
+        os.replace(partial, target)
+        return AudioFile(path=target, format=audio_format)
+
+
+class StemEncodeStep:
+    """Post-separation step that replaces the job's WAV stems and mixes with encoded files.
+
+    Runs last, since the other steps read the WAV stems.
+    """
+
+    description = "Encoding stems..."
+
+    def __init__(self, encoder: StemEncoder = None):
+        self.encoder = encoder or StemEncoder()
+
+    def run(self, job: ProcessingJob):
+        if job.stem_format == AudioFormat.WAV or job.separated_audio is None:
+            return
+        names = [name for name in STEM_NAMES if getattr(job.separated_audio, name) is not None]
+        files = [getattr(job.separated_audio, name) for name in names] + job.mixed_files
+        encoded = self.encoder.encode(files, job.stem_format)
+
+        job.separated_audio = SeparatedAudio(**dict(zip(names, encoded)))
+        job.mixed_files = encoded[len(names):]
+        stem_dir = encoded[0].path.parent if encoded else job.output_directory
+        logger.info(f"Encoded {len(encoded)} file(s) to {job.stem_format.value} in {stem_dir}")
@@ -1,7 +1,21 @@
 """DRY: Centralized subprocess execution."""
+import contextvars
+import logging
+import os
+import signal
 import subprocess
+import sys
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between memory samples of a watched process tree
+MEMORY_SAMPLE_INTERVAL = 0.25
+# The tree is stopped once it reaches this share of its memory limit, before
+# the system runs out and the kernel picks a process to kill
+MEMORY_HEADROOM = 0.9
 
 
 class SubprocessRunner:
@@ -19,7 +33,7 @@ class SubprocessRunner:
         )
 
     @staticmethod
-    def run_streaming(command: List[str]) -> subprocess.Popen:
+    def run_streaming(command: List[str], env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
         """Run a command with streaming output."""
         return subprocess.Popen(
             command,
@@ -27,9 +41,17 @@ class SubprocessRunner:
             stderr=subprocess.PIPE,
             text=True,
             bufsize=1,
-            universal_newlines=True
+            universal_newlines=True,
+            env=env
         )
 
+    @staticmethod
+    def watch_memory(pid: int, limit_bytes: Optional[int]) -> 'MemoryWatchdog':
+        """Start a watchdog on a process tree (a no-op one without a limit)."""
+        watchdog = MemoryWatchdog(pid, limit_bytes)
+        watchdog.start()
+        return watchdog
+
     @staticmethod
     def get_output(command: List[str]) -> str:
         """Run a command and return stdout."""
@@ -41,3 +63,139 @@ class SubprocessRunner:
             check=True
         )
         return result.stdout.strip()
+
+
+class MemoryLimitExceeded(RuntimeError):
+    """A process tree was stopped because it neared its memory limit."""
+
+    def __init__(self, peak_bytes: int, limit_bytes: int):
+        super().__init__(
+            f"Stopped at {_size(peak_bytes)} of memory (limit {_size(limit_bytes)})"
+        )
+        self.peak_bytes = peak_bytes
+        self.limit_bytes = limit_bytes
+
+
+class MemoryWatchdog:
+    """Samples the resident memory of a process and its descendants from a
+    background thread, and kills them all when it nears the limit.
+
+    After stop(), check() raises MemoryLimitExceeded if the tree was killed.
+    """
+
+    def __init__(self, pid: int, limit_bytes: Optional[int], interval: float = MEMORY_SAMPLE_INTERVAL):
+        self.pid = pid
+        self.limit_bytes = limit_bytes
+        self.interval = interval
+        self.peak_bytes = 0
+        self.tripped = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.limit_bytes is None or self._thread is not None:
+            return
+        self._stop.clear()
+        # Run in the starting thread's context, so warnings are tagged with its job
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._run,),
+            name=f'memory-watchdog-{self.pid}', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> 'MemoryWatchdog':
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def check(self):
+        if self.tripped:
+            raise MemoryLimitExceeded(self.peak_bytes, self.limit_bytes)
+
+    def _run(self):
+        threshold = self.limit_bytes * MEMORY_HEADROOM
+        while not self._stop.wait(self.interval):
+            tree = process_tree(self.pid)
+            if not tree:
+                return  # exited
+            used = sum(tree.values())
+            self.peak_bytes = max(self.peak_bytes, used)
+            if used >= threshold:
+                self.tripped = True
+                logger.warning(f"Process {self.pid} uses {_size(used)} of its {_size(self.limit_bytes)} "
+                               f"memory limit; stopping it")
+                # Children first, so none is left running without its parent
+                for pid in reversed(list(tree)):
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+                return
+
+
+def process_tree(pid: int) -> Dict[int, int]:
+    """Resident bytes of a process and its live descendants, parents first (empty once it has exited)."""
+    if os.path.isdir('/proc/self'):
+        table = _proc_table()
+    elif sys.platform != 'win32':
+        table = _ps_table()
+    else:
+        return {}
+
+    children: Dict[int, List[int]] = {}
+    for child, (parent, _) in table.items():
+        children.setdefault(parent, []).append(child)
+    if pid not in table:
+        return {}
+    tree, pending = {}, [pid]
+    while pending:
+        current = pending.pop(0)
+        tree[current] = table[current][1]
+        pending.extend(children.get(current, []))
+    return tree
+
+
+def _proc_table() -> Dict[int, tuple]:
+    """pid: (parent pid, resident bytes) from /proc (Linux)."""
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    table = {}
+    for entry in Path('/proc').glob('[0-9]*'):
+        try:
+            stat = (entry / 'stat').read_text()
+            resident = int((entry / 'statm').read_text().split()[1])
+        except (OSError, IndexError, ValueError):
+            continue  # exited meanwhile
+        # "pid (comm) state ppid ...": comm may contain spaces and parentheses
+        fields = stat[stat.rindex(')') + 2:].split()
+        if fields[0] == 'Z':
+            continue
+        table[int(entry.name)] = (int(fields[1]), resident * page_size)
+    return table
+
+
+def _ps_table() -> Dict[int, tuple]:
+    """pid: (parent pid, resident bytes) from ps (macOS and other POSIX systems)."""
+    try:
+        output = subprocess.run(
+            ['ps', '-A', '-o', 'pid=,ppid=,rss='], stdout=subprocess.PIPE, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+    table = {}
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 3:
+            table[int(fields[0])] = (int(fields[1]), int(fields[2]) * 1024)  # rss is in KiB
+    return table
+
+
+def _size(n: int) -> str:
+    return f"{n / 2**30:.1f} GB" if n >= 2**30 else f"{n / 2**20:.0f} MB"
@@ -0,0 +1,132 @@
+"""CPU thread budgets and affinity for separation workers."""
+import logging
+import os
+import queue
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Thread pool sizes read by the math libraries torch/numpy are built with
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+)
+
+
+@dataclass(frozen=True)
+class ThreadBudget:
+    """Threads and CPUs one separation may use."""
+    intra_op_threads: int
+    inter_op_threads: int = 1
+    cpus: Optional[tuple[int, ...]] = None  # None: no pinning
+
+    def environment(self, base: Optional[dict] = None) -> dict:
+        """Environment for a child process that honours the budget."""
+        env = dict(os.environ if base is None else base)
+        for name in THREAD_ENV_VARS:
+            env[name] = str(self.intra_op_threads)
+        return env
+
+    def pin(self, pid: int = 0):
+        """Restrict a process (0: this one) to the budget's CPUs."""
+        if self.cpus and hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(pid, self.cpus)
+            except OSError as e:
+                logger.warning(f"Could not pin process {pid or os.getpid()} to CPUs {self.cpus}: {e}")
+
+    def apply_in_process(self):
+        """Pin this process and size torch's thread pools (call before any inference)."""
+        self.pin()
+        for name in THREAD_ENV_VARS:
+            os.environ[name] = str(self.intra_op_threads)
+
+        import torch
+
+        torch.set_num_threads(self.intra_op_threads)
+        try:
+            torch.set_num_interop_threads(self.inter_op_threads)
+        except RuntimeError:
+            pass  # the inter-op pool already started; it can only be sized once
+
+
+def available_cpus() -> list[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes() -> list[list[int]]:
+    """CPU lists of the NUMA nodes (a single node where sysfs has none)."""
+    nodes = []
+    for node in sorted(Path('/sys/devices/system/node').glob('node[0-9]*')):
+        try:
+            nodes.append(_parse_cpu_list((node / 'cpulist').read_text()))
+        except OSError:
+            continue
+    return nodes or [list(range(os.cpu_count() or 1))]
+
+
+def split_cores(workers: int, pin: bool = True, cpus: Optional[list[int]] = None) -> list[ThreadBudget]:
+    """Divide the CPUs into one budget per worker.
+
+    CPUs are ordered node by node before being cut into contiguous groups,
+    so workers stay within a NUMA node whenever the split allows it.
+    """
+    allowed = set(cpus if cpus is not None else available_cpus())
+    ordered = [cpu for node in numa_nodes() for cpu in node if cpu in allowed]
+    ordered += sorted(allowed - set(ordered))
+
+    workers = max(1, min(workers, len(ordered)))
+    budgets = []
+    for index in range(workers):
+        group = ordered[index * len(ordered) // workers:(index + 1) * len(ordered) // workers]
+        budgets.append(ThreadBudget(
+            intra_op_threads=len(group),
+            cpus=tuple(group) if pin else None
+        ))
+    return budgets
+
+
+class ThreadBudgetPool:
+    """Hands out one budget per running separation."""
+
+    def __init__(self, budgets: list[ThreadBudget]):
+        self.budgets = list(budgets)
+        self._free: queue.Queue = queue.Queue()
+        for budget in self.budgets:
+            self._free.put(budget)
+
+    @classmethod
+    def for_workers(cls, workers: int, pin: bool = True) -> 'ThreadBudgetPool':
+        return cls(split_cores(workers, pin=pin))
+
+    @contextmanager
+    def acquire(self):
+        """Borrow a free budget for the duration of one separation."""
+        budget = self._free.get()
+        try:
+            yield budget
+        finally:
+            self._free.put(budget)
+
+
+def _parse_cpu_list(text: str) -> list[int]:
+    """Parse a sysfs CPU list such as "0-3,8-11"."""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-')
+            cpus.extend(range(int(first), int(last) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
@@ -0,0 +1,198 @@
+"""Memory-mapped access to PCM/float WAV files."""
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass
+class WavLayout:
+    """Location and sample format of the audio data in a WAV file."""
+    samplerate: int
+    channels: int
+    sample_width: int  # bytes per sample
+    is_float: bool
+    data_offset: int
+    frames: int
+
+    @property
+    def dtype(self) -> np.dtype:
+        if self.is_float:
+            if self.sample_width == 4:
+                return np.dtype('<f4')
+            if self.sample_width == 8:
+                return np.dtype('<f8')
+        elif self.sample_width == 2:
+            return np.dtype('<i2')
+        elif self.sample_width == 4:
+            return np.dtype('<i4')
+        raise ValueError(
+            f"Unsupported WAV sample format: {self.sample_width * 8}-bit "
+            f"{'float' if self.is_float else 'PCM'}"
+        )
+
+    @property
+    def full_scale(self) -> float:
+        """Value that corresponds to 1.0 for this sample format."""
+        if self.is_float:
+            return 1.0
+        return float(2 ** (self.sample_width * 8 - 1))
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.samplerate
+
+
+def read_wav_layout(path: Path) -> WavLayout:
+    """Parse the RIFF chunks of a WAV file to find its fmt and data chunks."""
+    path = Path(path)
+    file_size = path.stat().st_size
+    fmt = None
+
+    with open(path, 'rb') as f:
+        riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave != b'WAVE':
+            raise ValueError(f"Not a WAV file: {path}")
+
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"WAV file has no data chunk: {path}")
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                format_tag, channels, samplerate, _, _, bits = struct.unpack('<HHIIHH', body[:16])
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack('<H', body[24:26])[0]
+                fmt = (format_tag, channels, samplerate, bits)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"WAV data chunk before fmt chunk: {path}")
+                format_tag, channels, samplerate, bits = fmt
+                if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+                    raise ValueError(f"Unsupported WAV format tag {format_tag:#x}: {path}")
+                data_offset = f.tell()
+                sample_width = bits // 8
+                # Streaming writers leave the size at 0 or 0xFFFFFFFF; trust the file
+                data_size = min(chunk_size, file_size - data_offset) if chunk_size else file_size - data_offset
+                return WavLayout(
+                    samplerate=samplerate,
+                    channels=channels,
+                    sample_width=sample_width,
+                    is_float=format_tag == WAVE_FORMAT_IEEE_FLOAT,
+                    data_offset=data_offset,
+                    frames=data_size // (sample_width * channels),
+                )
+            else:
+                f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+def open_wav_memmap(path: Path) -> tuple[np.ndarray, WavLayout]:
+    """Map the samples of a WAV file read-only as a (frames, channels) array."""
+    layout = read_wav_layout(path)
+    if layout.frames == 0:
+        return np.zeros((0, layout.channels), dtype=layout.dtype), layout
+    samples = np.memmap(
+        path,
+        dtype=layout.dtype,
+        mode='r',
+        offset=layout.data_offset,
+        shape=(layout.frames, layout.channels),
+    )
+    return samples, layout
+
+
+# Frames per block when copying samples between files
+COPY_FRAMES = 1 << 18
+
+
+def silent_blocks(frames: int, layout: WavLayout):
+    """Yield blocks of zeros totalling `frames` frames in layout's format."""
+    for start in range(0, max(0, frames), COPY_FRAMES):
+        yield np.zeros((min(COPY_FRAMES, frames - start), layout.channels), dtype=layout.dtype)
+
+
+def write_wav(path: Path, layout: WavLayout, blocks, frames: int):
+    """Write sample blocks in layout's format to a new WAV of the given length."""
+    data_size = frames * layout.channels * layout.sample_width
+    with open(path, 'wb') as f:
+        f.write(struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, WAVE_FORMAT_IEEE_FLOAT if layout.is_float else WAVE_FORMAT_PCM,
+            layout.channels, layout.samplerate,
+            layout.samplerate * layout.channels * layout.sample_width,
+            layout.channels * layout.sample_width, layout.sample_width * 8,
+            b'data', data_size,
+        ))
+        written = 0
+        for block in blocks:
+            for start in range(0, len(block), COPY_FRAMES):
+                chunk = np.ascontiguousarray(block[start:start + COPY_FRAMES], dtype=layout.dtype)
+                f.write(chunk.tobytes())
+                written += len(chunk)
+    if written != frames:
+        raise ValueError(f"Wrote {written} frames to {path}, expected {frames}")
+
+
+class GrowingWavWriter:
+    """16-bit PCM WAV writer whose header is valid after every append.
+
+    The RIFF and data sizes are rewritten on each append, so another
+    process can open (or memory-map) the file at any time and see every
+    frame written so far.
+    """
+
+    HEADER_SIZE = 44
+
+    def __init__(self, path: Path, samplerate: int, channels: int, resume_frames: int = 0):
+        self.path = Path(path)
+        self.samplerate = samplerate
+        self.channels = channels
+        self.frames = resume_frames
+        if resume_frames:
+            # Continue a file this writer produced, dropping anything past resume_frames
+            self._file = open(self.path, 'r+b')
+            self._file.truncate(self.HEADER_SIZE + resume_frames * channels * 2)
+        else:
+            self._file = open(self.path, 'wb')
+        self._write_header()
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.samplerate
+
+    def append(self, samples: np.ndarray):
+        """Append float samples in [-1, 1], shaped (frames, channels)."""
+        pcm = np.clip(np.rint(samples * 32767.0), -32768, 32767).astype('<i2')
+        self._file.seek(0, 2)
+        self._file.write(pcm.tobytes())
+        self.frames += len(pcm)
+        self._write_header()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_header(self):
+        data_size = self.frames * self.channels * 2
+        self._file.seek(0)
+        self._file.write(struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, WAVE_FORMAT_PCM, self.channels, self.samplerate,
+            self.samplerate * self.channels * 2, self.channels * 2, 16,
+            b'data', data_size,
+        ))
+        self._file.flush()
@@ -0,0 +1,125 @@
+"""Multi-resolution min/max waveform peaks for stem previews."""
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from ..domain.entities import AudioFile, ProcessingJob
+from .wav_io import open_wav_memmap
+
+PEAKS_SUFFIX = '.peaks.npz'
+
+# Frames per peak at the finest level, and reduction factor between levels
+BASE_BLOCK = 256
+LEVEL_FACTOR = 4
+# Stop adding levels once a level has fewer peaks than this
+MIN_PEAKS = 256
+# Blocks reduced per pass over the memory map (bounds memory use)
+BLOCKS_PER_CHUNK = 4096
+
+
+@dataclass
+class PeakPyramid:
+    """Min/max peaks of a track at several zoom levels.
+
+    Each level is an int16 array of shape (n, 2) holding (min, max) over all
+    channels, scaled so that 32767 is full scale. Level 0 covers BASE_BLOCK
+    frames per peak; every following level is LEVEL_FACTOR times coarser.
+    """
+    samplerate: int
+    frames: int
+    base_block: int
+    factor: int
+    levels: list[np.ndarray]
+
+    def frames_per_peak(self, level: int) -> int:
+        return self.base_block * self.factor ** level
+
+    def level_for_width(self, width: int) -> tuple[np.ndarray, int]:
+        """Return the coarsest level with at least `width` peaks, and its frames per peak."""
+        for level in range(len(self.levels) - 1, -1, -1):
+            if len(self.levels[level]) >= width:
+                return self.levels[level], self.frames_per_peak(level)
+        return self.levels[0], self.frames_per_peak(0)
+
+    def save(self, path: Path):
+        """Write the pyramid as a compressed sidecar file."""
+        arrays = {f'level_{i}': level for i, level in enumerate(self.levels)}
+        meta = np.array([self.samplerate, self.frames, self.base_block, self.factor], dtype=np.int64)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, meta=meta, **arrays)
+
+    @classmethod
+    def load(cls, path: Path) -> 'PeakPyramid':
+        """Read a pyramid written by save()."""
+        with np.load(path) as data:
+            samplerate, frames, base_block, factor = (int(v) for v in data['meta'])
+            count = sum(1 for key in data.files if key.startswith('level_'))
+            levels = [data[f'level_{i}'] for i in range(count)]
+        return cls(samplerate, frames, base_block, factor, levels)
+
+
+def peaks_path_for(audio_file: AudioFile) -> Path:
+    """Sidecar path for a stem, e.g. vocals.wav -> vocals.peaks.npz."""
+    return audio_file.path.with_name(audio_file.stem + PEAKS_SUFFIX)
+
+
+def build_peak_pyramid(wav_path: Path) -> PeakPyramid:
+    """Compute the peak pyramid of a WAV file from a memory map, chunk by chunk."""
+    samples, layout = open_wav_memmap(wav_path)
+    scale = 32767.0 / layout.full_scale
+
+    base = np.empty((-(-layout.frames // BASE_BLOCK), 2), dtype=np.int16)
+    chunk_frames = BASE_BLOCK * BLOCKS_PER_CHUNK
+    for start in range(0, layout.frames, chunk_frames):
+        chunk = samples[start:start + chunk_frames]
+        full_blocks = len(chunk) // BASE_BLOCK
+        first = start // BASE_BLOCK
+
+        if full_blocks:
+            blocks = chunk[:full_blocks * BASE_BLOCK].reshape(full_blocks, -1)
+            base[first:first + full_blocks, 0] = _to_int16(blocks.min(axis=1), scale)
+            base[first:first + full_blocks, 1] = _to_int16(blocks.max(axis=1), scale)
+
+        tail = chunk[full_blocks * BASE_BLOCK:]
+        if len(tail):
+            base[first + full_blocks] = _to_int16(np.array([tail.min(), tail.max()]), scale)
+
+    levels = [base]
+    while len(levels[-1]) >= MIN_PEAKS * LEVEL_FACTOR:
+        levels.append(_reduce_level(levels[-1], LEVEL_FACTOR))
+
+    return PeakPyramid(
+        samplerate=layout.samplerate,
+        frames=layout.frames,
+        base_block=BASE_BLOCK,
+        factor=LEVEL_FACTOR,
+        levels=levels,
+    )
+
+
+def _to_int16(values: np.ndarray, scale: float) -> np.ndarray:
+    return np.clip(np.rint(values * scale), -32768, 32767).astype(np.int16)
+
+
+def _reduce_level(level: np.ndarray, factor: int) -> np.ndarray:
+    """Combine every `factor` peaks into one (the last group may be shorter)."""
+    groups = -(-len(level) // factor)
+    padded = np.empty((groups * factor, 2), dtype=level.dtype)
+    padded[:len(level)] = level
+    # Pad with the last peak so it does not change min/max of the final group
+    padded[len(level):] = level[-1]
+    padded = padded.reshape(groups, factor, 2)
+    return np.stack([padded[:, :, 0].min(axis=1), padded[:, :, 1].max(axis=1)], axis=1)
+
+
+class WaveformPeaksStep:
+    """Post-separation step that writes a peak pyramid sidecar next to every stem."""
+
+    description = "Building waveform previews..."
+
+    def run(self, job: ProcessingJob):
+        if job.separated_audio is None:
+            return
+        for stem in job.separated_audio.all_stems:
+            build_peak_pyramid(stem.path).save(peaks_path_for(stem))
@@ -0,0 +1,95 @@
+"""Live view of the event log, filterable by job, level and text."""
+import logging
+from typing import Optional
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPlainTextEdit,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..infrastructure.event_log import RING_SIZE, Event, EventLog
+
+LEVELS = [('Debug', logging.DEBUG), ('Info', logging.INFO), ('Warnings', logging.WARNING), ('Errors', logging.ERROR)]
+
+
+class EventLogWindow(QWidget):
+    """Shows the events buffered in memory and follows new ones."""
+
+    def __init__(self, event_log: EventLog, job_id: Optional[str] = None, label: str = '', parent: QWidget = None):
+        super().__init__(parent)
+        self.event_log = event_log
+        self.job_id = job_id
+        self._last_seq = 0
+
+        self.init_ui(label)
+        self._reload()
+
+        # New events are picked up from the ring buffer, never pushed from worker threads
+        self._timer = QTimer(self)
+        self._timer.setInterval(250)
+        self._timer.timeout.connect(self._append_new)
+        self._timer.start()
+
+    def init_ui(self, label: str):
+        layout = QVBoxLayout()
+
+        filters = QHBoxLayout()
+        self.job_only_checkbox = QCheckBox(f'Only {label or self.job_id}', self)
+        self.job_only_checkbox.setChecked(self.job_id is not None)
+        self.job_only_checkbox.setVisible(self.job_id is not None)
+        self.job_only_checkbox.toggled.connect(self._reload)
+        filters.addWidget(self.job_only_checkbox)
+
+        filters.addWidget(QLabel('Level:', self))
+        self.level_combo = QComboBox(self)
+        for name, level in LEVELS:
+            self.level_combo.addItem(name, level)
+        self.level_combo.setCurrentIndex(1)
+        self.level_combo.currentIndexChanged.connect(self._reload)
+        filters.addWidget(self.level_combo)
+
+        self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText('Search')
+        self.search_input.textChanged.connect(self._reload)
+        filters.addWidget(self.search_input, 1)
+        layout.addLayout(filters)
+
+        self.text = QPlainTextEdit(self)
+        self.text.setReadOnly(True)
+        self.text.setMaximumBlockCount(RING_SIZE)
+        self.text.setFont(QFont('Courier New'))
+        layout.addWidget(self.text)
+
+        if self.event_log.path is not None:
+            layout.addWidget(QLabel(f'Full log: {self.event_log.path}', self))
+
+        self.setLayout(layout)
+        self.setWindowTitle(f'Event Log - {label}' if label else 'Event Log')
+        self.resize(820, 480)
+
+    def _matches(self, event: Event) -> bool:
+        job = self.job_id if self.job_only_checkbox.isChecked() else None
+        needle = self.search_input.text().strip().lower()
+        return event.matches(job, self.level_combo.currentData()) and needle in event.format().lower()
+
+    def _reload(self):
+        self.text.clear()
+        self._last_seq = 0
+        self._append_new()
+
+    def _append_new(self):
+        events = self.event_log.events(after=self._last_seq)
+        if not events:
+            return
+        self._last_seq = events[-1].seq
+        lines = [event.format() for event in events if self._matches(event)]
+        if lines:
+            self.text.appendPlainText('\n'.join(lines))
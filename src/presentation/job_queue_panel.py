@@ -0,0 +1,162 @@
+"""Job queue panel showing per-job progress and ETA."""
+from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtWidgets import (
+    QAbstractItemView,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QProgressBar,
+    QPushButton,
+    QSpinBox,
+    QTableWidget,
+    QTableWidgetItem,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..application.job_queue import JobRunner, PipelinedExecutor, QueuedJob
+from .progress_bridge import ProgressBridge
+
+
+def format_eta(seconds: float | None) -> str:
+    """Format an ETA as m:ss, or an empty string when unknown."""
+    if seconds is None:
+        return ''
+    minutes, secs = divmod(int(seconds), 60)
+    return f'{minutes}:{secs:02d}'
+
+
+class JobQueuePanel(QWidget):
+    """Queue view backed by a PipelinedExecutor."""
+
+    COLUMNS = ['Source', 'Status', 'Progress', 'ETA']
+
+    jobs_changed = pyqtSignal()
+    job_activated = pyqtSignal(object)  # QueuedJob, on double-click
+    log_requested = pyqtSignal(object)  # selected QueuedJob, or None for all jobs
+
+    def __init__(self, max_concurrent_jobs: int = 2, parent: QWidget = None):
+        super().__init__(parent)
+        self._rows: dict[str, int] = {}
+        self._latest: dict[str, QueuedJob] = {}
+
+        self.progress_bridge = ProgressBridge(parent=self)
+        self.progress_bridge.updated.connect(self._apply_update)
+        self.executor = PipelinedExecutor(
+            max_concurrent_jobs=max_concurrent_jobs,
+            on_update=lambda job: self.progress_bridge.publish(job.job_id, job)
+        )
+
+        self.init_ui(max_concurrent_jobs)
+
+        # ETA changes with time even when no progress arrives
+        self._eta_timer = QTimer(self)
+        self._eta_timer.setInterval(1000)
+        self._eta_timer.timeout.connect(self._refresh_eta)
+        self._eta_timer.start()
+
+    def init_ui(self, max_concurrent_jobs: int):
+        """Initialize the queue table and its controls."""
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel('Parallel jobs:', self))
+        self.concurrency_input = QSpinBox(self)
+        self.concurrency_input.setRange(1, 8)
+        self.concurrency_input.setValue(max_concurrent_jobs)
+        self.concurrency_input.valueChanged.connect(self.executor.set_max_concurrent_jobs)
+        controls.addWidget(self.concurrency_input)
+        controls.addStretch()
+
+        self.cancel_selected_button = QPushButton('Cancel Selected', self)
+        self.cancel_selected_button.clicked.connect(self.cancel_selected)
+        controls.addWidget(self.cancel_selected_button)
+
+        self.clear_button = QPushButton('Clear Finished', self)
+        self.clear_button.clicked.connect(self.clear_finished)
+        controls.addWidget(self.clear_button)
+
+        self.log_button = QPushButton('Show Log', self)
+        self.log_button.clicked.connect(self.show_log)
+        controls.addWidget(self.log_button)
+        layout.addLayout(controls)
+
+        self.table = QTableWidget(0, len(self.COLUMNS), self)
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        self.table.cellDoubleClicked.connect(self._activate_row)
+        layout.addWidget(self.table)
+
+        self.setLayout(layout)
+
+    def submit(self, label: str, runner: JobRunner) -> str:
+        """Queue a job for execution."""
+        return self.executor.submit(label, runner)
+
+    def cancel_selected(self):
+        """Cancel the jobs on the selected rows."""
+        selected_rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for job_id, row in self._rows.items():
+            if row in selected_rows:
+                self.executor.cancel(job_id)
+
+    def show_log(self):
+        """Ask for the event log of the selected job (of all jobs without a selection)."""
+        selected_rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for job_id, row in self._rows.items():
+            if row in selected_rows:
+                self.log_requested.emit(self._latest[job_id])
+                return
+        self.log_requested.emit(None)
+
+    def cancel_all(self):
+        """Cancel every unfinished job."""
+        self.executor.cancel_all()
+
+    def clear_finished(self):
+        """Remove finished jobs from the table."""
+        self.executor.forget_finished()
+        self._latest = {job.job_id: job for job in self.executor.jobs()}
+        self._rows.clear()
+        self.table.setRowCount(0)
+        for job in self._latest.values():
+            self._apply_update(job.job_id, job)
+
+    @property
+    def has_active_jobs(self) -> bool:
+        return self.executor.has_active_jobs
+
+    def _apply_update(self, job_id: str, job: QueuedJob):
+        """Render the latest state of a job (GUI thread)."""
+        self._latest[job_id] = job
+        row = self._rows.get(job_id)
+        if row is None:
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self._rows[job_id] = row
+            self.table.setItem(row, 0, QTableWidgetItem(job.label))
+            self.table.setItem(row, 1, QTableWidgetItem())
+            self.table.setCellWidget(row, 2, QProgressBar(self.table))
+            self.table.setItem(row, 3, QTableWidgetItem())
+
+        self.table.item(row, 1).setText(job.message)
+        self.table.cellWidget(row, 2).setValue(job.percentage)
+        self.table.item(row, 3).setText(format_eta(job.eta_seconds))
+        self.jobs_changed.emit()
+
+    def _activate_row(self, row: int, column: int):
+        for job_id, job_row in self._rows.items():
+            if job_row == row:
+                self.job_activated.emit(self._latest[job_id])
+                return
+
+    def _refresh_eta(self):
+        for job_id, job in self._latest.items():
+            if job.status == 'running':
+                self.table.item(self._rows[job_id], 3).setText(format_eta(job.eta_seconds))
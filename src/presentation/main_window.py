@@ -1,17 +1,21 @@
 """Main GUI window for YouTube Audio Splitter."""
+import logging
 import os
 import subprocess
 import sys
-import threading
 from pathlib import Path
+from typing import Optional
 
-from PyQt6.QtCore import Q_ARG, QEvent, QMetaObject, Qt
+from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QButtonGroup,
+    QCheckBox,
+    QComboBox,
     QFileDialog,
     QHBoxLayout,
     QLabel,
     QLineEdit,
+    QPlainTextEdit,
     QPushButton,
     QRadioButton,
     QSizePolicy,
@@ -23,12 +27,33 @@ from PyQt6.QtWidgets import (
 from ..application.dtos import (
     LocalFileProcessRequest,
     ProcessRequest,
-    ProcessingProgress,
 )
 from ..application.use_cases import (
     ProcessAudioUseCase,
     ProcessLocalFileUseCase,
 )
+from ..domain.entities import (
+    AudioFormat,
+    DEFAULT_PRESET,
+    MixSpec,
+    SEPARATION_PRESETS,
+    TimeRange,
+)
+from ..domain.services import ISeparationCostModel
+from ..infrastructure.event_log import EventLog
+from .event_log_window import EventLogWindow
+from .job_queue_panel import JobQueuePanel
+from .progress_bridge import ProgressBridge
+
+logger = logging.getLogger(__name__)
+
+# Choices for the stem files, as (label, value of AudioFormat)
+STEM_FORMATS = [
+    ('WAV (16-bit, largest)', 'wav'),
+    ('FLAC (lossless)', 'flac'),
+    ('MP3 (VBR ~190 kbit/s)', 'mp3'),
+    ('Opus (160 kbit/s)', 'opus'),
+]
 
 
 class MainWindow(QWidget):
@@ -38,13 +63,17 @@ class MainWindow(QWidget):
         self,
         process_audio_use_case: ProcessAudioUseCase,
         process_local_file_use_case: ProcessLocalFileUseCase,
+        cost_model: Optional[ISeparationCostModel] = None,
+        event_log: Optional[EventLog] = None,
     ):
         super().__init__()
         self.process_audio_use_case = process_audio_use_case
         self.process_local_file_use_case = process_local_file_use_case
+        self.cost_model = cost_model
+        self.event_log = event_log
 
-        self.process_thread = None
-        self.cancel_requested = False
+        self.progress_bridge = ProgressBridge(parent=self)
+        self.progress_bridge.updated.connect(self._show_status)
 
         self.init_ui()
 
@@ -53,11 +82,12 @@ class MainWindow(QWidget):
         layout = QVBoxLayout()
 
         # URL input
-        self.url_label = QLabel('Enter YouTube URL:', self)
+        self.url_label = QLabel('Enter YouTube URLs (one per line):', self)
         layout.addWidget(self.url_label)
 
-        self.url_input = QLineEdit(self)
-        self.url_input.setText("")  # No default URL
+        self.url_input = QPlainTextEdit(self)
+        self.url_input.setPlainText("")  # No default URL
+        self.url_input.setFixedHeight(60)
         layout.addWidget(self.url_input)
 
         layout.addItem(QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed))
@@ -79,8 +109,20 @@ class MainWindow(QWidget):
         self.format_layout.addWidget(self.mp3_button)
         layout.addLayout(self.format_layout)
 
-        self.output_format_label = QLabel('* Output is always .wav', self)
-        layout.addWidget(self.output_format_label)
+        # Format the stems and mixes are written in
+        self.stem_format_layout = QHBoxLayout()
+        self.stem_format_layout.addWidget(QLabel('Stem files:', self))
+        self.stem_format_combo = QComboBox(self)
+        for label, value in STEM_FORMATS:
+            self.stem_format_combo.addItem(label, value)
+        self.stem_format_layout.addWidget(self.stem_format_combo, 1)
+        layout.addLayout(self.stem_format_layout)
+
+        self.stem_container_checkbox = QCheckBox('Also export a .stem.mp4 (mix + 4 stems) for DJ software', self)
+        layout.addWidget(self.stem_container_checkbox)
+
+        self.profile_checkbox = QCheckBox('Profile jobs (flamegraph files in <output>/profiles)', self)
+        layout.addWidget(self.profile_checkbox)
 
         layout.addItem(QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed))
 
@@ -98,6 +140,39 @@ class MainWindow(QWidget):
         self.operation_layout.addWidget(self.download_and_split_button)
         layout.addLayout(self.operation_layout)
 
+        self.preview_checkbox = QCheckBox('Quick preview of the first 30 seconds before full separation', self)
+        layout.addWidget(self.preview_checkbox)
+
+        # Separation preset
+        self.preset_layout = QHBoxLayout()
+        self.preset_layout.addWidget(QLabel('Separation preset:', self))
+        self.preset_combo = QComboBox(self)
+        for name in SEPARATION_PRESETS:
+            self.preset_combo.addItem(name.capitalize(), name)
+        self.preset_combo.setCurrentIndex(list(SEPARATION_PRESETS).index(DEFAULT_PRESET))
+        self.preset_combo.currentIndexChanged.connect(self._show_preset_estimate)
+        self.preset_layout.addWidget(self.preset_combo)
+        self.preset_estimate_label = QLabel(self)
+        self.preset_layout.addWidget(self.preset_estimate_label, 1)
+        layout.addLayout(self.preset_layout)
+        self._show_preset_estimate()
+
+        # Extra stem mixes
+        self.mixes_label = QLabel('Extra mixes (optional, e.g. karaoke=drums+bass+other+vocals@-12):', self)
+        layout.addWidget(self.mixes_label)
+
+        self.mixes_input = QLineEdit(self)
+        self.mixes_input.setPlaceholderText('instrumental=drums+bass+other')
+        layout.addWidget(self.mixes_input)
+
+        # Clip selection
+        self.clip_label = QLabel('Clip (optional, start-end, e.g. 1:30-2:00):', self)
+        layout.addWidget(self.clip_label)
+
+        self.clip_input = QLineEdit(self)
+        self.clip_input.setPlaceholderText('whole track')
+        layout.addWidget(self.clip_input)
+
         layout.addItem(QSpacerItem(20, 20, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Fixed))
 
         # Output directory selection
@@ -120,7 +195,7 @@ class MainWindow(QWidget):
         layout.addLayout(self.directory_layout)
 
         # Local file selection button
-        self.local_file_button = QPushButton('Select Local File to split', self)
+        self.local_file_button = QPushButton('Select Local Files to split', self)
         self.local_file_button.clicked.connect(self.select_local_file)
         layout.addWidget(self.local_file_button)
 
@@ -134,11 +209,19 @@ class MainWindow(QWidget):
         layout.addWidget(self.download_button)
 
         # Cancel button
-        self.cancel_button = QPushButton('Cancel', self)
+        self.cancel_button = QPushButton('Cancel All', self)
         self.cancel_button.setEnabled(False)
         self.cancel_button.clicked.connect(self.cancel_process)
         layout.addWidget(self.cancel_button)
 
+        # Job queue
+        self.queue_panel = JobQueuePanel(max_concurrent_jobs=2, parent=self)
+        self.queue_panel.jobs_changed.connect(self.update_cancel_button)
+        self.queue_panel.job_activated.connect(self.open_stem_player)
+        self.queue_panel.log_requested.connect(self.open_event_log)
+        self.queue_panel.log_button.setVisible(self.event_log is not None)
+        layout.addWidget(self.queue_panel)
+
         # Status label
         self.status_label = QLabel('', self)
         self.status_label.setStyleSheet(
@@ -149,7 +232,11 @@ class MainWindow(QWidget):
 
         self.setLayout(layout)
         self.setWindowTitle('YouTube Audio Splitter')
-        self.setGeometry(300, 300, 500, 250)
+        self.player_windows = []
+        self.log_windows = []
+
+        self.setGeometry(300, 300, 640, 560)
+        self.setAcceptDrops(True)
 
         self.enable_widgets()
 
@@ -165,145 +252,178 @@ class MainWindow(QWidget):
     def select_local_file(self):
         """Open file selection dialog for local audio files."""
         options = QFileDialog.Option.DontUseNativeDialog
-        file_path, _ = QFileDialog.getOpenFileName(
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self,
-            "Select Local File",
+            "Select Local Files",
             "",
             "Audio Files (*.wav *.mp3);;All Files (*)",
             options=options
         )
-        if file_path:
+        for file_path in file_paths:
             self.process_local_file(file_path)
 
     def start_processing(self):
-        """Start the audio processing workflow."""
+        """Queue every entered YouTube URL for processing."""
+        youtube_urls = self.url_input.toPlainText().split()
+        if not youtube_urls:
+            self.update_status('Error: Please enter a YouTube URL.')
+            return
+
+        output_directory = self.output_path_display.text().strip()
+        if not output_directory:
+            self.update_status('Error: Please select an output directory.')
+            return
+
+        # Checked once: on an error the URLs stay in the field to be fixed and queued again
+        options = self.request_options()
+        if options is None:
+            return
+
+        for youtube_url in youtube_urls:
+            self.queue_youtube_url(youtube_url, output_directory, options)
+        self.url_input.clear()
+        self.update_status(f'Queued {len(youtube_urls)} URL(s).')
+
+    def request_options(self) -> dict | None:
+        """Parse the mixes and clip fields; reports and returns None when invalid."""
         try:
-            if self.process_thread is not None and self.process_thread.is_alive():
-                self.update_status('Error: A process is already running.')
-                return
-
-            youtube_url = self.url_input.text().strip()
-            if not youtube_url:
-                self.update_status('Error: Please enter a YouTube URL.')
-                return
-
-            output_directory = self.output_path_display.text().strip()
-            if not output_directory:
-                self.update_status('Error: Please select an output directory.')
-                return
-
-            self.disable_widgets()
-            self.cancel_requested = False
-
-            # Start processing in a separate thread
-            self.process_thread = threading.Thread(
-                target=self._process_youtube_thread,
-                args=(youtube_url, output_directory)
-            )
-            self.process_thread.start()
-            self.update_status('Starting...')
-
-        except Exception as e:
+            mixes = [MixSpec.parse(text) for text in self.mixes_input.text().split()]
+            clip = TimeRange.parse(self.clip_input.text())
+        except ValueError as e:
             self.update_status(f'Error: {str(e)}')
-            self.enable_widgets()
-
-    def _process_youtube_thread(self, youtube_url: str, output_directory: str):
-        """Process YouTube audio in a separate thread."""
-        try:
-            format_choice = 'wav' if self.wav_button.isChecked() else 'mp3'
-            should_split = self.download_and_split_button.isChecked()
-
-            request = ProcessRequest(
-                youtube_url=youtube_url,
-                output_directory=Path(output_directory),
-                download_format=format_choice,
-                should_split=should_split
-            )
+            return None
+        return {
+            'preset': self.preset_combo.currentData(),
+            'stem_format': self.stem_format_combo.currentData(),
+            'stem_container': self.stem_container_checkbox.isChecked(),
+            'profile': self.profile_checkbox.isChecked(),
+            'mixes': mixes,
+            'start_time': clip.start if clip else None,
+            'end_time': clip.end if clip else None,
+        }
+
+    def _show_preset_estimate(self):
+        """Show what the selected preset costs on this machine."""
+        preset = SEPARATION_PRESETS[self.preset_combo.currentData()]
+        estimate = self.cost_model.estimate(preset, 240.0) if self.cost_model else None
+        if estimate is None:
+            self.preset_estimate_label.setText('(run with --calibrate for time estimates)')
+            return
+        minutes, seconds = divmod(int(estimate), 60)
+        self.preset_estimate_label.setText(f'about {minutes}:{seconds:02d} for a 4-minute song')
+
+    def queue_youtube_url(self, youtube_url: str, output_directory: str, options: dict | None = None):
+        """Queue a single YouTube URL with the given (by default the current) options."""
+        if options is None:
+            options = self.request_options()
+            if options is None:
+                return
 
-            result = self.process_audio_use_case.execute(
+        request = ProcessRequest(
+            youtube_url=youtube_url,
+            output_directory=Path(output_directory),
+            download_format='wav' if self.wav_button.isChecked() else 'mp3',
+            should_split=self.download_and_split_button.isChecked(),
+            preview=self.preview_checkbox.isChecked(),
+            **options
+        )
+        self.queue_panel.submit(
+            youtube_url,
+            lambda on_progress, cancellation_token: self.process_audio_use_case.execute(
                 request,
-                on_progress=self._on_progress,
-                cancellation_token=lambda: self.cancel_requested
+                on_progress=on_progress,
+                cancellation_token=cancellation_token
             )
-
-            if result.success:
-                self.update_status('Completed!')
-            else:
-                self.update_status(f'Failed: {result.error or result.message}')
-
-        except Exception as e:
-            self.update_status(f'Error: {str(e)}')
-        finally:
-            self.enable_widgets()
-            self.cancel_requested = False
-            self.process_thread = None
+        )
 
     def process_local_file(self, file_path: str):
-        """Process a local audio file."""
-        try:
-            if self.process_thread is not None and self.process_thread.is_alive():
-                self.update_status('Error: A process is already running.')
-                return
-
-            output_directory = self.output_path_display.text().strip()
-            if not output_directory:
-                self.update_status('Error: Please select an output directory.')
-                return
-
-            self.disable_widgets()
-            self.cancel_requested = False
-
-            # Start processing in a separate thread
-            self.process_thread = threading.Thread(
-                target=self._process_local_file_thread,
-                args=(file_path, output_directory)
-            )
-            self.process_thread.start()
-            self.update_status('Processing local file...')
-
-        except Exception as e:
-            self.update_status(f'Error: {str(e)}')
-            self.enable_widgets()
-
-    def _process_local_file_thread(self, file_path: str, output_directory: str):
-        """Process local file in a separate thread."""
-        try:
-            request = LocalFileProcessRequest(
-                file_path=Path(file_path),
-                output_directory=Path(output_directory)
-            )
-
-            result = self.process_local_file_use_case.execute(
+        """Queue a local audio file for processing."""
+        output_directory = self.output_path_display.text().strip()
+        if not output_directory:
+            self.update_status('Error: Please select an output directory.')
+            return
+
+        options = self.request_options()
+        if options is None:
+            return
+
+        request = LocalFileProcessRequest(
+            file_path=Path(file_path),
+            output_directory=Path(output_directory),
+            preview=self.preview_checkbox.isChecked(),
+            **options
+        )
+        self.queue_panel.submit(
+            Path(file_path).name,
+            lambda on_progress, cancellation_token: self.process_local_file_use_case.execute(
                 request,
-                on_progress=self._on_progress,
-                cancellation_token=lambda: self.cancel_requested
+                on_progress=on_progress,
+                cancellation_token=cancellation_token
             )
+        )
 
-            if result.success:
-                self.update_status('Completed!')
-            else:
-                self.update_status(f'Failed: {result.error or result.message}')
+    def dragEnterEvent(self, event):
+        """Accept dropped files and URLs."""
+        if event.mimeData().hasUrls() or event.mimeData().hasText():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        """Queue dropped local files and YouTube URLs."""
+        mime = event.mimeData()
+        if mime.hasUrls():
+            for url in mime.urls():
+                if url.isLocalFile():
+                    self.process_local_file(url.toLocalFile())
+                else:
+                    self.queue_youtube_url(url.toString(), self.output_path_display.text().strip())
+        elif mime.hasText():
+            for youtube_url in mime.text().split():
+                self.queue_youtube_url(youtube_url, self.output_path_display.text().strip())
+        event.acceptProposedAction()
+
+    def open_stem_player(self, job):
+        """Open the stem player for a finished job (double-click in the queue)."""
+        separated = job.result.separated_audio if job.result else None
+        if separated is None:
+            # Preview stems are replaced in place by the full separation
+            separated = job.preview
+        if separated is None or not separated.all_stems:
+            self.update_status('No stems to play for this job.')
+            return
+        if any(stem.format != AudioFormat.WAV for stem in separated.all_stems):
+            self.update_status('The stem player needs WAV stems; this job was encoded.')
+            return
+
+        # Imported on first use: QtMultimedia is only needed by the player
+        from .stem_player import StemPlayerWindow
 
+        try:
+            player = StemPlayerWindow(separated, title=f'Stems - {job.label}')
         except Exception as e:
             self.update_status(f'Error: {str(e)}')
-        finally:
-            self.enable_widgets()
-            self.cancel_requested = False
-            self.process_thread = None
-
-    def _on_progress(self, progress: ProcessingProgress):
-        """Handle progress updates from use cases."""
-        self.update_status(f'[{progress.percentage}%] {progress.message}')
+            return
+        self.player_windows.append(player)
+        player.destroyed.connect(lambda: self.player_windows.remove(player))
+        player.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        player.show()
+
+    def open_event_log(self, job):
+        """Open the event log, filtered to a job if one is selected in the queue."""
+        if self.event_log is None:
+            return
+        if job is None:
+            window = EventLogWindow(self.event_log)
+        else:
+            window = EventLogWindow(self.event_log, job_id=job.job_id, label=job.label)
+        self.log_windows.append(window)
+        window.destroyed.connect(lambda: self.log_windows.remove(window))
+        window.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        window.show()
 
     def cancel_process(self):
-        """Cancel the current processing operation."""
-        print("[!] Cancellation requested")
-        self.cancel_requested = True
-        self.cancel_button.setEnabled(False)
-        self.cancel_button.setStyleSheet(
-            "QPushButton { font-size: 20px; background-color: #555; "
-            "color: #888; padding: 8px; margin: 8px; }"
-        )
+        """Cancel all queued and running jobs."""
+        logger.info("Cancellation requested")
+        self.queue_panel.cancel_all()
         self.update_status('Cancelling...')
 
     def view_in_finder(self):
@@ -317,63 +437,36 @@ class MainWindow(QWidget):
             subprocess.run(["xdg-open", directory])
 
     def update_status(self, text: str):
-        """Update the status label (thread-safe)."""
-        QMetaObject.invokeMethod(
-            self.status_label,
-            "setText",
-            Qt.ConnectionType.QueuedConnection,
-            Q_ARG(str, text)
-        )
+        """Update the status label (thread-safe, throttled)."""
+        self.progress_bridge.publish('status', text)
 
-    def disable_widgets(self):
-        """Disable widgets during processing."""
-        self.url_input.setEnabled(False)
-        self.output_path_display.setEnabled(False)
-        self.output_path_button.setEnabled(False)
-        self.wav_button.setEnabled(False)
-        self.mp3_button.setEnabled(False)
-        self.download_button.setEnabled(False)
-        self.local_file_button.setEnabled(False)
-        self.download_only_button.setEnabled(False)
-        self.download_and_split_button.setEnabled(False)
-        self.cancel_button.setEnabled(True)
-
-        self.url_input.setStyleSheet("background-color: #797979; color: #000;")
-        self.output_path_display.setStyleSheet("background-color: #797979; color: #000;")
-        self.download_button.setStyleSheet(
-            "QPushButton { font-size: 20px; background-color: #111; "
-            "color: #283; padding: 8px; margin: 8px; }"
-        )
-        self.download_button.setText("... Processing ...")
-        self.cancel_button.setStyleSheet(
-            "QPushButton { font-size: 20px; background-color: #bb3333; "
-            "color: #fee; padding: 8px; margin: 8px; }"
-        )
+    def _show_status(self, job_id: str, text: str):
+        """Apply the latest coalesced status on the GUI thread."""
+        self.status_label.setText(text)
 
     def enable_widgets(self):
-        """Enable widgets after processing."""
-        self.url_input.setEnabled(True)
-        self.output_path_display.setEnabled(True)
-        self.output_path_button.setEnabled(True)
-        self.wav_button.setEnabled(True)
-        self.mp3_button.setEnabled(True)
-        self.download_button.setEnabled(True)
-        self.local_file_button.setEnabled(True)
-        self.download_only_button.setEnabled(True)
-        self.download_and_split_button.setEnabled(True)
-        self.cancel_button.setEnabled(False)
-
-        self.url_input.setStyleSheet("")
-        self.output_path_display.setStyleSheet("")
+        """Apply the idle style to the input widgets and buttons."""
         self.download_button.setStyleSheet(
             "QPushButton { font-size: 20px; background-color: #006400; "
             "color: #f4f4f4; padding: 8px; margin: 8px; }"
         )
         self.update_download_button_text()
-        self.cancel_button.setStyleSheet(
-            "QPushButton { font-size: 20px; background-color: #555; "
-            "color: #888; padding: 8px; margin: 8px; }"
-        )
+        self.update_cancel_button()
+
+    def update_cancel_button(self):
+        """Enable the cancel button while any job is queued or running."""
+        active = self.queue_panel.has_active_jobs
+        self.cancel_button.setEnabled(active)
+        if active:
+            self.cancel_button.setStyleSheet(
+                "QPushButton { font-size: 20px; background-color: #bb3333; "
+                "color: #fee; padding: 8px; margin: 8px; }"
+            )
+        else:
+            self.cancel_button.setStyleSheet(
+                "QPushButton { font-size: 20px; background-color: #555; "
+                "color: #888; padding: 8px; margin: 8px; }"
+            )
 
     def update_download_button_text(self):
         """Update download button text based on operation mode."""
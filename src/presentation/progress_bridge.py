@@ -0,0 +1,49 @@
+"""Throttled delivery of progress updates from worker threads to the GUI."""
+import threading
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+
+class ProgressBridge(QObject):
+    """Coalesces progress updates onto the GUI thread at a fixed frame rate.
+
+    Worker threads call publish() as often as they like; only the latest
+    state per job is kept, and `updated` is emitted at most once per job
+    per frame on the thread that owns the bridge.
+    """
+
+    updated = pyqtSignal(str, object)  # job_id, latest state
+    _wake = pyqtSignal()
+
+    def __init__(self, fps: int = 20, parent: QObject = None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._pending = {}
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, 1000 // fps))
+        self._timer.timeout.connect(self._flush)
+
+        # Queued across threads, so the timer is always started on its own thread
+        self._wake.connect(self._start_timer)
+
+    def publish(self, job_id: str, state: object):
+        """Record the latest state for a job (safe to call from any thread)."""
+        with self._lock:
+            was_idle = not self._pending
+            self._pending[job_id] = state
+        if was_idle:
+            self._wake.emit()
+
+    def _start_timer(self):
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            self._timer.stop()
+            return
+        for job_id, state in pending.items():
+            self.updated.emit(job_id, state)
@@ -0,0 +1,203 @@
+"""In-app stem player with per-stem gain, mute and solo."""
+import numpy as np
+from PyQt6.QtCore import QIODevice, QTimer, Qt
+from PyQt6.QtGui import QColor, QPainter
+from PyQt6.QtMultimedia import QAudio, QAudioFormat, QAudioSink, QMediaDevices
+from PyQt6.QtWidgets import (
+    QCheckBox,
+    QGridLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QSlider,
+    QVBoxLayout,
+    QWidget,
+)
+
+from ..domain.entities import SeparatedAudio
+from ..infrastructure.stem_mixer import StemMixer
+from ..infrastructure.waveform import PeakPyramid, build_peak_pyramid, peaks_path_for
+
+
+class MixerDevice(QIODevice):
+    """Pull-mode audio source that mixes the next block on demand."""
+
+    def __init__(self, mixer: StemMixer, parent=None):
+        super().__init__(parent)
+        self.mixer = mixer
+
+    def readData(self, maxlen: int) -> bytes:
+        return self.mixer.read(maxlen // self.mixer.bytes_per_frame)
+
+    def writeData(self, data) -> int:
+        return -1
+
+    def bytesAvailable(self) -> int:
+        remaining = (self.mixer.frames - self.mixer.position) * self.mixer.bytes_per_frame
+        return remaining + super().bytesAvailable()
+
+    def isSequential(self) -> bool:
+        return True
+
+
+class WaveformView(QWidget):
+    """Draws a stem's waveform from its peak pyramid, with a playhead."""
+
+    def __init__(self, pyramid: PeakPyramid, parent=None):
+        super().__init__(parent)
+        self.pyramid = pyramid
+        self.playhead = 0.0  # 0..1
+        self.setMinimumHeight(40)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#000'))
+
+        width, height = self.width(), self.height()
+        peaks, _ = self.pyramid.level_for_width(width)
+        if len(peaks):
+            # Pick the peak under each pixel column
+            columns = np.linspace(0, len(peaks) - 1, num=width).astype(int)
+            mid = height / 2
+            scale = mid / 32768.0
+            painter.setPen(QColor('#2a2'))
+            for x, (low, high) in enumerate(peaks[columns]):
+                painter.drawLine(x, int(mid - high * scale), x, int(mid - low * scale))
+
+        painter.setPen(QColor('#fee'))
+        x = int(self.playhead * width)
+        painter.drawLine(x, 0, x, height)
+        painter.end()
+
+
+class StemPlayerWindow(QWidget):
+    """Plays separated stems with live gain, mute and solo per stem."""
+
+    def __init__(self, separated: SeparatedAudio, title: str = 'Stem Player'):
+        super().__init__()
+        self.mixer = StemMixer(separated)
+        self.waveforms: list[WaveformView] = []
+
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(self.mixer.samplerate)
+        audio_format.setChannelCount(self.mixer.channels)
+        audio_format.setSampleFormat(QAudioFormat.SampleFormat.Int16)
+        self.sink = QAudioSink(QMediaDevices.defaultAudioOutput(), audio_format, self)
+        self.device = MixerDevice(self.mixer, self)
+        self.device.open(QIODevice.OpenModeFlag.ReadOnly)
+
+        self.init_ui(separated, title)
+
+        self.position_timer = QTimer(self)
+        self.position_timer.setInterval(50)
+        self.position_timer.timeout.connect(self.update_position)
+
+    def init_ui(self, separated: SeparatedAudio, title: str):
+        """Initialize the stem rows and transport controls."""
+        layout = QVBoxLayout()
+
+        grid = QGridLayout()
+        for index, stem in enumerate(separated.all_stems):
+            grid.addWidget(QLabel(stem.stem, self), index, 0)
+
+            mute = QCheckBox('Mute', self)
+            mute.toggled.connect(lambda checked, i=index: self.mixer.set_muted(i, checked))
+            grid.addWidget(mute, index, 1)
+
+            solo = QCheckBox('Solo', self)
+            solo.toggled.connect(lambda checked, i=index: self.mixer.set_soloed(i, checked))
+            grid.addWidget(solo, index, 2)
+
+            gain = QSlider(Qt.Orientation.Horizontal, self)
+            gain.setRange(-24, 6)  # dB
+            gain.setValue(0)
+            gain.setToolTip('Gain (dB)')
+            gain.valueChanged.connect(lambda db, i=index: self.mixer.set_gain_db(i, db))
+            grid.addWidget(gain, index, 3)
+
+            waveform = WaveformView(self._load_peaks(stem), self)
+            self.waveforms.append(waveform)
+            grid.addWidget(waveform, index, 4)
+        grid.setColumnStretch(4, 1)
+        layout.addLayout(grid)
+
+        transport = QHBoxLayout()
+        self.play_button = QPushButton('Play', self)
+        self.play_button.clicked.connect(self.toggle_playback)
+        transport.addWidget(self.play_button)
+
+        self.stop_button = QPushButton('Stop', self)
+        self.stop_button.clicked.connect(self.stop)
+        transport.addWidget(self.stop_button)
+
+        self.position_slider = QSlider(Qt.Orientation.Horizontal, self)
+        self.position_slider.setRange(0, max(1, int(self.mixer.duration * 10)))
+        self.position_slider.sliderMoved.connect(
+            lambda value: self.mixer.seek(value * self.mixer.samplerate // 10)
+        )
+        transport.addWidget(self.position_slider)
+
+        self.position_label = QLabel('0:00', self)
+        transport.addWidget(self.position_label)
+        layout.addLayout(transport)
+
+        self.setLayout(layout)
+        self.setWindowTitle(title)
+        self.setGeometry(340, 340, 720, 80 + 60 * len(self.waveforms))
+
+    def toggle_playback(self):
+        """Start, pause or resume playback."""
+        state = self.sink.state()
+        if state == QAudio.State.ActiveState:
+            self.sink.suspend()
+            self.position_timer.stop()
+            self.play_button.setText('Play')
+            return
+
+        if state == QAudio.State.SuspendedState:
+            self.sink.resume()
+        else:
+            if self.mixer.position >= self.mixer.frames:
+                self.mixer.seek(0)
+            self.sink.start(self.device)
+        self.position_timer.start()
+        self.play_button.setText('Pause')
+
+    def stop(self):
+        """Stop playback and rewind."""
+        self.sink.stop()
+        self.position_timer.stop()
+        self.mixer.seek(0)
+        self.play_button.setText('Play')
+        self.update_position()
+
+    def update_position(self):
+        """Move the slider, label and playheads to the mixer position."""
+        seconds = self.mixer.position / self.mixer.samplerate
+        if not self.position_slider.isSliderDown():
+            self.position_slider.setValue(int(seconds * 10))
+        minutes, secs = divmod(int(seconds), 60)
+        self.position_label.setText(f'{minutes}:{secs:02d}')
+
+        fraction = self.mixer.position / max(1, self.mixer.frames)
+        for waveform in self.waveforms:
+            waveform.playhead = fraction
+            waveform.update()
+
+        if self.mixer.position >= self.mixer.frames and self.sink.state() == QAudio.State.IdleState:
+            self.stop()
+
+    def closeEvent(self, event):
+        self.sink.stop()
+        self.position_timer.stop()
+        super().closeEvent(event)
+
+    @staticmethod
+    def _load_peaks(stem) -> PeakPyramid:
+        """Use the peaks sidecar, building it if the stem has none yet."""
+        path = peaks_path_for(stem)
+        if path.exists():
+            return PeakPyramid.load(path)
+        pyramid = build_peak_pyramid(stem.path)
+        pyramid.save(path)
+        return pyramid
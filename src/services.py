@@ -1,4 +1,5 @@
 """Simplified service layer - KISS principle."""
+import logging
 import sys
 from pathlib import Path
 from typing import Optional, Callable
@@ -6,6 +7,8 @@ from typing import Optional, Callable
 from .domain.models import AudioFile, AudioFormat
 from .infrastructure.subprocess_runner import SubprocessRunner
 
+logger = logging.getLogger(__name__)
+
 
 def get_executable_path(name: str) -> str:
     """Get executable path for bundled or dev environment."""
@@ -35,7 +38,7 @@ class AudioDownloader:
 
         # Skip if exists
         if file_path.exists():
-            print(f"[!] File exists, skipping: {file_path}")
+            logger.info(f"File exists, skipping: {file_path}")
             return AudioFile(file_path, AudioFormat.WAV if format == 'wav' else AudioFormat.MP3)
 
         # Download
@@ -57,7 +60,7 @@ class AudioConverter:
 
         # Skip if output exists
         if output_path.exists():
-            print(f"[!] WAV exists, skipping: {output_path}")
+            logger.info(f"WAV exists, skipping: {output_path}")
             return AudioFile(output_path, AudioFormat.WAV)
 
         # Convert
@@ -90,13 +93,13 @@ class AudioSeparator:
         while True:
             output = process.stdout.readline()
             if output:
-                print(output.strip())
+                logger.debug(output.strip())
                 if on_output:
                     on_output(output.strip())
 
             error = process.stderr.readline()
             if error:
-                print(error.strip())
+                logger.debug(error.strip())
 
             if process.poll() is not None:
                 break
@@ -110,11 +113,17 @@ class AudioSeparator:
 class AudioProcessor:
     """Main audio processing orchestrator - KISS."""
 
-    def __init__(self):
+    def __init__(self, cancellation_token: Optional[Callable[[], bool]] = None):
         self.downloader = AudioDownloader()
         self.converter = AudioConverter()
         self.separator = AudioSeparator()
-        self.cancelled = False
+        self.cancellation_token = cancellation_token
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        """True once cancel() was called or the cancellation token fires."""
+        return self._cancelled or bool(self.cancellation_token and self.cancellation_token())
 
     def process_youtube(self, url: str, output_dir: Path,
                        download_format: str = 'wav',
@@ -142,7 +151,7 @@ class AudioProcessor:
 
         if on_progress:
             on_progress("Separating audio...")
-        stems_dir = self.separator.separate(wav_file, output_dir)
+        stems_dir = self.separator.separate(wav_file, output_dir, on_output=on_progress)
 
         return stems_dir
 
@@ -165,10 +174,10 @@ class AudioProcessor:
 
         if on_progress:
             on_progress("Separating audio...")
-        stems_dir = self.separator.separate(wav_file, output_dir)
+        stems_dir = self.separator.separate(wav_file, output_dir, on_output=on_progress)
 
         return stems_dir
 
     def cancel(self):
         """Cancel current operation."""
-        self.cancelled = True
+        self._cancelled = True
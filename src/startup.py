@@ -0,0 +1,171 @@
+"""Startup helpers: lazy construction of heavy services and import-time profiling.
+
+Only the standard library is imported here, so entry points can load this
+module before anything expensive.
+"""
+import importlib
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+
+class LazyObject:
+    """Proxy that builds the wrapped object on first attribute access."""
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def _get_instance(self) -> Any:
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            with object.__getattribute__(self, '_lock'):
+                instance = object.__getattribute__(self, '_instance')
+                if instance is None:
+                    instance = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_instance(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get_instance(), name, value)
+
+
+def lazy_instance(module_name: str, class_name: str, *args, **kwargs) -> LazyObject:
+    """Import module_name and instantiate class_name only when first used."""
+    return LazyObject(
+        lambda: getattr(importlib.import_module(module_name), class_name)(*args, **kwargs)
+    )
+
+
+class _TimedLoader:
+    """Loader wrapper that times exec_module for one module."""
+
+    def __init__(self, loader, profiler: 'StartupProfiler'):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Hide the wrapper from anything that inspects the module later
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        module.__loader__ = self._loader
+        self._profiler._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__)
+
+
+class StartupProfiler:
+    """Measures per-module import times and startup milestones.
+
+    Installed as the first meta path finder; every module imported after
+    install() has its inclusive and self time recorded.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.imports: dict[str, tuple[float, float]] = {}  # name -> (inclusive, self)
+        self.milestones: list[tuple[str, float]] = []
+        self._stack: list[list] = []  # [name, started_at, child_time]
+        self._local = threading.local()
+
+    def install(self):
+        """Start recording imports."""
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        """Stop recording imports."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, name, path, target=None):
+        # Only the main thread is profiled; background imports would skew the stack
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        if getattr(self._local, 'finding', False):
+            return None
+
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def mark(self, label: str):
+        """Record a startup milestone relative to profiler creation."""
+        self.milestones.append((label, time.perf_counter() - self.started_at))
+
+    def report(self, limit: int = 25, stream=None):
+        """Write the milestone and slowest-import report."""
+        stream = stream or sys.stderr
+        print("=== Startup profile ===", file=stream)
+        for label, elapsed in self.milestones:
+            print(f"{elapsed * 1000:9.1f} ms  {label}", file=stream)
+
+        total_self = sum(self_time for _, self_time in self.imports.values())
+        print(
+            f"\n{len(self.imports)} modules imported, {total_self * 1000:.1f} ms total",
+            file=stream
+        )
+        print(f"{'inclusive':>12} {'self':>10}  module", file=stream)
+        ranked = sorted(self.imports.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (inclusive, self_time) in ranked[:limit]:
+            print(f"{inclusive * 1000:9.1f} ms {self_time * 1000:7.1f} ms  {name}", file=stream)
+        stream.flush()
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self, name: str):
+        name, started_at, child_time = self._stack.pop()
+        inclusive = time.perf_counter() - started_at
+        self.imports[name] = (inclusive, inclusive - child_time)
+        if self._stack:
+            self._stack[-1][2] += inclusive
+
+
+def start_profiler_if_requested(argv: list[str]) -> Optional[StartupProfiler]:
+    """Install a StartupProfiler when --profile-startup is on the command line."""
+    if '--profile-startup' not in argv:
+        return None
+    profiler = StartupProfiler()
+    profiler.install()
+    return profiler
+
+
+def report_when_window_ready(profiler: StartupProfiler):
+    """Print the startup report once the event loop has drawn the first window."""
+    from PyQt6.QtCore import QTimer
+
+    profiler.mark('window shown')
+
+    def report():
+        profiler.mark('first event loop pass')
+        profiler.uninstall()
+        profiler.report()
+
+    QTimer.singleShot(0, report)